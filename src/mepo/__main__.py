@@ -1,13 +1,20 @@
+import os
 from importlib import import_module
 
 from mepo.cmdline.parser import MepoArgParser
 from mepo.utilities import mepoconfig
+from mepo.utilities import trace
 
 
 def main():
     args = MepoArgParser().parse()
     mepo_cmd = mepoconfig.get_alias_command(args.mepo_cmd)
 
+    # Before importing the command, see trace.start()
+    trace_file = args.trace or os.environ.get(trace.TRACE_ENV_VAR)
+    if trace_file:
+        trace.start(trace_file)
+
     # Load the module containing the "run" method of specified command
     cmd_module = import_module(f"mepo.command.{mepo_cmd}")
 
@@ -0,0 +1,28 @@
+class MepoBundleArgParser:
+
+    def __init__(self, bundle):
+        self.bundle = bundle.add_subparsers()
+        self.bundle.title = "mepo bundle sub-commands"
+        self.bundle.dest = "mepo_bundle_cmd"
+        self.bundle.required = True
+        self.__create()
+
+    def __create(self):
+        create = self.bundle.add_parser(
+            "create",
+            description=(
+                "Write a git bundle of the registry version of each component (and its history) "
+                "to <directory>, to rebuild the fixture without network access with "
+                "`mepo clone --from-bundles <directory>`. "
+                "If no component is specified, runs over all components, including the fixture"
+            ),
+        )
+        create.add_argument(
+            "directory", metavar="directory", help="Directory to write the bundles to"
+        )
+        create.add_argument(
+            "comp_name",
+            metavar="comp-name",
+            nargs="*",
+            help="Component(s) to bundle",
+        )
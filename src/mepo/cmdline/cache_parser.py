@@ -0,0 +1,45 @@
+class MepoCacheArgParser:
+
+    def __init__(self, cache):
+        self.cache = cache.add_subparsers()
+        self.cache.title = "mepo cache sub-commands"
+        self.cache.dest = "mepo_cache_cmd"
+        self.cache.required = True
+        self.__list()
+        self.__prune()
+        self.__refresh()
+
+    def __list(self):
+        _ = self.cache.add_parser(
+            "list",
+            description="List the mirrors in the object cache ([cache] dir in `.mepoconfig`)",
+        )
+
+    def __prune(self):
+        prune = self.cache.add_parser(
+            "prune",
+            description=(
+                "Remove the mirrors not used for a while, and leftovers of interrupted clones. "
+                "Clones made with cache mode `reference` need their mirror, "
+                "run `git repack -a -d` in them first to make them independent"
+            ),
+        )
+        prune.add_argument(
+            "--days",
+            metavar="N",
+            type=int,
+            default=90,
+            help="Remove mirrors not used for N days (default: %(default)s)",
+        )
+        prune.add_argument(
+            "-n",
+            "--dry-run",
+            action="store_true",
+            help="Only print what would be removed",
+        )
+
+    def __refresh(self):
+        _ = self.cache.add_parser(
+            "refresh",
+            description="Fetch into all mirrors of the object cache",
+        )
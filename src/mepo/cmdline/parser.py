@@ -5,8 +5,13 @@ from .branch_parser import MepoBranchArgParser
 from .stash_parser import MepoStashArgParser
 from .tag_parser import MepoTagArgParser
 from .config_parser import MepoConfigArgParser
+from .cache_parser import MepoCacheArgParser
+from .bundle_parser import MepoBundleArgParser
+from .worktree_parser import MepoWorktreeArgParser
+from .state_parser import MepoStateArgParser
 
 from ..utilities import mepoconfig
+from ..utilities import executor
 
 
 def get_version():
@@ -40,6 +45,23 @@ class MepoArgParser:
         self.parser.add_argument(
             "--location", action=LocationAction, help=argparse.SUPPRESS
         )
+        self.parser.add_argument(
+            "-j",
+            "--jobs",
+            metavar="N",
+            type=int,
+            default=None,
+            help="Number of components to work on at once (default: [run] jobs "
+            "of .mepoconfig, else 1; 16 for clone, fetch, pull-all, checkout, push, "
+            "tag push, deepen and cache refresh; one per CPU for bundle create)",
+        )
+        self.parser.add_argument(
+            "--trace",
+            metavar="FILE",
+            default=None,
+            help="Record every process mepo spawns, write them to FILE as Chrome "
+            "trace-event JSON and print a summary (also enabled by env var MEPO_TRACE)",
+        )
         self.subparsers = self.parser.add_subparsers()
         self.subparsers.title = "mepo commands"
         self.subparsers.required = True
@@ -71,6 +93,11 @@ class MepoArgParser:
         self.__push()
         self.__save()
         self.__config()
+        self.__cache()
+        self.__deepen()
+        self.__bundle()
+        self.__worktree()
+        self.__state()
         self.__update_state()
         return self.parser.parse_args()
 
@@ -141,6 +168,46 @@ class MepoArgParser:
             action="store_true",
             help="Must be passed with -b/--branch. When set, it not only checkouts out the branch/tag for the fixture, but for all the subrepositories as well.",
         )
+        clone.add_argument(
+            "--from-bundles",
+            metavar="bundle-dir",
+            default=None,
+            help="Clone the fixture and components from the bundles written by "
+            "`mepo bundle create` to bundle-dir instead of their remotes (which "
+            "remain their origin). The fixture is cloned into URL if given (as a "
+            "directory), else into a directory named after it. Submodules are not bundled",
+        )
+        clone.add_argument(
+            "--from",
+            dest="from_fixture",
+            metavar="fixture-dir",
+            default=None,
+            help="Clone the components from their repositories in the fixture at "
+            "fixture-dir, which on the same filesystem hard-links their objects instead "
+            "of copying them. origin is still the registry remote, from which only "
+            "versions fixture-dir does not have are fetched",
+        )
+        clone.add_argument(
+            "--depth",
+            metavar="N",
+            type=int,
+            default=None,
+            help="Shallow clone of the last N commits of the components pinned to a "
+            "tag or hash (default: [clone] depth of .mepoconfig, else full clones; "
+            "a depth in the registry applies to its component). See `mepo deepen`",
+        )
+        clone.add_argument(
+            "--resume",
+            action="store_true",
+            help="Finish a clone that was interrupted: skip the components that were "
+            "fully cloned and complete the others (see .mepo/clone-journal.json)",
+        )
+        clone.add_argument(
+            "--no-progress",
+            action="store_true",
+            help="Do not show the progress of the clones in flight (shown on stderr "
+            "if it is a terminal). The time and size of each clone is printed at the end",
+        )
         clone.add_argument(
             "--partial",
             metavar="partial-type",
@@ -188,7 +255,15 @@ class MepoArgParser:
             "--hashes", action="store_true", help="Print the exact hash of the HEAD."
         )
         status.add_argument(
-            "--parallel", action="store_true", help="Run the parallel version."
+            "--parallel",
+            action="store_true",
+            help="Run the parallel version (one job per CPU unless -j is given).",
+        )
+        status.add_argument(
+            "--backend",
+            choices=executor.BACKENDS,
+            default="thread",
+            help="How parallel jobs are run (default: %(default)s)",
         )
 
     def __restore_state(self):
@@ -198,7 +273,15 @@ class MepoArgParser:
             aliases=mepoconfig.get_command_alias("restore-state"),
         )
         restore_state.add_argument(
-            "--parallel", action="store_true", help="Run the parallel version."
+            "--parallel",
+            action="store_true",
+            help="Run the parallel version (one job per CPU unless -j is given).",
+        )
+        restore_state.add_argument(
+            "--backend",
+            choices=executor.BACKENDS,
+            default="thread",
+            help="How parallel jobs are run (default: %(default)s)",
         )
 
     def __diff(self):
@@ -532,6 +615,58 @@ class MepoArgParser:
         )
         MepoConfigArgParser(config)
 
+    def __deepen(self):
+        deepen = self.subparsers.add_parser(
+            "deepen",
+            description="Fetch the history (and all branches) of components cloned with --depth",
+            aliases=mepoconfig.get_command_alias("deepen"),
+        )
+        deepen.add_argument(
+            "comp_name",
+            metavar="comp-name",
+            nargs="+",
+            help="Component(s) to deepen",
+        )
+        deepen.add_argument(
+            "--depth",
+            metavar="N",
+            type=int,
+            default=None,
+            help="Only fetch N more commits (default: all of the history)",
+        )
+
+    def __bundle(self):
+        bundle = self.subparsers.add_parser(
+            "bundle",
+            description="Runs bundle commands.",
+            aliases=mepoconfig.get_command_alias("bundle"),
+        )
+        MepoBundleArgParser(bundle)
+
+    def __worktree(self):
+        worktree = self.subparsers.add_parser(
+            "worktree",
+            description="Runs worktree commands.",
+            aliases=mepoconfig.get_command_alias("worktree"),
+        )
+        MepoWorktreeArgParser(worktree)
+
+    def __state(self):
+        state = self.subparsers.add_parser(
+            "state",
+            description="Runs commands on the history of mepo states.",
+            aliases=mepoconfig.get_command_alias("state"),
+        )
+        MepoStateArgParser(state)
+
+    def __cache(self):
+        cache = self.subparsers.add_parser(
+            "cache",
+            description="Runs object cache commands.",
+            aliases=mepoconfig.get_command_alias("cache"),
+        )
+        MepoCacheArgParser(cache)
+
     def __update_state(self):
         _ = self.subparsers.add_parser(
             "update-state",
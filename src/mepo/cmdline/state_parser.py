@@ -0,0 +1,53 @@
+class MepoStateArgParser:
+
+    def __init__(self, state):
+        self.state = state.add_subparsers()
+        self.state.title = "mepo state sub-commands"
+        self.state.dest = "mepo_state_cmd"
+        self.state.required = True
+        self.__log()
+        self.__gc()
+
+    def __log(self):
+        log = self.state.add_parser(
+            "log",
+            description=(
+                "List the states mepo wrote (newest first, * marks the current one) "
+                "with their time, number of components and the command that wrote them"
+            ),
+        )
+        log.add_argument(
+            "-n",
+            "--max-count",
+            metavar="N",
+            type=int,
+            default=None,
+            help="Only list the N latest states",
+        )
+
+    def __gc(self):
+        gc = self.state.add_parser(
+            "gc",
+            description=(
+                "Pack all but the latest states into .mepo/state-archive.zip (which "
+                "`unzip` can list and extract from), or delete them"
+            ),
+        )
+        gc.add_argument(
+            "--keep",
+            metavar="N",
+            type=int,
+            default=10,
+            help="Number of latest states to keep (default: %(default)s)",
+        )
+        gc.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the old states instead of archiving them",
+        )
+        gc.add_argument(
+            "-n",
+            "--dry-run",
+            action="store_true",
+            help="Only print what would be done",
+        )
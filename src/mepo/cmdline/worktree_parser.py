@@ -0,0 +1,66 @@
+class MepoWorktreeArgParser:
+
+    def __init__(self, worktree):
+        self.worktree = worktree.add_subparsers()
+        self.worktree.title = "mepo worktree sub-commands"
+        self.worktree.dest = "mepo_worktree_cmd"
+        self.worktree.required = True
+        self.__add()
+        self.__list()
+        self.__remove()
+        self.__prune()
+
+    def __add(self):
+        add = self.worktree.add_parser(
+            "add",
+            description=(
+                "Add a checkout of the fixture at <path> that shares the object stores of "
+                "this one: a `git worktree` of the fixture and of each component at the "
+                "same place under <path>, with its own mepo state. A branch checked out "
+                "here already is checked out detached there"
+            ),
+        )
+        add.add_argument("path", metavar="path", help="Directory of the new fixture")
+        add.add_argument(
+            "target",
+            metavar="registry-or-version",
+            nargs="?",
+            default=None,
+            help="Registry file to take the component versions from, or branch/tag/hash "
+            "of the fixture to check out and take its components.yaml (default: the "
+            "fixture and components as they are in the current state)",
+        )
+        add.add_argument(
+            "--style",
+            metavar="style-type",
+            nargs="?",
+            default=None,
+            choices=["naked", "prefix", "postfix"],
+            help="Style of directory file, default: prefix, allowed options: %(choices)s "
+            "(with registry-or-version only)",
+        )
+
+    def __list(self):
+        _ = self.worktree.add_parser(
+            "list",
+            description="List the worktrees of the fixture (* marks the current one)",
+        )
+
+    def __remove(self):
+        remove = self.worktree.add_parser(
+            "remove",
+            description="Remove a fixture added by `mepo worktree add` and the worktrees of its components",
+        )
+        remove.add_argument("path", metavar="path", help="Fixture to remove")
+        remove.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            help="Remove worktrees with changes and components that are clones",
+        )
+
+    def __prune(self):
+        _ = self.worktree.add_parser(
+            "prune",
+            description="Forget the worktrees of the fixture and components whose directory was removed",
+        )
@@ -1,5 +1,6 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
@@ -7,7 +8,10 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2delbr = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2delbr:
+
+    def delete_branch(comp):
         git = GitRepository(comp.remote, comp.local)
         git.delete_branch(args.branch_name, args.force)
         print("- {}: {}".format(comp.name, args.branch_name))
+
+    executor.run(comps2delbr, delete_branch, executor.get_jobs(args))
@@ -1,6 +1,8 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
+from ..utilities import shellcmd
 
 
 def run(args):
@@ -8,13 +10,16 @@ def run(args):
     comps2list = _get_comps_to_list(args.comp_name, allcomps)
     max_namelen = len(max([x.name for x in comps2list], key=len))
     FMT = "{:<%s.%ss} | {:<s}" % (max_namelen, max_namelen)
-    for comp in comps2list:
+
+    def list_branches(comp):
         git = GitRepository(comp.remote, comp.local)
-        output = git.list_branch(args.all, args.nocolor).rstrip().split("\n")
-        print(FMT.format(comp.name, output[0]))
-        for line in output[1:]:
+        output = shellcmd.rstrip_lines(git.list_branch(args.all, args.nocolor))
+        print(FMT.format(comp.name, next(output, "")))
+        for line in output:
             print(FMT.format("", line))
 
+    executor.run(comps2list, list_branches, executor.get_jobs(args))
+
 
 def _get_comps_to_list(specified_comps, allcomps):
     comps_to_list = allcomps
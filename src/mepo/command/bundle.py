@@ -0,0 +1,8 @@
+from .bundle_create import run as bundle_create_run
+
+
+def run(args):
+    d = {
+        "create": bundle_create_run,
+    }
+    d[args.mepo_bundle_cmd](args)
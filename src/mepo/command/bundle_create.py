@@ -0,0 +1,91 @@
+import os
+import copy
+import json
+
+from ..state import MepoState
+from ..utilities import verify
+from ..utilities import executor
+from ..git import GitRepository
+from ..registry import Registry
+
+# Lists the bundles of a directory written by `mepo bundle create`
+MANIFEST_FILE_NAME = "mepo-bundles.json"
+# Registry of the bundled versions, what `mepo clone --from-bundles` uses
+REGISTRY_FILE_NAME = "mepo-bundles.yaml"
+
+
+def run(args):
+    allcomps = MepoState.read_state()
+    comps2bundle = _get_comps_to_bundle(args.comp_name, allcomps)
+    bundle_dir = os.path.abspath(args.directory)
+    os.makedirs(bundle_dir, exist_ok=True)
+    max_namelen = len(max([x.name for x in comps2bundle], key=len))
+
+    def create_bundle(comp):
+        bundle = os.path.join(bundle_dir, f"{comp.name}.bundle")
+        ref, oid = get_bundle_ref(comp.version)
+        git = GitRepository(comp.remote, comp.local)
+        git.create_bundle(bundle, ref, oid)
+        size = os.path.getsize(bundle) / 2**20
+        print(f"{comp.name:<{max_namelen}} | {ref} ({size:.1f} MiB)")
+        return {"bundle": os.path.basename(bundle), "ref": ref}
+
+    # Packing is CPU bound, one bundle per CPU by default
+    results = executor.run(
+        comps2bundle, create_bundle, executor.get_jobs(args, default=os.cpu_count())
+    )
+    update_manifest(bundle_dir, zip(comps2bundle, results))
+    write_registry(bundle_dir, allcomps)
+
+
+def get_bundle_ref(version):
+    """(ref to bundle, oid to point it at or None) for a MepoVersion"""
+    name, tYpe, detached = version
+    if tYpe == "t":
+        return f"refs/tags/{name}", None
+    if tYpe == "h":
+        return f"refs/mepo/{name}", name
+    if name.startswith("origin/"):
+        return f"refs/remotes/{name}", None
+    if detached:
+        return f"refs/remotes/origin/{name}", None
+    return f"refs/heads/{name}", None
+
+
+def update_manifest(bundle_dir, bundles):
+    """Add the (comp, {"bundle": file name, "ref": ref}) pairs to the manifest"""
+    manifest = read_manifest(bundle_dir, missing_ok=True)
+    for comp, entry in bundles:
+        if comp.fixture:
+            entry["remote"] = comp.remote
+            entry["version"] = comp.version.name
+            manifest["fixture"] = comp.name
+        manifest["components"][comp.name] = entry
+    with open(os.path.join(bundle_dir, MANIFEST_FILE_NAME), "w") as fout:
+        json.dump(manifest, fout, indent=1)
+
+
+def write_registry(bundle_dir, allcomps):
+    """Registry of the versions in the state, which may differ from the fixture's"""
+    complist = dict()
+    for comp in allcomps:
+        comp = copy.copy(comp)
+        comp.local = os.path.relpath(comp.local, MepoState.get_root_dir())
+        complist.update(comp.to_registry_format())
+    Registry(os.path.join(bundle_dir, REGISTRY_FILE_NAME)).write_yaml(complist)
+
+
+def read_manifest(bundle_dir, missing_ok=False):
+    path = os.path.join(bundle_dir, MANIFEST_FILE_NAME)
+    if missing_ok and not os.path.exists(path):
+        return {"fixture": None, "components": {}}
+    with open(path, "r") as fin:
+        return json.load(fin)
+
+
+def _get_comps_to_bundle(specified_comps, allcomps):
+    comps_to_bundle = allcomps
+    if specified_comps:
+        verify.valid_components(specified_comps, allcomps)
+        comps_to_bundle = [x for x in allcomps if x.name in specified_comps]
+    return comps_to_bundle
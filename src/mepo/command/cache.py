@@ -0,0 +1,12 @@
+from .cache_list import run as cache_list_run
+from .cache_prune import run as cache_prune_run
+from .cache_refresh import run as cache_refresh_run
+
+
+def run(args):
+    d = {
+        "list": cache_list_run,
+        "prune": cache_prune_run,
+        "refresh": cache_refresh_run,
+    }
+    d[args.mepo_cache_cmd](args)
@@ -0,0 +1,24 @@
+import time
+
+from ..utilities import objectcache
+
+
+def run(args):
+    cache_dir = get_cache_dir()
+    mirrors = objectcache.list_mirrors(cache_dir)
+    print(f"Object cache: {cache_dir} ({len(mirrors)} mirrors)")
+    if not mirrors:
+        return
+    width = max(len(url or "?") for _, url, _, _ in mirrors)
+    for _, url, size, last_used in mirrors:
+        last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used))
+        print(f"{url or '?':<{width}} | {size / 2**20:>9.1f} MiB | {last_used}")
+
+
+def get_cache_dir():
+    cache_dir = objectcache.get_cache_dir()
+    if cache_dir is None:
+        raise Exception(
+            "No object cache, set one with `mepo config set cache.dir <directory>`"
+        )
+    return cache_dir
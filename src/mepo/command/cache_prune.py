@@ -0,0 +1,11 @@
+from .cache_list import get_cache_dir
+from ..utilities import objectcache
+
+
+def run(args):
+    removed = objectcache.prune(get_cache_dir(), args.days, args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    for path in removed:
+        print(f"{action} {path}")
+    if not removed:
+        print("Nothing to prune")
@@ -0,0 +1,21 @@
+import os
+from types import SimpleNamespace
+
+from .cache_list import get_cache_dir
+from ..git import MAX_CONCURRENT_GIT
+from ..utilities import executor
+from ..utilities import objectcache
+
+
+def run(args):
+    cache_dir = get_cache_dir()
+    mirrors = [
+        SimpleNamespace(name=url or os.path.basename(path), url=url)
+        for path, url, _, _ in objectcache.list_mirrors(cache_dir)
+    ]
+
+    def refresh(mirror):
+        objectcache.update_mirror(cache_dir, mirror.url)
+        print(f"Refreshed {mirror.name}")
+
+    executor.run(mirrors, refresh, executor.get_jobs(args, default=MAX_CONCURRENT_GIT))
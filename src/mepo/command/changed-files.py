@@ -3,10 +3,12 @@ import os
 from ..state import MepoState
 
 from ..utilities import verify
+from ..utilities import executor
 from ..utilities.version import version_to_string
-from ..utilities.version import sanitize_version_string
 from ..git import GitRepository
 
+from .compare import any_differing_repos
+
 VER_LEN = 30
 
 
@@ -16,9 +18,10 @@ def run(args):
     if any_differing_repos(allcomps):
         comps2diff = _get_comps_to_diff(args.comp_name, allcomps)
 
-        for comp in comps2diff:
+        def print_changed_files(comp):
             git = GitRepository(comp.remote, comp.local)
-            orig_ver = version_to_string(comp.version, git).split()[1]
+            # Only the version name is needed, so no git call for the hash
+            orig_ver = version_to_string(comp.version).split()[1]
             orig_type = comp.version.type
             changed_files = git.get_changed_files(
                 untracked=True, orig_ver=orig_ver, comp_type=orig_type
@@ -32,6 +35,8 @@ def run(args):
                     else:
                         print(os.path.join(comp.local, file))
 
+        executor.run(comps2diff, print_changed_files, executor.get_jobs(args))
+
 
 def _get_comps_to_diff(specified_comps, allcomps):
     comps_to_diff = allcomps
@@ -39,18 +44,3 @@ def _get_comps_to_diff(specified_comps, allcomps):
         verify.valid_components(specified_comps, allcomps)
         comps_to_diff = [x for x in allcomps if x.name in specified_comps]
     return comps_to_diff
-
-
-def any_differing_repos(allcomps):
-    for comp in allcomps:
-        git = GitRepository(comp.remote, comp.local)
-        curr_ver = version_to_string(git.get_version(), git)
-        orig_ver = version_to_string(comp.version, git)
-
-        # This command is to try and work with git tag oddities
-        curr_ver = sanitize_version_string(orig_ver, curr_ver, git)
-
-        if curr_ver not in orig_ver:
-            return True
-
-    return False
@@ -1,12 +1,14 @@
 from ..state import MepoState
-from ..git import GitRepository
+from ..git import CachedGitRepository
 from ..utilities import colors
+from ..utilities import executor
 
 
 def run(args):
     allcomps = MepoState.read_state()
-    for comp in allcomps:
-        git = GitRepository(comp.remote, comp.local)
+
+    def checkout_if_exists(comp):
+        git = CachedGitRepository(comp.remote, comp.local)
         ref_name = args.ref_name
         status, ref_type = git.verify_branch_or_tag(ref_name)
 
@@ -31,3 +33,5 @@ def run(args):
                         )
                     )
                 git.checkout(ref_name, args.detach)
+
+    executor.run(allcomps, checkout_if_exists, executor.get_jobs(args))
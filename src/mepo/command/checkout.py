@@ -1,17 +1,19 @@
 from ..state import MepoState
 from ..utilities import verify
 from ..utilities import colors
-from ..git import GitRepository
+from ..utilities import executor
+from ..git import MAX_CONCURRENT_GIT
 
 
 def run(args):
     allcomps = MepoState.read_state()
     comps2checkout = _get_comps_to_checkout(args.comp_name, allcomps)
-    for comp in comps2checkout:
-        git = GitRepository(comp.remote, comp.local)
+
+    async def checkout(comp, git):
         branch = args.branch_name
         if args.b:
-            git.create_branch(branch)
+            await git.create_branch(branch)
+            await git.checkout(branch, args.detach)
             if not args.quiet:
                 # print('+ {}: {}'.format(comp.name, branch))
                 print(
@@ -22,6 +24,7 @@ def run(args):
                     )
                 )
         else:
+            await git.checkout(branch, args.detach)
             if not args.quiet:
                 print(
                     "Checking out %s in %s"
@@ -30,7 +33,9 @@ def run(args):
                         colors.RESET + comp.name + colors.RESET,
                     )
                 )
-        git.checkout(branch, args.detach)
+
+    jobs = executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    executor.run_async(comps2checkout, checkout, jobs)
 
 
 def _get_comps_to_checkout(specified_comps, allcomps):
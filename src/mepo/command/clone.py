@@ -1,5 +1,7 @@
 import os
 import shutil
+import functools
+import contextlib
 import pathlib
 from urllib.parse import urlparse
 from types import SimpleNamespace
@@ -8,8 +10,16 @@ from .init import run as mepo_init
 from ..state import MepoState
 from ..state import StateDoesNotExistError
 from ..git import GitRepository
+from ..git import MAX_CONCURRENT_GIT
+from ..git import FULL_HASH
 from ..utilities import colors
+from ..utilities import executor
+from ..utilities.journal import CloneJournal
+from ..utilities.progress import CloneProgress
+from .bundle_create import read_manifest
+from .bundle_create import REGISTRY_FILE_NAME
 from ..utilities import mepoconfig
+from ..utilities.chdir import chdir as mepo_chdir
 
 
 def run(args):
@@ -24,22 +34,60 @@ def run(args):
     2. Clone fixture as well
        a. mepo clone <url> [<directory>]
        b. mepo clone -b <branch> <url> [<directory>]
+    3. Clone fixture and components from bundles (mepo bundle create)
+       mepo clone --from-bundles <bundle-dir> [<directory>]
+    4. Clone components from the repositories of another fixture on disk
+       (hard-linked), with any of the above
+       mepo clone --from <fixture-dir> [<url> [<directory>]]
 
     Steps -
     1. Clone fixture - if url is provided
     2. Read state - initialize mepo (write state) first, if needed
-    3. Clone components
+    3. Clone components (with --resume, only what a previous clone did not
+       finish, see utilities/journal.py)
     4. Checkout all repos to the specified branch
     """
     CWD = os.getcwd()
 
     arg_partial = handle_partial(args.partial)
+    arg_depth = handle_depth(getattr(args, "depth", None))
+    resume = getattr(args, "resume", False)
 
-    if args.url is not None:
-        fixture_dir = clone_fixture(args.url, args.branch, args.directory, arg_partial)
+    bundles = None
+    registry = args.registry
+    if getattr(args, "from_bundles", None) is not None:
+        bundle_dir = os.path.abspath(args.from_bundles)
+        manifest = read_manifest(bundle_dir)
+        bundles = {
+            name: os.path.join(bundle_dir, x["bundle"])
+            for name, x in manifest["components"].items()
+        }
+        # Without a URL, the positional argument is the directory
+        fixture_dir = clone_fixture_from_bundle(
+            manifest, bundles, args.url or args.directory, resume
+        )
         os.chdir(fixture_dir)
-    allcomps = read_state(args.style, args.registry)
-    clone_components(allcomps, arg_partial)
+        if registry is None:
+            registry = os.path.join(bundle_dir, REGISTRY_FILE_NAME)
+    elif args.url is not None:
+        fixture_dir = clone_fixture(
+            args.url, args.branch, args.directory, arg_partial, resume
+        )
+        os.chdir(fixture_dir)
+    allcomps = read_state(args.style, registry)
+    sources = None
+    if getattr(args, "from_fixture", None) is not None:
+        sources = get_local_sources(os.path.join(CWD, args.from_fixture))
+    clone_components(
+        allcomps,
+        arg_partial,
+        executor.get_jobs(args, default=MAX_CONCURRENT_GIT),
+        resume,
+        arg_depth,
+        bundles,
+        show_progress=not getattr(args, "no_progress", False),
+        sources=sources,
+    )
     if args.allrepos:
         checkout_all_repos(allcomps, args.branch)
 
@@ -62,16 +110,74 @@ def handle_partial(partial):
     return partial
 
 
-def clone_fixture(url, branch=None, directory=None, partial=None):
+def handle_depth(depth):
+    """
+    Like `partial`, `depth` can be set via command line or .mepoconfig
+    ([clone] depth), the command line taking precedence. It applies to the
+    components pinned to a tag or hash, a `depth` in the registry applies
+    to its component whatever the version
+    """
+    if depth is None and mepoconfig.has_option("clone", "depth"):
+        depth = int(mepoconfig.get("clone", "depth"))
+        print(f"Found clone depth [{depth}] in .mepoconfig")
+    if depth is not None and depth < 1:
+        raise ValueError(f"Clone depth must be at least 1, not {depth}")
+    return depth
+
+
+def get_comp_depth(comp, depth):
+    """Depth of the clone of comp, None for a full clone"""
+    if comp.depth is not None:
+        depth = comp.depth
+    elif comp.version.type not in ("t", "h"):
+        return None
+    if comp.version.type == "h" and not FULL_HASH.match(comp.version.name):
+        return None  # cannot be fetched by an abbreviated hash
+    return depth
+
+
+def clone_fixture(url, branch=None, directory=None, partial=None, resume=False):
     if directory is None:
         p = urlparse(url)
         last_url_node = p.path.rsplit("/")[-1]
         directory = pathlib.Path(last_url_node).stem
+    if resume and os.path.isdir(os.path.join(directory, ".git")):
+        return directory
     git = GitRepository(url, directory)
     git.clone(branch, partial)
     return directory
 
 
+def clone_fixture_from_bundle(manifest, bundles, directory=None, resume=False):
+    name = manifest["fixture"]
+    if name is None:
+        raise Exception("The fixture was not bundled")
+    directory = directory or name
+    if resume and os.path.isdir(os.path.join(directory, ".git")):
+        return directory
+    entry = manifest["components"][name]
+    git = GitRepository(entry["remote"], directory)
+    git.clone_bundle(bundles[name], entry["version"])
+    return directory
+
+
+def get_local_sources(fixture_dir):
+    """
+    {name: repository} of the components cloned in the fixture at
+    fixture_dir, except partial clones (their missing objects would have
+    to come from the source's origin)
+    """
+    with mepo_chdir(fixture_dir):
+        comps = MepoState.read_state()
+    sources = {}
+    for comp in comps:
+        if comp.fixture or not os.path.exists(os.path.join(comp.local, ".git")):
+            continue
+        if not GitRepository(comp.remote, comp.local).is_partial():
+            sources[comp.name] = comp.local
+    return sources
+
+
 def read_state(arg_style, arg_registry):
     while True:
         try:
@@ -92,24 +198,115 @@ def get_registry(arg_registry):
     return registry
 
 
-def clone_components(allcomps, partial):
+def clone_components(
+    allcomps,
+    partial,
+    jobs=1,
+    resume=False,
+    depth=None,
+    bundles=None,
+    show_progress=True,
+    sources=None,
+):
+    """
+    Clone, sparsify and checkout the components, up to `jobs` at a time.
+    Components nested in another one are cloned after it. The phases each
+    component went through are recorded in the clone journal; with resume,
+    completed components are skipped and the others finished. See
+    handle_depth() for depth. With bundles ({name: bundle file}), the
+    components are cloned from their bundle instead of their remote. With
+    sources ({name: repository on disk}), they are cloned from that
+    repository if they have one, see GitRepository.clone_local()
+
+    With show_progress, the progress of the clones in flight is shown on
+    stderr if it is a terminal (see utilities/progress.py). A table of the
+    time and size of each clone is printed at the end
+    """
     max_namelen = max([len(comp.name) for comp in allcomps])
-    for comp in allcomps:
-        if comp.fixture:
-            continue  # not cloning fixture
-        recurse_submodules = comp.recurse_submodules
+    comps = [comp for comp in allcomps if not comp.fixture]  # not cloning fixture
+    journal = CloneJournal(MepoState.get_dir())
+    report = CloneProgress([comp.name for comp in comps])
+
+    def clone(comp):
+        # Submodules are not bundled
+        recurse_submodules = comp.recurse_submodules if bundles is None else None
         # According to Git, treeless clones do not interact well with
         # submodules. So if any comp has the recurse option set to True,
         # we do a non-partial clone
-        partial = None if partial == "treeless" and recurse_submodules else partial
+        comp_partial = None if partial == "treeless" and recurse_submodules else partial
         version = comp.version.name
         version = version.replace("origin/", "")
         git = GitRepository(comp.remote, comp.local)
-        git.clone(version, recurse_submodules, partial)
-        if comp.sparse:
-            git.sparsify(comp.sparse)
+        phase = journal.get(comp.name)
+
+        def progress(phase):
+            journal.record(comp.name, phase)
+
+        if phase is not None and phase != "checked-out" and not resume:
+            raise RuntimeError(
+                f"Clone of {comp.name} was interrupted, run `mepo clone --resume`"
+            )
+        if resume and (journal.is_done(comp.name) or _cloned_by_hand(comp, phase)):
+            report.skip(comp.name)
+            print_clone_info(comp.name, comp.version, max_namelen)
+            return
+        report.start(comp.name)
+        try:
+            if resume and phase not in (None, "started"):
+                git.complete_clone(
+                    phase,
+                    version,
+                    recurse_submodules,
+                    comp.sparse or None,
+                    progress,
+                    resume=True,
+                )
+            else:
+                if phase == "started" and os.path.isdir(comp.local):
+                    # Whatever git clone left when it was interrupted
+                    shutil.rmtree(comp.local)
+                progress("started")
+                if sources is not None and comp.name in sources:
+                    git.clone_local(
+                        sources[comp.name],
+                        version,
+                        recurse_submodules,
+                        comp.sparse or None,
+                        progress,
+                    )
+                elif bundles is not None:
+                    if comp.name not in bundles:
+                        raise Exception(f"No bundle of {comp.name}")
+                    git.clone_bundle(
+                        bundles[comp.name], version, comp.sparse or None, progress
+                    )
+                else:
+                    git.clone(
+                        version,
+                        recurse_submodules,
+                        comp_partial,
+                        sparse=comp.sparse or None,
+                        progress=progress,
+                        depth=get_comp_depth(comp, depth),
+                        git_progress=functools.partial(report.update, comp.name),
+                    )
+        except BaseException:
+            report.finish(comp.name)
+            raise
+        report.finish(comp.name, comp.local)
         print_clone_info(comp.name, comp.version, max_namelen)
 
+    try:
+        with report.live() if show_progress else contextlib.nullcontext():
+            executor.run_nested(comps, clone, jobs)
+    finally:
+        report.print_summary()
+
+
+def _cloned_by_hand(comp, phase):
+    """Unknown to the journal (e.g., cloned before it existed) but there"""
+    return phase is None and os.path.isdir(os.path.join(comp.local, ".git"))
+
 
 def print_clone_info(comp_name, comp_version, name_width):
     ver_name_type = f"({comp_version.type}) {comp_version.name}"
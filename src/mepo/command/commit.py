@@ -4,6 +4,7 @@ import subprocess
 
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 from ..git import get_editor as get_git_editor
 
@@ -30,7 +31,7 @@ def run(args):
         tf.flush()
         subprocess.call([EDITOR, tf.name])
 
-    for comp in comps2commit:
+    def commit(comp):
         git = GitRepository(comp.remote, comp.local)
         if args.all:
             stage_files(git, comp, commit=True)
@@ -42,6 +43,8 @@ def run(args):
         for myfile in staged_files:
             print("+ {}: {}".format(comp.name, myfile))
 
+    executor.run(comps2commit, commit, executor.get_jobs(args))
+
     # Now close and by-hand delete the temp file
     if not args.message:
         tf.close()
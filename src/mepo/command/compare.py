@@ -3,16 +3,20 @@ from shutil import get_terminal_size
 from ..state import MepoState
 
 from ..utilities import colors
+from ..utilities import executor
 from ..utilities.version import version_to_string
 from ..utilities.version import sanitize_version_string
 
-from ..git import GitRepository
+from ..git import CachedGitRepository
 
 VER_LEN = 30
 
 
 def run(args):
     allcomps = MepoState.read_state()
+    # Probe all components up front (on -j threads), the passes below are
+    # then answered from the cache of CachedGitRepository
+    executor.run(allcomps, get_versions, executor.get_jobs(args))
 
     if not any_differing_repos(allcomps):
         print("No repositories have changed")
@@ -20,13 +24,7 @@ def run(args):
         max_namelen, max_origlen = calculate_header_lengths(allcomps, args.all)
         print_header(max_namelen, max_origlen)
         for comp in allcomps:
-            git = GitRepository(comp.remote, comp.local)
-            curr_ver = version_to_string(git.get_version(), git)
-            orig_ver = version_to_string(comp.version, git)
-
-            # This command is to try and work with git tag oddities
-            curr_ver = sanitize_version_string(orig_ver, curr_ver, git)
-
+            orig_ver, curr_ver = get_versions(comp)
             print_cmp(
                 comp.name,
                 orig_ver,
@@ -39,16 +37,24 @@ def run(args):
             )
 
 
-def any_differing_repos(allcomps):
+def get_versions(comp):
+    """Return (original, current) version strings of a component"""
+    git = CachedGitRepository(comp.remote, comp.local)
+    # The working tree is not needed to compare versions
+    probe = git.probe(worktree=False)
+    curr_ver = version_to_string(probe.version, git, probe.short_oid)
+    orig_ver = version_to_string(comp.version, git, probe.short_oid)
 
-    for comp in allcomps:
-        git = GitRepository(comp.remote, comp.local)
-        curr_ver = version_to_string(git.get_version(), git)
-        orig_ver = version_to_string(comp.version, git)
+    # This command is to try and work with git tag oddities
+    curr_ver = sanitize_version_string(orig_ver, curr_ver, git, probe)
+
+    return orig_ver, curr_ver
 
-        # This command is to try and work with git tag oddities
-        curr_ver = sanitize_version_string(orig_ver, curr_ver, git)
 
+def any_differing_repos(allcomps):
+
+    for comp in allcomps:
+        orig_ver, curr_ver = get_versions(comp)
         if curr_ver not in orig_ver:
             return True
 
@@ -59,23 +65,17 @@ def calculate_header_lengths(allcomps, all_repos=False):
     names = []
     versions = []
     for comp in allcomps:
-        git = GitRepository(comp.remote, comp.local)
+        orig_ver, curr_ver = get_versions(comp)
 
         # We want to base the display on changed repos
         # if we don't ask for all repos
         if not all_repos:
-            curr_ver = version_to_string(git.get_version(), git)
-            orig_ver = version_to_string(comp.version, git)
-
-            # This command is to try and work with git tag oddities
-            curr_ver = sanitize_version_string(orig_ver, curr_ver, git)
-
             if curr_ver not in orig_ver:
                 names.append(comp.name)
-                versions.append(version_to_string(comp.version, git))
+                versions.append(orig_ver)
         else:
             names.append(comp.name)
-            versions.append(version_to_string(comp.version, git))
+            versions.append(orig_ver)
     max_namelen = len(max(names, key=len))
     # Note: max_namelen could be 3 characters but we want at least 4 for "Repo"
     max_namelen = max(max_namelen, 4)
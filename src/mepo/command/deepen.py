@@ -0,0 +1,26 @@
+from ..state import MepoState
+from ..utilities import verify
+from ..utilities import executor
+from ..git import GitRepository
+from ..git import MAX_CONCURRENT_GIT
+
+
+def run(args):
+    allcomps = MepoState.read_state()
+    verify.valid_components(args.comp_name, allcomps)
+    comps2deepen = [x for x in allcomps if x.name in args.comp_name]
+
+    def deepen(comp):
+        git = GitRepository(comp.remote, comp.local)
+        if not git.is_shallow():
+            print(f"{comp.name} is not a shallow clone")
+            return
+        git.deepen(args.depth)
+        if args.depth is None:
+            print(f"Fetched the full history of {comp.name}")
+        else:
+            print(f"Fetched {args.depth} more commits of {comp.name}")
+
+    executor.run(
+        comps2deepen, deepen, executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    )
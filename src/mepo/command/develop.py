@@ -2,13 +2,15 @@ from ..state import MepoState
 from ..utilities import verify
 from ..git import GitRepository
 from ..utilities import colors
+from ..utilities import executor
 
 
 def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2dev = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2dev:
+
+    def develop(comp):
         git = GitRepository(comp.remote, comp.local)
         if comp.develop is None:
             raise Exception("'develop' branch not specified for {}".format(comp.name))
@@ -22,3 +24,5 @@ def run(args):
             )
         git.checkout(comp.develop)
         _ = git.pull()
+
+    executor.run(comps2dev, develop, executor.get_jobs(args))
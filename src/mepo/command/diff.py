@@ -1,25 +1,40 @@
 import os
+import itertools
 
 from shutil import get_terminal_size
 
 from ..state import MepoState
 from ..git import GitRepository
 from ..utilities import verify
+from ..utilities import shellcmd
+from ..utilities import executor
 
 
 def run(args):
     foundDiff = False
 
     allcomps = MepoState.read_state()
+    root_dir = MepoState.get_root_dir()
     comps2diff = _get_comps_to_diff(args.comp_name, allcomps)
 
-    for comp in comps2diff:
-        result = check_component_diff(comp, args)
-        if result:
+    jobs = executor.get_jobs(args)
+
+    def diff(comp):
+        # Only the first line is waited for here, so that a failing git diff
+        # is reported by the executor. The rest is printed as it comes, below
+        lines = check_component_diff(comp, args)
+        first_line = next(lines, None)
+        if first_line is None:
+            return None
+        return itertools.chain([first_line], lines)
+
+    results = executor.run(comps2diff, diff, jobs)
+    for comp, result in zip(comps2diff, results):
+        if result is not None:
             if not foundDiff:
                 print("Diffing...", flush=True)
                 foundDiff = True
-            print_diff(comp, args, result)
+            print_diff(comp, args, result, root_dir)
 
     if not foundDiff:
         print("No diffs found")
@@ -42,30 +57,33 @@ def check_component_diff(comp, args):
         _ignore_submodules = comp.ignore_submodules
     except AttributeError:
         _ignore_submodules = None
-    return git.run_diff(args, _ignore_submodules)
+    return shellcmd.rstrip_lines(git.run_diff(args, _ignore_submodules))
 
 
-def print_diff(comp, args, output):
+def print_diff(comp, args, output, root_dir):
     columns, lines = get_terminal_size(fallback=(80, 20))
     horiz_line = "\u2500" * columns
 
-    print("{} (location: {}):".format(comp.name, _get_relative_path(comp.local)))
+    print(
+        "{} (location: {}):".format(comp.name, _get_relative_path(comp.local, root_dir))
+    )
     print()
-    for line in output.split("\n"):
+    for line in output:
         # print('   |', line.rstrip())
         print(line.rstrip())
     print(horiz_line)
 
 
-def _get_relative_path(local_path):
+def _get_relative_path(local_path, root_dir):
     """
     Get the relative path when given a local path.
 
     local_path: The path to a subrepo as known by mepo (relative to the .mepo directory)
+    root_dir: The root of the fixture, MepoState.get_root_dir()
     """
 
     # This creates a full path on the disk from the root of mepo and the local_path
-    full_local_path = os.path.join(MepoState.get_root_dir(), local_path)
+    full_local_path = os.path.join(root_dir, local_path)
 
     # We return the path relative to where we currently are
     return os.path.relpath(full_local_path, os.getcwd())
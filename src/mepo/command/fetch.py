@@ -1,16 +1,20 @@
 from ..state import MepoState
 from ..utilities import colors
 from ..utilities import verify
-from ..git import GitRepository
+from ..utilities import executor
+from ..git import MAX_CONCURRENT_GIT
 
 
 def run(args):
     allcomps = MepoState.read_state()
     comps2fetch = _get_comps_to_list(args.comp_name, allcomps)
-    for comp in comps2fetch:
-        git = GitRepository(comp.remote, comp.local)
+
+    async def fetch(comp, git):
         print("Fetching %s" % colors.YELLOW + comp.name + colors.RESET)
-        git.fetch(args)
+        await git.fetch(args)
+
+    jobs = executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    executor.run_async(comps2fetch, fetch, jobs)
 
 
 def _get_comps_to_list(specified_comps, allcomps):
@@ -1,28 +1,39 @@
 from ..state import MepoState
 from ..component import MepoVersion
-from ..git import GitRepository
+from ..git import CachedGitRepository
+from ..git import MAX_CONCURRENT_GIT
 from ..utilities import colors
+from ..utilities import executor
 
 
 def run(args):
     allcomps = MepoState.read_state()
     detached_comps = []
+    comps2pull = []
+    branches = {}
     for comp in allcomps:
-        git = GitRepository(comp.remote, comp.local)
+        git = CachedGitRepository(comp.remote, comp.local)
         name, tYpe, detached = MepoVersion(*git.get_version())
         if detached:
             detached_comps.append(comp.name)
         else:
-            print(
-                "Pulling branch %s in %s "
-                % (
-                    colors.YELLOW + name + colors.RESET,
-                    colors.RESET + comp.name + colors.RESET,
-                )
+            comps2pull.append(comp)
+            branches[comp.name] = name
+
+    async def pull(comp, git):
+        print(
+            "Pulling branch %s in %s "
+            % (
+                colors.YELLOW + branches[comp.name] + colors.RESET,
+                colors.RESET + comp.name + colors.RESET,
             )
-            output = git.pull()
-            if not args.quiet:
-                print(output)
+        )
+        output = await git.pull()
+        if not args.quiet:
+            print(output)
+
+    jobs = executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    executor.run_async(comps2pull, pull, jobs)
     if len(detached_comps) > 0:
         print(
             "The following repos were not pulled (detached HEAD): %s"
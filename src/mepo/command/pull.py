@@ -2,15 +2,17 @@ from ..state import MepoState
 from ..component import MepoVersion
 from ..utilities import verify
 from ..utilities import colors
-from ..git import GitRepository
+from ..utilities import executor
+from ..git import CachedGitRepository
 
 
 def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2pull = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2pull:
-        git = GitRepository(comp.remote, comp.local)
+
+    def pull(comp):
+        git = CachedGitRepository(comp.remote, comp.local)
         name, tYpe, is_detached = MepoVersion(*git.get_version())
         if is_detached:
             raise Exception("{} has detached head! Cannot pull.".format(comp.name))
@@ -25,3 +27,5 @@ def run(args):
             output = git.pull()
             if not args.quiet:
                 print(output)
+
+    executor.run(comps2pull, pull, executor.get_jobs(args))
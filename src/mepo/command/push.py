@@ -1,14 +1,18 @@
 from ..utilities import verify
+from ..utilities import executor
 from ..state import MepoState
-from ..git import GitRepository
+from ..git import MAX_CONCURRENT_GIT
 
 
 def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2push = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2push:
-        git = GitRepository(comp.remote, comp.local)
-        output = git.push()
+
+    async def push(comp, git):
+        output = await git.push()
         print("----------\nPushed: {}\n----------".format(comp.name))
         print(output)
+
+    jobs = executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    executor.run_async(comps2push, push, jobs)
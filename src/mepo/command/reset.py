@@ -48,7 +48,7 @@ def run(args):
             continue
         else:
             # Get the relative path to the component
-            relpath = _get_relative_path(comp.local)
+            relpath = _get_relative_path(comp.local, rootdir)
             print(f"Removing {relpath}", end="...")
             # Remove the component if not dry run
             if not args.dry_run:
@@ -91,15 +91,16 @@ def run(args):
             print("Dry-run only. Not re-cloning all subrepos")
 
 
-def _get_relative_path(local_path):
+def _get_relative_path(local_path, root_dir):
     """
     Get the relative path when given a local path.
 
     local_path: The path to a subrepo as known by mepo (relative to the mepo state directory)
+    root_dir: The root of the fixture, MepoState.get_root_dir()
     """
 
     # This creates a full path on the disk from the root of mepo and the local_path
-    full_local_path = os.path.join(MepoState.get_root_dir(), local_path)
+    full_local_path = os.path.join(root_dir, local_path)
 
     # We return the path relative to where we currently are
     return os.path.relpath(full_local_path, os.getcwd())
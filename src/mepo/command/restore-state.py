@@ -1,34 +1,36 @@
-import multiprocessing as mp
-
 from ..state import MepoState
-from ..git import GitRepository
+from ..git import CachedGitRepository
+from ..git import format_status_entries
 from ..utilities.version import version_to_string
 from ..utilities import colors
+from ..utilities import executor
 
 
 def run(args):
     print("Checking status...", flush=True)
     allcomps = MepoState.read_state()
-    if args.parallel:
-        with mp.Pool() as pool:
-            result = pool.map(check_component_status, allcomps)
-    else:
-        result = []
-        for comp in allcomps:
-            result.append(check_component_status(comp))
-    restore_state(allcomps, result)
+    jobs, backend = executor.get_parallel_jobs(args)
+    result = executor.run(allcomps, check_component_status, jobs, backend)
+    # Checkouts always run on threads
+    restore_state(allcomps, result, jobs)
 
 
 def check_component_status(comp):
-    git = GitRepository(comp.remote, comp.local)
-    curr_ver = version_to_string(git.get_version(), git)
-    return (curr_ver, git.check_status())
+    git = CachedGitRepository(comp.remote, comp.local)
+    # Untracked files do not matter for restoring versions
+    probe = git.probe(untracked=False)
+    curr_ver = version_to_string(probe.version, git, probe.short_oid)
+    return (curr_ver, format_status_entries(probe.entries))
+
 
+def restore_state(allcomps, result, jobs=1):
+    current_versions = {
+        comp.name: status[0].split(" ")[1] for comp, status in zip(allcomps, result)
+    }
 
-def restore_state(allcomps, result):
-    for index, comp in enumerate(allcomps):
-        git = GitRepository(comp.remote, comp.local)
-        current_version = result[index][0].split(" ")[1]
+    def restore(comp):
+        git = CachedGitRepository(comp.remote, comp.local)
+        current_version = current_versions[comp.name]
         orig_version = comp.version.name
         if current_version != orig_version:
             print(
@@ -42,3 +44,5 @@ def restore_state(allcomps, result):
                 )
             )
             git.checkout(comp.version.name)
+
+    executor.run(allcomps, restore, jobs)
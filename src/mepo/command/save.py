@@ -2,15 +2,15 @@ import os
 
 from ..state import MepoState
 from ..component import MepoVersion
-from ..git import GitRepository
+from ..git import CachedGitRepository
 from ..registry import Registry
+from ..utilities import executor
 from ..utilities.version import sanitize_version_string
 
 
 def run(args):
     allcomps = MepoState.read_state()
-    for comp in allcomps:
-        _update_comp(comp)
+    executor.run(allcomps, _update_comp, executor.get_jobs(args))
 
     MepoState.write_state(allcomps)
 
@@ -24,7 +24,7 @@ def run(args):
 
 
 def _update_comp(comp):
-    git = GitRepository(comp.remote, comp.local)
+    git = CachedGitRepository(comp.remote, comp.local)
     orig_ver = comp.version
     curr_ver = MepoVersion(*git.get_version())
 
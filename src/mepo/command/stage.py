@@ -1,6 +1,7 @@
 from ..state import MepoState
 from ..utilities import verify
-from ..git import GitRepository
+from ..utilities import executor
+from ..git import CachedGitRepository
 from ..component import MepoVersion
 
 
@@ -8,10 +9,13 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2stg = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2stg:
-        git = GitRepository(comp.remote, comp.local)
+
+    def stage(comp):
+        git = CachedGitRepository(comp.remote, comp.local)
         stage_files(git, comp, args.untracked)
 
+    executor.run(comps2stg, stage, executor.get_jobs(args))
+
 
 def stage_files(git, comp, untracked=False, commit=False):
     curr_ver = MepoVersion(*git.get_version())
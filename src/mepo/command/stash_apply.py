@@ -1,5 +1,6 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
@@ -7,7 +8,10 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2appst = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2appst:
+
+    def apply_stash(comp):
         git = GitRepository(comp.remote, comp.local)
         git.apply_stash()
         # print('+ {}'.format(comp.name))
+
+    executor.run(comps2appst, apply_stash, executor.get_jobs(args))
@@ -1,14 +1,19 @@
 from ..state import MepoState
 from ..git import GitRepository
+from ..utilities import executor
+from ..utilities import shellcmd
 
 
 def run(args):
     allcomps = MepoState.read_state()
     max_namelen = len(max([x.name for x in allcomps], key=len))
     FMT = "{:<%s.%ss} | {:<s}" % (max_namelen, max_namelen)
-    for comp in allcomps:
+
+    def list_stashes(comp):
         git = GitRepository(comp.remote, comp.local)
-        output = git.list_stash().rstrip().split("\n")
-        print(FMT.format(comp.name, output[0]))
-        for line in output[1:]:
+        output = shellcmd.rstrip_lines(git.list_stash())
+        print(FMT.format(comp.name, next(output, "")))
+        for line in output:
             print(FMT.format("", line))
+
+    executor.run(allcomps, list_stashes, executor.get_jobs(args))
@@ -1,5 +1,6 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
@@ -7,7 +8,10 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2pushst = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2pushst:
+
+    def push_stash(comp):
         git = GitRepository(comp.remote, comp.local)
         git.push_stash(args.message)
         # print('+ {}'.format(comp.name))
+
+    executor.run(comps2pushst, push_stash, executor.get_jobs(args))
@@ -1,5 +1,6 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
@@ -7,7 +8,10 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2showst = [x for x in allcomps if x.name in args.comp_name]
-    for comp in comps2showst:
+
+    def show_stash(comp):
         git = GitRepository(comp.remote, comp.local)
         result = git.show_stash(args.patch)
         print(result)
+
+    executor.run(comps2showst, show_stash, executor.get_jobs(args))
@@ -0,0 +1,10 @@
+from .state_log import run as state_log_run
+from .state_gc import run as state_gc_run
+
+
+def run(args):
+    d = {
+        "log": state_log_run,
+        "gc": state_gc_run,
+    }
+    d[args.mepo_state_cmd](args)
@@ -0,0 +1,21 @@
+from ..state import MepoState
+
+
+def run(args):
+    """Archive (or delete) all but the args.keep latest states"""
+    if args.keep < 1:
+        raise ValueError(
+            f"Number of states to keep must be at least 1, not {args.keep}"
+        )
+    manifest = MepoState.read_manifest()
+    ids = sorted(x["id"] for x in manifest["states"] if not x["archived"])
+    old_ids = ids[: -args.keep]
+    if not old_ids:
+        print("Nothing to do")
+        return
+    action = "Deleted" if args.delete else "Archived"
+    if args.dry_run:
+        print(f"Would have {action.lower()} {len(old_ids)} states")
+        return
+    MepoState.archive_states(old_ids, delete=args.delete)
+    print(f"{action} {len(old_ids)} states, kept {len(ids) - len(old_ids)}")
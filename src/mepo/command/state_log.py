@@ -0,0 +1,24 @@
+import time
+
+from ..state import MepoState
+
+
+def run(args):
+    """List the states, newest first, from the manifest alone"""
+    manifest = MepoState.read_manifest()
+    states = sorted(manifest["states"], key=lambda x: x["id"], reverse=True)
+    if args.max_count is not None:
+        states = states[: args.max_count]
+    if not states:
+        print("No states")
+        return
+    id_width = len(str(states[0]["id"]))
+    for state in states:
+        current = "*" if state["id"] == manifest["latest"] else " "
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["time"]))
+        ncomps = "?" if state["components"] is None else state["components"]
+        line = f"{current} {state['id']:>{id_width}}  {when}  {ncomps:>3} components"
+        line += f"  {state['command'] or '-'}"
+        if state["archived"]:
+            line += "  (archived)"
+        print(line)
@@ -1,18 +1,15 @@
 """Current state of mepo managed repositories"""
 
-import time
-import shlex
-import multiprocessing as mp
+import functools
 
 from ..state import MepoState
-from ..git import GitRepository
+from ..git import CachedGitRepository
+from ..git import format_status_entries
 from ..utilities import colors
-from ..utilities import shellcmd
+from ..utilities import executor
 from ..utilities.version import version_to_string
 from ..utilities.version import sanitize_version_string
 
-from .whereis import _get_relative_path
-
 
 def run(args):
     """Entry point"""
@@ -20,22 +17,21 @@ def run(args):
     allcomps = MepoState.read_state()
     # max_width = len(max([comp.name for comp in allcomps], key=len))
     max_width = max([len(comp.name) for comp in allcomps])
-    if args.parallel:
-        with mp.Pool() as pool:
-            result = pool.starmap(
-                check_component_status,
-                [(comp, args.ignore_permissions) for comp in allcomps],
-            )
-        print_status(allcomps, result, max_width, args.nocolor, args.hashes)
-    else:
-        for comp in allcomps:
-            result = check_component_status(comp, args.ignore_permissions)
-            print_component_status(comp, result, max_width, args.nocolor, args.hashes)
+    # A module level function, so that the process backend can pickle it
+    job = functools.partial(
+        print_status,
+        ignore_permissions=args.ignore_permissions,
+        max_width=max_width,
+        nocolor=args.nocolor,
+        hashes=args.hashes,
+    )
+    jobs, backend = executor.get_parallel_jobs(args)
+    executor.run(allcomps, job, jobs, backend)
 
 
 def check_component_status(comp, ignore_permissions):
     """Check the status of a single component"""
-    git = GitRepository(comp.remote, comp.local)
+    git = CachedGitRepository(comp.remote, comp.local)
 
     # Older mepo clones will not have ignore_submodules in comp, so
     # we need to handle this gracefully
@@ -44,43 +40,39 @@ def check_component_status(comp, ignore_permissions):
     except AttributeError:
         _ignore_submodules = None
 
+    # One git status (plus one ref lookup) gives us everything we need
+    probe = git.probe(ignore_permissions, _ignore_submodules)
+
     # version_to_string can strip off 'origin/' for display purposes
     # so we save the "internal" name for comparison
-    internal_state_branch_name = git.get_version()[0]
+    internal_state_branch_name = probe.version[0]
 
     # This can return non "origin/" names for detached head branches
-    curr_ver = version_to_string(git.get_version(), git)
-    orig_ver = version_to_string(comp.version, git)
+    curr_ver = version_to_string(probe.version, git, probe.short_oid)
+    orig_ver = version_to_string(comp.version, git, probe.short_oid)
 
     # This command is to try and work with git tag oddities
-    curr_ver = sanitize_version_string(orig_ver, curr_ver, git)
-
-    # We also want to see if there are any stashes in the component
-    num_stashes = len(git.list_stash().splitlines())
+    curr_ver = sanitize_version_string(orig_ver, curr_ver, git, probe)
 
     return (
         curr_ver,
         internal_state_branch_name,
-        num_stashes,
-        git.check_status(ignore_permissions, _ignore_submodules),
+        probe.num_stashes,
+        format_status_entries(probe.entries),
+        probe.oid,
     )
 
 
-def print_status(allcomps, result, max_width, nocolor=False, hashes=False):
-    """Print the status of all components"""
-    for index, comp in enumerate(allcomps):
-        time.sleep(0.025)
-        print_component_status(comp, result[index], max_width, nocolor, hashes)
+def print_status(comp, ignore_permissions, max_width, nocolor=False, hashes=False):
+    """Check and print the status of a single component"""
+    result = check_component_status(comp, ignore_permissions)
+    print_component_status(comp, result, max_width, nocolor, hashes)
 
 
 def print_component_status(comp, result, width, nocolor=False, hashes=False):
     """Print the status of a single component"""
-    current_version, internal_state_branch_name, num_stashes, output = result
+    current_version, internal_state_branch_name, num_stashes, output, comp_hash = result
     if hashes:
-        comp_path = _get_relative_path(comp.local)
-        comp_hash = shellcmd.run(
-            cmd=shlex.split(f"git -C {comp_path} rev-parse HEAD"), output=True
-        ).replace("\n", "")
         current_version = f"{current_version} ({comp_hash})"
     # This should handle tag weirdness...
     if current_version.split()[1] == comp.version.name:
@@ -4,6 +4,7 @@ import subprocess
 
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 from ..git import get_editor as get_git_editor
 
@@ -35,11 +36,13 @@ def run(args):
             tf.flush()
             subprocess.call([EDITOR, tf.name])
 
-    for comp in comps2crttg:
+    def create_tag(comp):
         git = GitRepository(comp.remote, comp.local)
         git.create_tag(args.tag_name, create_annotated_tag, args.message, tf_file)
         print("+ {}: {}".format(comp.name, args.tag_name))
 
+    executor.run(comps2crttg, create_tag, executor.get_jobs(args))
+
     if create_annotated_tag:
         # Now close and by-hand delete the temp file
         if not args.message:
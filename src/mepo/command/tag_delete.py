@@ -1,5 +1,6 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
@@ -7,11 +8,14 @@ def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2deltg = _get_comps_to_list(args.comp_name, allcomps)
-    for comp in comps2deltg:
+
+    def delete_tag(comp):
         git = GitRepository(comp.remote, comp.local)
         git.delete_tag(args.tag_name)
         print("- {}: {}".format(comp.name, args.tag_name))
 
+    executor.run(comps2deltg, delete_tag, executor.get_jobs(args))
+
 
 def _get_comps_to_list(specified_comps, allcomps):
     comps_to_list = allcomps
@@ -1,20 +1,24 @@
 from ..state import MepoState
 from ..utilities import verify
-from ..git import GitRepository
+from ..utilities import executor
+from ..git import MAX_CONCURRENT_GIT
 
 
 def run(args):
     allcomps = MepoState.read_state()
     verify.valid_components(args.comp_name, allcomps)
     comps2tagpush = _get_comps_to_list(args.comp_name, allcomps)
-    for comp in comps2tagpush:
-        git = GitRepository(comp.remote, comp.local)
-        git.push_tag(args.tag_name, args.force, args.delete)
+
+    async def push_tag(comp, git):
+        await git.push_tag(args.tag_name, args.force, args.delete)
         if args.delete:
             print(f"Pushed deleted tag {args.tag_name} to {comp.name}")
         else:
             print(f"Pushed tag {args.tag_name} to {comp.name}")
 
+    jobs = executor.get_jobs(args, default=MAX_CONCURRENT_GIT)
+    executor.run_async(comps2tagpush, push_tag, jobs)
+
 
 def _get_comps_to_list(specified_comps, allcomps):
     comps_to_list = allcomps
@@ -1,18 +1,22 @@
 from ..state import MepoState
 from ..utilities import verify
+from ..utilities import executor
 from ..git import GitRepository
 
 
 def run(args):
     allcomps = MepoState.read_state()
     comps2unstg = _get_comps_to_unstage(args.comp_name, allcomps)
-    for comp in comps2unstg:
+
+    def unstage(comp):
         git = GitRepository(comp.remote, comp.local)
         staged_files = git.get_staged_files()
         for myfile in staged_files:
             git.unstage_file(myfile)
             print("- {}: {}".format(comp.name, myfile))
 
+    executor.run(comps2unstg, unstage, executor.get_jobs(args))
+
 
 def _get_comps_to_unstage(specified_comps, allcomps):
     comps_to_unstage = allcomps
@@ -6,11 +6,12 @@ from ..utilities import verify
 
 def run(args):
     allcomps = MepoState.read_state()
+    root_dir = MepoState.get_root_dir()
     if args.comp_name:  # single comp name is specified, print relpath
         if args.comp_name == "_root":
             # _root is a "hidden" allowed argument for whereis to return
             # the root dir of the project. Mainly used by mepo-cd
-            print(MepoState.get_root_dir())
+            print(root_dir)
         else:
             # Verify that we passed in a good component name
             verify.valid_components(
@@ -30,24 +31,25 @@ def run(args):
                 )
                 # And if they match, print the relative path
                 if component_in_allcomps == component_to_find:
-                    print(_get_relative_path(comp.local))
+                    print(_get_relative_path(comp.local, root_dir))
 
     else:  # print relpaths of all comps
         max_namelen = len(max([x.name for x in allcomps], key=len))
         FMT = "{:<%s.%ss} | {:<s}" % (max_namelen, max_namelen)
         for comp in allcomps:
-            print(FMT.format(comp.name, _get_relative_path(comp.local)))
+            print(FMT.format(comp.name, _get_relative_path(comp.local, root_dir)))
 
 
-def _get_relative_path(local_path):
+def _get_relative_path(local_path, root_dir):
     """
     Get the relative path when given a local path.
 
     local_path: The path to a subrepo as known by mepo (relative to the .mepo directory)
+    root_dir: The root of the fixture, MepoState.get_root_dir()
     """
 
     # This creates a full path on the disk from the root of mepo and the local_path
-    full_local_path = os.path.join(MepoState.get_root_dir(), local_path)
+    full_local_path = os.path.join(root_dir, local_path)
 
     # We return the path relative to where we currently are
     return os.path.relpath(full_local_path, os.getcwd())
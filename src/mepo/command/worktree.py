@@ -0,0 +1,14 @@
+from .worktree_add import run as worktree_add_run
+from .worktree_list import run as worktree_list_run
+from .worktree_remove import run as worktree_remove_run
+from .worktree_prune import run as worktree_prune_run
+
+
+def run(args):
+    d = {
+        "add": worktree_add_run,
+        "list": worktree_list_run,
+        "remove": worktree_remove_run,
+        "prune": worktree_prune_run,
+    }
+    d[args.mepo_worktree_cmd](args)
@@ -0,0 +1,100 @@
+import os
+import copy
+import shutil
+from types import SimpleNamespace
+
+from .init import run as mepo_init
+from .clone import print_clone_info
+from ..state import MepoState
+from ..git import GitRepository
+from ..git import ObjectResolver
+from ..git import MAX_CONCURRENT_GIT
+from ..utilities import executor
+from ..utilities.chdir import chdir as mepo_chdir
+
+
+def run(args):
+    """
+    Add a worktree of the fixture at args.path and one of each component at
+    the same place under it, with its own mepo state. The components are
+    checked out at the versions of the current state, or of the registry
+    args.target, or of the components.yaml of the fixture at the branch, tag
+    or hash args.target. Components that are not cloned in the current
+    fixture are cloned
+    """
+    allcomps = MepoState.read_state()
+    root_dir = MepoState.get_root_dir()
+    path = os.path.abspath(args.path)
+    if os.path.exists(path) and os.listdir(path):
+        raise Exception(f"{path} already exists and is not empty")
+    registry = fixture_version = None
+    if args.target is not None and os.path.isfile(args.target):
+        registry = os.path.abspath(args.target)
+    elif args.target is not None:
+        fixture_version = args.target
+        registry = os.path.join(path, "components.yaml")
+    fixture = [x for x in allcomps if x.fixture][0]
+    git = GitRepository(fixture.remote, root_dir)
+    git.add_worktree(path, free_version(git, fixture_version))
+    try:
+        with mepo_chdir(path):
+            MepoState.make_dir()
+            if registry is None:
+                write_rebased_state(allcomps, root_dir, path)
+            else:
+                mepo_init(SimpleNamespace(style=args.style, registry=registry))
+            newcomps = MepoState.read_state()
+    except Exception:
+        # e.g., no components.yaml at that version
+        shutil.rmtree(os.path.join(path, ".mepo"), ignore_errors=True)
+        GitRepository(fixture.remote, path).remove_worktree(force=True)
+        raise
+    add_components(newcomps, allcomps, executor.get_jobs(args, MAX_CONCURRENT_GIT))
+
+
+def write_rebased_state(allcomps, root_dir, path):
+    """State of the worktree at path: that of the fixture at root_dir, moved"""
+    newcomps = []
+    for comp in allcomps:
+        comp = copy.copy(comp)
+        comp.local = os.path.join(path, os.path.relpath(comp.local, root_dir))
+        newcomps.append(comp)
+    MepoState.write_state(newcomps)
+
+
+def add_components(newcomps, allcomps, jobs):
+    max_namelen = max([len(comp.name) for comp in newcomps])
+    sources = {comp.name: comp for comp in allcomps}
+    comps = [comp for comp in newcomps if not comp.fixture]
+
+    def add(comp):
+        version = comp.version.name.replace("origin/", "")
+        sparse = comp.sparse or None
+        source = sources.get(comp.name)
+        if source is None or not os.path.exists(os.path.join(source.local, ".git")):
+            git = GitRepository(comp.remote, comp.local)
+            git.clone(version, comp.recurse_submodules, sparse=sparse)
+        else:
+            git = GitRepository(source.remote, source.local)
+            git.fetch_missing(version)
+            git.add_worktree(
+                comp.local, free_version(git, version), sparse, comp.recurse_submodules
+            )
+        print_clone_info(comp.name, comp.version, max_namelen)
+
+    # Nested components are added once the enclosing one is checked out
+    executor.run_nested(comps, add, jobs)
+
+
+def free_version(git, version):
+    """
+    version, unless it is a branch checked out in a worktree already (git
+    allows one at a time), then the commit it points to (detached)
+    """
+    if version is None:
+        return None
+    branches = [x["branch"] for x in git.list_worktrees()]
+    if f"refs/heads/{version}" in branches:
+        resolver = ObjectResolver.get(git.get_local_path())
+        return resolver.resolve_commit(f"refs/heads/{version}")
+    return version
@@ -0,0 +1,30 @@
+import os
+
+from ..state import MepoState
+from ..git import GitRepository
+from ..utilities.chdir import chdir as mepo_chdir
+
+
+def run(args):
+    root_dir = MepoState.get_root_dir()
+    worktrees = GitRepository(None, root_dir).list_worktrees()
+    max_pathlen = max([len(x["worktree"]) for x in worktrees])
+    for worktree in worktrees:
+        path = worktree["worktree"]
+        if worktree["branch"] is not None:
+            head = worktree["branch"].replace("refs/heads/", "")
+        else:
+            head = f"detached at {worktree['HEAD'][:7]}"
+        if "prunable" in worktree:
+            info = "prunable, see `mepo worktree prune`"
+        else:
+            with mepo_chdir(path):
+                # A worktree nested in the fixture must have a state of its own
+                has_state = MepoState.state_exists() and os.path.samefile(
+                    MepoState.get_root_dir(), path
+                )
+                if has_state:
+                    comps = [x for x in MepoState.read_state() if not x.fixture]
+            info = f"{len(comps)} components" if has_state else "no mepo state"
+        current = "*" if os.path.realpath(path) == os.path.realpath(root_dir) else " "
+        print(f"{current} {path:<{max_pathlen}} | {head} ({info})")
@@ -0,0 +1,18 @@
+from ..state import MepoState
+from ..git import GitRepository
+from ..utilities import executor
+
+
+def run(args):
+    """Forget the worktrees of the fixture and components removed by hand"""
+    allcomps = MepoState.read_state()
+
+    def prune(comp):
+        git = GitRepository(comp.remote, comp.local)
+        pruned = git.prune_worktrees()
+        for line in pruned:
+            print(f"{comp.name}: {line}")
+        return len(pruned)
+
+    if sum(executor.run(allcomps, prune, executor.get_jobs(args))) == 0:
+        print("Nothing to prune")
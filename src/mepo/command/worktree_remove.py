@@ -0,0 +1,69 @@
+import os
+import shutil
+
+from ..state import MepoState
+from ..git import GitRepository
+from ..utilities.chdir import chdir as mepo_chdir
+
+
+def run(args):
+    """
+    Remove a fixture added by `mepo worktree add`, and the worktrees of its
+    components. Like `git worktree remove`, refuses to remove a worktree
+    with changes unless args.force
+    """
+    path = os.path.abspath(args.path)
+    if not os.path.isfile(os.path.join(path, ".git")):
+        raise Exception(f"{path} is not a worktree of a fixture")
+    if not os.path.isdir(os.path.join(path, ".mepo")):
+        raise Exception(f"{path} has no mepo state, use `git worktree remove`")
+    with mepo_chdir(path):
+        allcomps = MepoState.read_state()
+    comps = [comp for comp in allcomps if not comp.fixture]
+    comps = [comp for comp in comps if os.path.exists(comp.local)]
+    if not args.force:
+        fixture = [comp for comp in allcomps if comp.fixture][0]
+        check_removable(path, fixture.name, comps)
+    # Nested components first, their parent is not clean until they are gone
+    for comp in sorted(comps, key=lambda x: x.local.count(os.sep), reverse=True):
+        if os.path.isfile(os.path.join(comp.local, ".git")):
+            GitRepository(comp.remote, comp.local).remove_worktree(args.force)
+        else:
+            shutil.rmtree(comp.local)
+    shutil.rmtree(os.path.join(path, ".mepo"))
+    GitRepository(None, path).remove_worktree(args.force)
+    print(f"Removed {path}")
+
+
+def check_removable(path, fixture_name, comps):
+    """
+    Raise before anything is removed if git would refuse to remove the
+    fixture worktree at path or one of the component worktrees: changes
+    in them, other than the state and the components within them
+    """
+    repos = [(fixture_name, path)] + [(comp.name, comp.local) for comp in comps]
+    for name, local in repos:
+        if local != path and not os.path.isfile(os.path.join(local, ".git")):
+            raise Exception(
+                f"{name} is a clone, not a worktree, use --force to remove it"
+            )
+        inner = [comp.local for comp in comps if comp.local != local]
+        if local == path:
+            inner.append(os.path.join(path, ".mepo"))
+        inner = [os.path.relpath(x, local) + "/" for x in inner]
+        changes = [
+            x
+            for x in GitRepository(None, local).get_worktree_changes()
+            if not any(is_within(x, y) for y in inner)
+        ]
+        if changes:
+            raise Exception(
+                f"{name} has changes ({', '.join(changes)}), use --force to remove it"
+            )
+
+
+def is_within(change, inner):
+    """change (a path, a directory if it ends with /) is or holds inner/"""
+    if change.endswith("/") and inner.startswith(change):
+        return True  # e.g., an untracked directory of components
+    return (change + "/").startswith(inner)
@@ -25,6 +25,7 @@ class MepoComponent(object):
         "recurse_submodules",
         "fixture",
         "ignore_submodules",
+        "depth",
     ]
 
     def __init__(
@@ -38,6 +39,7 @@ class MepoComponent(object):
         recurse_submodules=None,
         fixture=None,
         ignore_submodules=None,
+        depth=None,
     ):
         self.name = name
         self.local = local
@@ -48,6 +50,7 @@ class MepoComponent(object):
         self.recurse_submodules = recurse_submodules
         self.fixture = fixture
         self.ignore_submodules = ignore_submodules
+        self.depth = depth
 
     def __repr__(self):
         # Older mepo clones will not have ignore_submodules in comp, so
@@ -66,7 +69,8 @@ class MepoComponent(object):
             f"  develop: {self.develop}\n"
             f"  recurse_submodules: {self.recurse_submodules}\n"
             f"  fixture: {self.fixture}\n"
-            f"  ignore_submodules: {_ignore_submodules}"
+            f"  ignore_submodules: {_ignore_submodules}\n"
+            f"  depth: {getattr(self, 'depth', None)}"
         )
 
     def __set_original_version(self, comp_details):
@@ -131,6 +135,7 @@ class MepoComponent(object):
         self.develop = comp_details.get("develop", None)
         self.recurse_submodules = comp_details.get("recurse_submodules", None)
         self.ignore_submodules = comp_details.get("ignore_submodules", None)
+        self.depth = comp_details.get("depth", None)
         # version
         self.__set_original_version(comp_details)
 
@@ -165,11 +170,14 @@ class MepoComponent(object):
                 details["recurse_submodules"] = self.recurse_submodules
             if self.ignore_submodules:
                 details["ignore_submodules"] = self.ignore_submodules
+            if self.depth:
+                details["depth"] = self.depth
         return {self.name: details}
 
     def deserialize(self, d):
         for k in self.__slots__:
-            v = d[k]
+            # Older states lack the newer entries (e.g., depth)
+            v = d.get(k)
             if k == "version":
                 # list -> namedtuple
                 v = MepoVersion(*v)  # * for arg unpacking
@@ -1,13 +1,27 @@
 import os
+import re
+import atexit
+import asyncio
+import inspect
+import functools
 import shutil
 import shlex
 import subprocess as sp
 
+from collections import namedtuple
 from urllib.parse import urljoin
 
 from .utilities import shellcmd
+from .utilities import objectcache
 from .utilities import colors
+from .utilities import trace
 from .utilities.exceptions import RepoAlreadyClonedError
+from .utilities.version import MepoVersion
+from .utilities.gitrefs import RefReader
+from .utilities.gitrefs import UnsupportedRepo
+from .utilities.gitrefs import DECORATED_REFS
+from .utilities.gitrefs import decoration_name
+from .utilities.gitindex import worktree_is_clean
 
 
 def get_editor():
@@ -26,6 +40,128 @@ def get_current_remote_url():
     return output
 
 
+class ObjectResolver:
+    """
+    Answer name -> oid queries through one long-lived
+    `git cat-file --batch-check` process per repository
+    """
+
+    __slots__ = ["__local_path_abs", "__proc", "__start_time"]
+
+    # One resolver per repository for the whole mepo invocation
+    __resolvers = {}
+    __owner_pid = os.getpid()
+
+    def __init__(self, local_path_abs):
+        self.__local_path_abs = local_path_abs
+        self.__proc = None
+        self.__start_time = None
+
+    @classmethod
+    def get(cls, local_path_abs):
+        """Return the resolver of the repository at local_path_abs"""
+        if cls.__owner_pid != os.getpid():
+            # Forked (e.g., mp.Pool worker): the pipes belong to the parent
+            cls.__resolvers = {}
+            cls.__owner_pid = os.getpid()
+        key = os.path.abspath(local_path_abs)
+        # setdefault is atomic, jobs may run on several threads
+        return cls.__resolvers.setdefault(key, cls(key))
+
+    @classmethod
+    def close_all(cls):
+        """Shut down all resolver processes (registered with atexit)"""
+        for resolver in cls.__resolvers.values():
+            resolver.close()
+        cls.__resolvers.clear()
+
+    def __start(self):
+        cmd = ["git", "-C", self.__local_path_abs, "cat-file", "--batch-check"]
+        self.__start_time = trace.now()
+        self.__proc = sp.Popen(
+            cmd,
+            stdin=sp.PIPE,
+            stdout=sp.PIPE,
+            stderr=sp.DEVNULL,
+            universal_newlines=True,
+        )
+
+    def resolve(self, name):
+        """Return the oid that `name` resolves to, None if it does not exist"""
+        if "\n" in name:
+            return None
+        if self.__proc is not None and self.__proc.poll() is not None:
+            self.close()
+        if self.__proc is None:
+            self.__start()
+        try:
+            self.__proc.stdin.write(name + "\n")
+            self.__proc.stdin.flush()
+            output = self.__proc.stdout.readline()
+        except (BrokenPipeError, OSError):
+            self.close()
+            return None
+        # "<oid> <type> <size>" or "<name> missing" or "<name> ambiguous"
+        output = output.rstrip("\n")
+        if not output or output.endswith((" missing", " ambiguous")):
+            return None
+        return output.split()[0]
+
+    def resolve_commit(self, name):
+        """Return the commit that `name` points to (tags are peeled)"""
+        return self.resolve(name + "^{commit}")
+
+    def exists(self, name):
+        return self.resolve(name) is not None
+
+    def close(self):
+        if self.__proc is not None:
+            try:
+                self.__proc.stdin.close()
+                self.__proc.wait(timeout=5)
+            except (OSError, sp.TimeoutExpired):
+                self.__proc.kill()
+                self.__proc.wait()
+            self.__proc.stdout.close()
+            trace.record(self.__proc.args, self.__start_time, self.__proc.returncode)
+            self.__proc = None
+
+
+atexit.register(ObjectResolver.close_all)
+
+
+class RepoProbe(
+    namedtuple(
+        "RepoProbe",
+        ["oid", "version", "short_oid", "head_refs", "num_stashes", "entries"],
+    )
+):
+    """
+    Snapshot of a repository returned by GitRepository.probe()
+
+    oid: full hash of HEAD
+    version: (name, type, detached) of HEAD, same as GitRepository.get_version()
+    short_oid: abbreviated hash of HEAD (None if no ref points at HEAD or
+        the probe did not need git)
+    head_refs: full names of the refs pointing at HEAD
+    num_stashes: number of stashes (None if the worktree was not probed)
+    entries: porcelain=v2 status lines (None if the worktree was not probed)
+    """
+
+    __slots__ = ()
+
+    def points_at(self, name):
+        """Return True if tag/branch/hash `name` resolves to HEAD"""
+        for prefix in DECORATED_REFS:
+            if prefix + name in self.head_refs:
+                return True
+        return len(name) >= 4 and self.oid.startswith(name)
+
+
+# What `git clone --depth` cannot fetch by name
+FULL_HASH = re.compile(r"^[0-9a-f]{40}$")
+
+
 class GitRepository:
     """
     Class to consolidate git commands
@@ -44,23 +180,276 @@ class GitRepository:
     def get_remote_url(self):
         return self.__remote
 
-    def clone(self, version=None, recurse=None, partial=None):
+    def clone(
+        self,
+        version=None,
+        recurse=None,
+        partial=None,
+        use_cache=True,
+        sparse=None,
+        progress=None,
+        depth=None,
+        git_progress=None,
+    ):
         """
         Execute `git clone` command
-        version is tag or branch
+        version is tag, branch or hash
+        With version or sparse, the clone is made without a checkout, the
+        sparse checkout is set up (see sparsify) and the working tree is
+        checked out once, at version
+        With use_cache, objects are borrowed from the mirror of the remote
+        in the object cache, if one is configured (see objectcache)
+        With depth, only the last `depth` commits of version are fetched
+        (by hash, if version is a full hash)
+        progress(phase) is called after each phase ("cloned", "sparsified",
+        "checked-out") is done
+        git_progress(line) is called with each line of the progress output
+        of git (e.g., "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00
+        MiB/s") while objects are fetched
         """
         PARTIAL = {"blobless": " --filter=blob:none", "treeless": " --filter=tree:0"}
+        progress = progress or (lambda phase: None)
+
+        if depth is not None and version is not None and FULL_HASH.match(version):
+            self.__fetch_commit(version, depth, git_progress)
+            progress("cloned")
+            self.complete_clone("cloned", version, recurse, sparse, progress)
+            return
 
         cmd = "git clone "
         if partial is not None:
             cmd += PARTIAL[partial]
         if recurse is not None:
             cmd += " --recurse-submodules "
-        cmd += " --quiet {} {}".format(self.__remote, self.__local_path_abs)
+        if use_cache:
+            cmd += " " + shlex.join(objectcache.reference_for(self.__remote))
+        if depth is not None:
+            cmd += " --depth {}".format(depth)
+            if version is not None:
+                cmd += " --branch {}".format(version)
+        single_checkout = version is not None or sparse is not None
+        if single_checkout:
+            cmd += " --no-checkout"
+        if git_progress is None:
+            cmd += " --quiet {} {}".format(self.__remote, self.__local_path_abs)
+            shellcmd.run(shlex.split(cmd))
+        else:
+            cmd += " --progress {} {}".format(self.__remote, self.__local_path_abs)
+            shellcmd.run_progress(shlex.split(cmd), git_progress)
+        if single_checkout:
+            progress("cloned")
+            self.complete_clone("cloned", version, recurse, sparse, progress)
+        else:
+            progress("checked-out")
+
+    def __fetch_commit(self, oid, depth, git_progress=None):
+        """Shallow clone of a commit that no branch or tag may point at"""
+        shellcmd.run(["git", "init", "--quiet", self.__local_path_abs])
+        cmd = self.__git + " remote add origin {}".format(self.__remote)
         shellcmd.run(shlex.split(cmd))
+        # Servers allow this for reachable commits (protocol v2, GitHub, GitLab)
+        cmd = self.__git + " fetch --depth {} origin {}".format(depth, oid)
+        if git_progress is None:
+            shellcmd.run(shlex.split(cmd) + ["--quiet"])
+        else:
+            shellcmd.run_progress(shlex.split(cmd) + ["--progress"], git_progress)
 
-        if version is not None:
-            self.checkout(version)
+    def create_bundle(self, bundle, ref, oid=None):
+        """
+        Write ref and its history to the git bundle file `bundle`. With oid,
+        ref is first made to point at it (and removed afterwards)
+        """
+        git = shlex.split(self.__git)
+        if oid is not None:
+            shellcmd.run(git + ["update-ref", ref, oid])
+        try:
+            shellcmd.run(git + ["bundle", "create", bundle, ref])
+        finally:
+            if oid is not None:
+                shellcmd.run(git + ["update-ref", "-d", ref])
+
+    def clone_bundle(self, bundle, version=None, sparse=None, progress=None):
+        """
+        clone() from a file written by create_bundle(), with origin set to
+        the remote all the same (submodules are left alone)
+        """
+        progress = progress or (lambda phase: None)
+        shellcmd.run(["git", "init", "--quiet", self.__local_path_abs])
+        git = shlex.split(self.__git)
+        # The refs keep their names, e.g., refs/remotes/origin/main
+        shellcmd.run(
+            git + ["fetch", "--quiet", "--update-head-ok", bundle, "+refs/*:refs/*"]
+        )
+        shellcmd.run(git + ["remote", "add", "origin", self.__remote])
+        progress("cloned")
+        self.complete_clone("cloned", version, None, sparse, progress)
+
+    def clone_local(
+        self, source, version=None, recurse=None, sparse=None, progress=None
+    ):
+        """
+        clone() from the repository of the same component in another fixture
+        on disk, whose objects are hard-linked rather than copied. origin is
+        the remote all the same, and its branches are those the source had
+        fetched from it
+        """
+        progress = progress or (lambda phase: None)
+        cmd = "git clone --quiet --no-checkout --origin mepo-source"
+        shellcmd.run(shlex.split(cmd) + [source, self.__local_path_abs])
+        git = shlex.split(self.__git)
+        shellcmd.run(git + ["remote", "add", "origin", self.__remote])
+        refspec = "+refs/remotes/origin/*:refs/remotes/origin/*"
+        shellcmd.run(git + ["fetch", "--quiet", "mepo-source", refspec])
+        # Fetched as a plain ref, origin/HEAD has to be made symbolic again
+        cmd = ["git", "-C", source, "for-each-ref", "--format=%(symref)"]
+        origin_head = "refs/remotes/origin/HEAD"
+        target = shellcmd.run(cmd + [origin_head], stdout=True).strip()
+        if target:
+            shellcmd.run(git + ["symbolic-ref", origin_head, target])
+        # Detach, so that no local branch of the source is kept
+        shellcmd.run(git + ["update-ref", "--no-deref", "HEAD", "HEAD"])
+        branches = shellcmd.run(
+            git + ["for-each-ref", "--format=%(refname:short)", "refs/heads/"],
+            stdout=True,
+        ).split()
+        if branches:
+            shellcmd.run(git + ["branch", "--quiet", "-D"] + branches)
+        shellcmd.run(git + ["remote", "remove", "mepo-source"])
+        self.fetch_missing(version)
+        progress("cloned")
+        self.complete_clone("cloned", version, recurse, sparse, progress)
+
+    def fetch_missing(self, version):
+        """
+        Fetch branches and tags from origin if tag, hash or branch version
+        (None for HEAD) is not in the repository, e.g., newer than a source
+        it was cloned from
+        """
+        if version is None:
+            return
+        resolver = ObjectResolver.get(self.__local_path_abs)
+        for name in [version, f"origin/{version}"]:
+            if resolver.resolve_commit(name) is not None:
+                return
+        cmd = self.__git + " fetch --quiet --tags origin"
+        shellcmd.run(shlex.split(cmd))
+
+    def is_partial(self):
+        """True for a partial clone, whose missing objects only origin has"""
+        cmd = self.__git + " config --get remote.origin.promisor"
+        return shellcmd.run(shlex.split(cmd), stdout=True, status=True) == 0
+
+    def is_shallow(self):
+        cmd = self.__git + " rev-parse --is-shallow-repository"
+        return shellcmd.run(shlex.split(cmd), output=True).strip() == "true"
+
+    def deepen(self, depth=None):
+        """
+        Fetch `depth` more commits of history of a shallow clone (all of it
+        if None), and from now on all branches and tags of the remote
+        """
+        cmd = (
+            self.__git
+            + " config remote.origin.fetch +refs/heads/*:refs/remotes/origin/*"
+        )
+        shellcmd.run(shlex.split(cmd))
+        cmd = self.__git + " fetch --quiet --tags origin"
+        if depth is None:
+            cmd += " --unshallow"
+        else:
+            cmd += " --deepen {}".format(depth)
+        shellcmd.run(shlex.split(cmd))
+
+    def add_worktree(self, path, version=None, sparse=None, recurse=None):
+        """
+        Check out version (HEAD if None) into a new worktree at path, which
+        shares the objects, refs and config of this repository. sparse and
+        recurse (submodules) are as in clone()
+        """
+        cmd = self.__git + " worktree add --quiet --no-checkout --detach"
+        shellcmd.run(shlex.split(cmd) + [path, "HEAD"])
+        worktree = GitRepository(self.__remote, path)
+        worktree.complete_clone("cloned", version, recurse, sparse)
+
+    def list_worktrees(self):
+        """
+        Return a dict per worktree of the repository, the main one first,
+        with keys "worktree" (path), "HEAD" and "branch" (full ref, None if
+        detached), and "prunable" (the reason) if its directory is gone
+        """
+        cmd = self.__git + " worktree list --porcelain"
+        output = shellcmd.run(shlex.split(cmd), stdout=True)
+        worktrees = []
+        for record in output.strip().split("\n\n"):
+            worktree = {"branch": None}
+            for line in record.splitlines():
+                key, _, value = line.partition(" ")
+                worktree[key] = value
+            worktrees.append(worktree)
+        return worktrees
+
+    def remove_worktree(self, force=False):
+        """Remove this worktree (refused by git if it has changes, unless force)"""
+        cmd = self.__git + " worktree remove"
+        if force:
+            cmd += " --force"
+        shellcmd.run(shlex.split(cmd) + ["."])
+
+    def get_worktree_changes(self):
+        """
+        Return the paths with changes in the worktree, untracked ones
+        included (directories end with /), as `git worktree remove` sees them
+        """
+        cmd = self.__git + " status --porcelain -z --ignore-submodules=none"
+        output = shellcmd.run(shlex.split(cmd), output=True)
+        paths = []
+        entries = iter(output.split("\0"))
+        for entry in entries:
+            if not entry:
+                continue
+            paths.append(entry[3:])
+            if entry[0] in "RC":
+                next(entries)  # the path it was renamed or copied from
+        return paths
+
+    def prune_worktrees(self):
+        """Forget the worktrees whose directory was removed, return their names"""
+        cmd = self.__git + " worktree prune --verbose"
+        output = shellcmd.run(shlex.split(cmd), output=True)
+        return [x for x in output.splitlines() if x]
+
+    def complete_clone(
+        self,
+        phase,
+        version=None,
+        recurse=None,
+        sparse=None,
+        progress=None,
+        resume=False,
+    ):
+        """
+        Run the phases of clone() after `phase`. With resume, the clone was
+        interrupted and its checkout, which may have been too, is forced
+        """
+        progress = progress or (lambda phase: None)
+        if phase == "cloned" and sparse is not None:
+            self.__set_sparse_patterns(sparse)
+            progress("sparsified")
+        if phase == "checked-out":
+            return
+        cmd = self.__git + " checkout --quiet"
+        if resume:
+            lock = os.path.join(self.__local_path_abs, ".git", "index.lock")
+            if os.path.exists(lock):
+                os.remove(lock)  # left by the interrupted checkout
+            cmd += " --force"
+        # Without an index file yet, this checks out the whole tree
+        shellcmd.run(shlex.split(cmd) + [version or "HEAD"])
+        if recurse is not None:
+            # Not done by git clone --no-checkout
+            cmd = self.__git + " submodule update --quiet --init --recursive"
+            shellcmd.run(shlex.split(cmd))
+        progress("checked-out")
 
     def checkout(self, version, detach=False):
         cmd = self.__git + " checkout "
@@ -71,29 +460,54 @@ class GitRepository:
             shellcmd.run(shlex.split(cmd2))
 
     def sparsify(self, sparse_config):
+        """
+        Restrict the working tree to sparse_config: either a list of
+        directories, checked out in cone mode with a sparse index, or the
+        name of a (non-cone) pattern file
+        """
+        self.__set_sparse_patterns(sparse_config)
+        if isinstance(sparse_config, str):
+            cmd2 = self.__git + " read-tree -mu HEAD"
+            shellcmd.run(shlex.split(cmd2))
+
+    def __set_sparse_patterns(self, sparse_config):
+        if not isinstance(sparse_config, str):
+            # Updates the working tree, if there is one
+            cmd = self.__git + " sparse-checkout set --cone --sparse-index --"
+            shellcmd.run(shlex.split(cmd) + list(sparse_config))
+            return
         dst = os.path.join(self.__local_path_abs, ".git", "info", "sparse-checkout")
+        if os.path.isfile(os.path.dirname(os.path.dirname(dst))):
+            # .git points to the git dir of a worktree (see add_worktree)
+            cmd = self.__git + " rev-parse --git-path info/sparse-checkout"
+            git_path = shellcmd.run(shlex.split(cmd), output=True).strip()
+            dst = os.path.join(self.__local_path_abs, git_path)
         os.makedirs(os.path.dirname(dst), exist_ok=True)
         shutil.copy(sparse_config, dst)
         cmd1 = self.__git + " config core.sparseCheckout true"
         shellcmd.run(shlex.split(cmd1))
-        cmd2 = self.__git + " read-tree -mu HEAD"
-        shellcmd.run(shlex.split(cmd2))
 
     def list_branch(self, all=False, nocolor=False):
+        """Iterate over the lines of `git branch` as git prints them"""
         cmd = self.__git + " branch"
         if all:
             cmd += " -a"
         if nocolor:
             cmd += " --color=never"
-        return shellcmd.run(shlex.split(cmd), output=True)
+        return shellcmd.stream(shlex.split(cmd))
 
     def list_tags(self):
+        """Iterate over the lines of `git tag` as git prints them"""
         cmd = self.__git + " tag"
-        return shellcmd.run(shlex.split(cmd), output=True)
+        return shellcmd.stream(shlex.split(cmd))
 
     def rev_list(self, tag):
+        oid = ObjectResolver.get(self.__local_path_abs).resolve_commit(tag)
+        if oid is not None:
+            return oid
+        # Let git report the error
         cmd = self.__git + " rev-list -n 1 {}".format(tag)
-        return shellcmd.run(shlex.split(cmd), output=True)
+        return shellcmd.run(shlex.split(cmd), output=True).strip()
 
     def rev_parse(self, short=False):
         cmd = self.__git + " rev-parse --verify HEAD"
@@ -102,8 +516,9 @@ class GitRepository:
         return shellcmd.run(shlex.split(cmd), output=True)
 
     def list_stash(self):
+        """Iterate over the lines of `git stash list` as git prints them"""
         cmd = self.__git + " stash list"
-        return shellcmd.run(shlex.split(cmd), output=True)
+        return shellcmd.stream(shlex.split(cmd))
 
     def pop_stash(self):
         cmd = self.__git + " stash pop"
@@ -127,6 +542,7 @@ class GitRepository:
         return output.rstrip()
 
     def run_diff(self, args=None, ignore_submodules=False):
+        """Iterate over the lines of `git diff` as git prints them"""
         cmd = "git -C {}".format(self.__local_path_abs)
         if args.ignore_permissions:
             cmd += " -c core.fileMode=false"
@@ -141,8 +557,7 @@ class GitRepository:
             cmd += " --ignore-space-change"
         if ignore_submodules:
             cmd += " --ignore-submodules=all"
-        output = shellcmd.run(shlex.split(cmd), output=True)
-        return output.rstrip()
+        return shellcmd.stream(shlex.split(cmd))
 
     def fetch(self, args=None):
         cmd = self.__git + " fetch"
@@ -211,17 +626,11 @@ class GitRepository:
         shellcmd.run(shlex.split(cmd))
 
     def verify_branch_or_tag(self, ref_name):
-        branch_cmd = self.__git + f" show-branch remotes/origin/{ref_name}"
-        tag_cmd = self.__git + f" rev-parse {ref_name}"
-        branch_status = shellcmd.run(shlex.split(branch_cmd), status=True)
-        ref_type = "UNKNOWN"
-        if branch_status != 0:
-            status = shellcmd.run(shlex.split(tag_cmd), status=True)
-            ref_type = "Tag"
-        else:
-            status = branch_status
-            ref_type = "Branch"
-        return status, ref_type
+        resolver = ObjectResolver.get(self.__local_path_abs)
+        if resolver.resolve_commit(f"remotes/origin/{ref_name}") is not None:
+            return 0, "Branch"
+        status = 0 if resolver.exists(ref_name) else 1
+        return status, "Tag"
 
     def check_status(self, ignore_permissions=False, ignore_submodules=False):
         cmd = "git -C {}".format(self.__local_path_abs)
@@ -231,208 +640,117 @@ class GitRepository:
         if ignore_submodules:
             cmd += " --ignore-submodules=all"
         output = shellcmd.run(shlex.split(cmd), output=True)
-        if output.strip():
-            output_list = output.splitlines()
-
-            # Grab the file names first for pretty printing
-            file_name_list = [item.split()[-1] for item in output_list]
-            max_file_name_length = len(max(file_name_list, key=len))
-
-            verbose_output_list = []
-            for item in output_list:
-
-                index_field = item.split()[0]
-                if index_field == "2":
-                    new_file_name = colors.YELLOW + item.split()[-2] + colors.RESET
-
-                file_name = item.split()[-1]
-
-                short_status = item.split()[1]
-
-                if index_field == "?":
-                    verbose_status = colors.RED + "untracked file" + colors.RESET
-
-                elif short_status == ".D":
-                    verbose_status = colors.RED + "deleted, not staged" + colors.RESET
-                elif short_status == ".M":
-                    verbose_status = colors.RED + "modified, not staged" + colors.RESET
-                elif short_status == ".A":
-                    verbose_status = colors.RED + "added, not staged" + colors.RESET
-                elif short_status == ".T":
-                    verbose_status = (
-                        colors.RED + "typechange, not staged" + colors.RESET
-                    )
-
-                elif short_status == "D.":
-                    verbose_status = colors.GREEN + "deleted, staged" + colors.RESET
-                elif short_status == "M.":
-                    verbose_status = colors.GREEN + "modified, staged" + colors.RESET
-                elif short_status == "A.":
-                    verbose_status = colors.GREEN + "added, staged" + colors.RESET
-                elif short_status == "T.":
-                    verbose_status = colors.GREEN + "typechange, staged" + colors.RESET
-
-                elif short_status == "MM":
-                    verbose_status = (
-                        colors.GREEN
-                        + "modified, staged"
-                        + colors.RESET
-                        + " with "
-                        + colors.RED
-                        + "unstaged changes"
-                        + colors.RESET
-                    )
-                elif short_status == "MD":
-                    verbose_status = (
-                        colors.GREEN
-                        + "modified, staged"
-                        + colors.RESET
-                        + " but "
-                        + colors.RED
-                        + "deleted, not staged"
-                        + colors.RESET
-                    )
-
-                elif short_status == "AM":
-                    verbose_status = (
-                        colors.GREEN
-                        + "added, staged"
-                        + colors.RESET
-                        + " with "
-                        + colors.RED
-                        + "unstaged changes"
-                        + colors.RESET
-                    )
-                elif short_status == "AD":
-                    verbose_status = (
-                        colors.GREEN
-                        + "added, staged"
-                        + colors.RESET
-                        + " but "
-                        + colors.RED
-                        + "deleted, not staged"
-                        + colors.RESET
-                    )
-
-                elif short_status == "TM":
-                    verbose_status = (
-                        colors.GREEN
-                        + "typechange, staged"
-                        + colors.RESET
-                        + " with "
-                        + colors.RED
-                        + "unstaged changes"
-                        + colors.RESET
-                    )
-                elif short_status == "TD":
-                    verbose_status = (
-                        colors.GREEN
-                        + "typechange, staged"
-                        + colors.RESET
-                        + " but "
-                        + colors.RED
-                        + "deleted, not staged"
-                        + colors.RESET
-                    )
-
-                elif short_status == "R.":
-                    verbose_status = (
-                        colors.GREEN
-                        + "renamed"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                    )
-                elif short_status == "RM":
-                    verbose_status = (
-                        colors.GREEN
-                        + "renamed, staged"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                        + " with "
-                        + colors.RED
-                        + "unstaged changes"
-                        + colors.RESET
-                    )
-                elif short_status == "RD":
-                    verbose_status = (
-                        colors.GREEN
-                        + "renamed, staged"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                        + " but "
-                        + colors.RED
-                        + "deleted, not staged"
-                        + colors.RESET
-                    )
-
-                elif short_status == "C.":
-                    verbose_status = (
-                        colors.GREEN
-                        + "copied"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                    )
-                elif short_status == "CM":
-                    verbose_status = (
-                        colors.GREEN
-                        + "copied, staged"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                        + " with "
-                        + colors.RED
-                        + "unstaged changes"
-                        + colors.RESET
-                    )
-                elif short_status == "CD":
-                    verbose_status = (
-                        colors.GREEN
-                        + "copied, staged"
-                        + colors.RESET
-                        + " as "
-                        + colors.YELLOW
-                        + new_file_name
-                        + colors.RESET
-                        + " but "
-                        + colors.RED
-                        + "deleted, not staged"
-                        + colors.RESET
-                    )
-
-                else:
-                    verbose_status = (
-                        colors.CYAN
-                        + "unknown"
-                        + colors.RESET
-                        + " (please contact mepo maintainer)"
-                    )
-
-                verbose_status_string = (
-                    "{file_name:>{file_name_length}}: {verbose_status}".format(
-                        file_name=file_name,
-                        file_name_length=max_file_name_length,
-                        verbose_status=verbose_status,
-                    )
-                )
-                verbose_output_list.append(verbose_status_string)
-
-            output = "\n".join(verbose_output_list)
-
-        return output.rstrip()
+        return format_status_entries(output.splitlines())
+
+    def probe(
+        self,
+        ignore_permissions=False,
+        ignore_submodules=False,
+        worktree=True,
+        untracked=True,
+    ):
+        """
+        Return a RepoProbe with everything status-like commands need
+
+        With worktree=True, HEAD, branch, stash count and the working tree
+        entries come from one `git status --porcelain=v2 --branch --show-stash`.
+        With worktree=False, the working tree scan is skipped and HEAD is read
+        with one `git rev-parse`. Either way, the refs pointing at HEAD are
+        then listed with one `git for-each-ref`
+
+        A worktree that the index shows to be clean, or HEAD alone with
+        worktree=False, is probed without running git at all (short_oid is
+        None then), see RefReader. With untracked=False, untracked files are
+        not looked for
+        """
+        if worktree:
+            probe = self.__quick_probe(ignore_permissions, ignore_submodules, untracked)
+        else:
+            probe = self.__read_probe()
+        if probe is not None:
+            return probe
+        num_stashes = None
+        entries = None
+        if worktree:
+            cmd = "git -C {}".format(self.__local_path_abs)
+            if ignore_permissions:
+                cmd += " -c core.fileMode=false"
+            cmd += " status --porcelain=v2 --branch --show-stash"
+            if ignore_submodules:
+                cmd += " --ignore-submodules=all"
+            if not untracked:
+                cmd += " --untracked-files=no"
+            output = shellcmd.run(shlex.split(cmd), output=True)
+            num_stashes = 0
+            entries = []
+            for line in output.splitlines():
+                if line.startswith("# branch.oid "):
+                    oid = line.split()[2]
+                elif line.startswith("# branch.head "):
+                    branch = line.split(maxsplit=2)[2]
+                elif line.startswith("# stash "):
+                    num_stashes = int(line.split()[2])
+                elif line and not line.startswith("#"):
+                    entries.append(line)
+            detached = branch == "(detached)"
+        else:
+            cmd = self.__git + " rev-parse HEAD --symbolic-full-name HEAD"
+            oid, fullname = shellcmd.run(shlex.split(cmd), stdout=True).split()
+            detached = fullname == "HEAD"
+            branch = fullname.replace("refs/heads/", "", 1)
+
+        # Refs at HEAD, in the order `git show -s --pretty=%D HEAD` lists them
+        cmd = self.__git + " for-each-ref --points-at=HEAD --sort=-refname"
+        cmd += " --format='%(refname) %(objectname:short) %(*objectname:short)'"
+        cmd += " " + " ".join(DECORATED_REFS)
+        output = shellcmd.run(shlex.split(cmd), stdout=True)
+        head_refs = []
+        short_oid = None
+        for line in output.splitlines():
+            refname, *abbrevs = line.split()
+            head_refs.append(refname)
+            # The peeled abbreviation (last) is only there for annotated tags
+            short_oid = abbrevs[-1]
+
+        if not detached:
+            version = MepoVersion(branch, "b", False)
+        elif not head_refs:
+            version = MepoVersion(oid, "h", True)
+        elif head_refs[0].startswith("refs/tags/"):
+            version = MepoVersion(decoration_name(head_refs[0]), "t", True)
+        else:
+            # Same as get_version(): the last decoration wins for branches
+            version = MepoVersion(decoration_name(head_refs[-1]), "b", True)
+        return RepoProbe(
+            oid, version, short_oid, tuple(head_refs), num_stashes, entries
+        )
+
+    def __read_probe(self):
+        """Return a RepoProbe of HEAD read from .git, None if git is needed"""
+        try:
+            oid, version, head_refs = RefReader(self.__local_path_abs).describe_head()
+        except UnsupportedRepo:
+            return None
+        return RepoProbe(oid, version, None, tuple(head_refs), None, None)
+
+    def __quick_probe(self, ignore_permissions, ignore_submodules, untracked):
+        """Return a RepoProbe of a clean worktree, None if git is needed"""
+        try:
+            reader = RefReader(self.__local_path_abs)
+            clean = worktree_is_clean(
+                reader,
+                self.__local_path_abs,
+                ignore_permissions=ignore_permissions,
+                ignore_submodules=ignore_submodules,
+                untracked=untracked,
+            )
+            if not clean:
+                return None
+            oid, version, head_refs = reader.describe_head()
+            num_stashes = reader.count_stashes()
+        except UnsupportedRepo:
+            return None
+        return RepoProbe(oid, version, None, tuple(head_refs), num_stashes, [])
 
     def __get_modified_files(self, orig_ver, comp_type):
         if not orig_ver:
@@ -484,9 +802,8 @@ class GitRepository:
 
     def get_remote_latest_commit_id(self, branch, commit_type):
         if commit_type == "h":
-            cmd = self.__git + " cat-file -e {}".format(branch)
-            status = shellcmd.run(shlex.split(cmd), status=True)
-            if status != 0:
+            resolver = ObjectResolver.get(self.__local_path_abs)
+            if not resolver.exists(branch):
                 msg = "Hash {} does not exist on {}".format(branch, self.__remote)
                 msg += " Have you run 'mepo push'?"
                 raise RuntimeError(msg)
@@ -522,6 +839,14 @@ class GitRepository:
         return shellcmd.run(shlex.split(cmd), output=True).strip()
 
     def get_version(self):
+        """Return (name, type, detached) of HEAD"""
+        try:
+            # Read .git directly, no git process needed
+            return RefReader(self.__local_path_abs).get_version()
+        except UnsupportedRepo:
+            return self.__get_version_from_git()
+
+    def __get_version_from_git(self):
         cmd = self.__git + " show -s --pretty=%D HEAD"
         output = shellcmd.run(shlex.split(cmd), output=True)
         if output.startswith("HEAD ->"):  # an actual branch
@@ -554,3 +879,411 @@ class GitRepository:
             name = hash_out.rstrip()
             tYpe = "h"
         return (name, tYpe, detached)
+
+
+class QueryCache:
+    """
+    Answers of read-only git queries for one mepo invocation, keyed by
+    (repository, query)
+    """
+
+    # {absolute local path: {query: answer}}
+    __entries = {}
+
+    @classmethod
+    def get(cls, local_path_abs, query, compute):
+        """Return the cached answer to query, calling compute() if there is none"""
+        entries = cls.__entries.setdefault(os.path.abspath(local_path_abs), {})
+        if query not in entries:
+            entries[query] = compute()
+        return entries[query]
+
+    @classmethod
+    def invalidate(cls, local_path_abs):
+        """Forget the answers about a repository (called after writing to it)"""
+        cls.__entries.pop(os.path.abspath(local_path_abs), None)
+
+    @classmethod
+    def clear(cls):
+        cls.__entries.clear()
+
+
+class CachedGitRepository(GitRepository):
+    """
+    GitRepository whose read-only queries are answered once per invocation
+    and shared by all instances for the same repository (see QueryCache).
+    Methods that write to the repository invalidate its answers
+    """
+
+    __slots__ = []
+
+    # Read-only queries whose answers are cached
+    QUERIES = [
+        "get_version",
+        "probe",
+        "rev_list",
+        "rev_parse",
+        "verify_branch_or_tag",
+        "get_local_latest_commit_id",
+    ]
+
+    # Methods that change the repository (HEAD, refs, index or worktree)
+    WRITES = [
+        "clone",
+        "checkout",
+        "complete_clone",
+        "clone_bundle",
+        "clone_local",
+        "fetch_missing",
+        "deepen",
+        "add_worktree",
+        "remove_worktree",
+        "sparsify",
+        "pop_stash",
+        "apply_stash",
+        "push_stash",
+        "fetch",
+        "create_branch",
+        "create_tag",
+        "delete_branch",
+        "delete_tag",
+        "stage_file",
+        "unstage_file",
+        "commit_files",
+        "push",
+        "pull",
+    ]
+
+
+def _cached_query(name):
+    query = getattr(GitRepository, name)
+    signature = inspect.signature(query)
+
+    @functools.wraps(query)
+    def cached_query(self, *args, **kwargs):
+        # Bound with defaults, so that probe() and probe(worktree=True) match
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (name,) + tuple(bound.arguments.values())[1:]
+        return QueryCache.get(
+            self.get_local_path(), key, lambda: query(self, *args, **kwargs)
+        )
+
+    return cached_query
+
+
+def _invalidating_write(name):
+    write = getattr(GitRepository, name)
+
+    @functools.wraps(write)
+    def invalidating_write(self, *args, **kwargs):
+        try:
+            return write(self, *args, **kwargs)
+        finally:
+            QueryCache.invalidate(self.get_local_path())
+
+    return invalidating_write
+
+
+for _name in CachedGitRepository.QUERIES:
+    setattr(CachedGitRepository, _name, _cached_query(_name))
+for _name in CachedGitRepository.WRITES:
+    setattr(CachedGitRepository, _name, _invalidating_write(_name))
+
+
+class AsyncGitRepository:
+    """
+    asyncio twin of GitRepository for the network-bound commands
+
+    All repositories sharing a semaphore run at most that many git processes
+    at once. Use run_concurrently() rather than creating these directly
+    """
+
+    __slots__ = ["__local_path_abs", "__remote", "__git", "__semaphore"]
+
+    def __init__(self, remote_url, local_path_abs, semaphore):
+        self.__local_path_abs = local_path_abs
+        self.__remote = remote_url
+        self.__git = 'git -C "{}"'.format(self.__local_path_abs)
+        self.__semaphore = semaphore
+
+    def get_local_path(self):
+        return self.__local_path_abs
+
+    async def __run(self, cmd, **kwargs):
+        try:
+            async with self.__semaphore:
+                return await shellcmd.run_async(shlex.split(cmd), **kwargs)
+        finally:
+            # All of these commands write to the repository
+            QueryCache.invalidate(self.__local_path_abs)
+
+    async def checkout(self, version, detach=False):
+        cmd = self.__git + " checkout "
+        cmd += "--quiet {}".format(version)
+        await self.__run(cmd)
+        if detach:
+            cmd2 = self.__git + " checkout --detach"
+            await self.__run(cmd2)
+
+    async def create_branch(self, branch_name):
+        cmd = self.__git + " branch {}".format(branch_name)
+        await self.__run(cmd)
+
+    async def fetch(self, args=None):
+        cmd = self.__git + " fetch"
+        if args.all:
+            cmd += " --all"
+        if args.prune:
+            cmd += " --prune"
+        if args.tags:
+            cmd += " --tags"
+        if args.force:
+            cmd += " --force"
+        return await self.__run(cmd, output=True)
+
+    async def pull(self):
+        cmd = self.__git + " pull"
+        return (await self.__run(cmd, output=True)).strip()
+
+    async def push(self):
+        cmd = self.__git + " push -u {}".format(self.__remote)
+        return (await self.__run(cmd, output=True)).strip()
+
+    async def push_tag(self, tag_name, force, delete):
+        cmd = self.__git + " push"
+        if force:
+            cmd += " --force"
+        if delete:
+            cmd += " --delete"
+        cmd += " origin {}".format(tag_name)
+        await self.__run(cmd)
+
+
+# Default number of git processes run_concurrently() runs at once
+MAX_CONCURRENT_GIT = 16
+
+
+def run_concurrently(comps, job, max_jobs=MAX_CONCURRENT_GIT):
+    """
+    Run the coroutine function job(comp, git) for each component, where git
+    is its AsyncGitRepository, on a single thread with at most max_jobs git
+    processes at once
+
+    Return the results in the order of comps. A job that raised is not
+    allowed to cancel the others: its exception takes the place of its result
+    """
+
+    async def main():
+        semaphore = asyncio.Semaphore(max_jobs)
+        jobs = [
+            job(comp, AsyncGitRepository(comp.remote, comp.local, semaphore))
+            for comp in comps
+        ]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def format_status_entries(output_list):
+    """Turn `git status --porcelain=v2` lines into verbose, colored text"""
+    output = ""
+    if output_list:
+
+        # Grab the file names first for pretty printing
+        file_name_list = [item.split()[-1] for item in output_list]
+        max_file_name_length = len(max(file_name_list, key=len))
+
+        verbose_output_list = []
+        for item in output_list:
+
+            index_field = item.split()[0]
+            if index_field == "2":
+                new_file_name = colors.YELLOW + item.split()[-2] + colors.RESET
+
+            file_name = item.split()[-1]
+
+            short_status = item.split()[1]
+
+            if index_field == "?":
+                verbose_status = colors.RED + "untracked file" + colors.RESET
+
+            elif short_status == ".D":
+                verbose_status = colors.RED + "deleted, not staged" + colors.RESET
+            elif short_status == ".M":
+                verbose_status = colors.RED + "modified, not staged" + colors.RESET
+            elif short_status == ".A":
+                verbose_status = colors.RED + "added, not staged" + colors.RESET
+            elif short_status == ".T":
+                verbose_status = colors.RED + "typechange, not staged" + colors.RESET
+
+            elif short_status == "D.":
+                verbose_status = colors.GREEN + "deleted, staged" + colors.RESET
+            elif short_status == "M.":
+                verbose_status = colors.GREEN + "modified, staged" + colors.RESET
+            elif short_status == "A.":
+                verbose_status = colors.GREEN + "added, staged" + colors.RESET
+            elif short_status == "T.":
+                verbose_status = colors.GREEN + "typechange, staged" + colors.RESET
+
+            elif short_status == "MM":
+                verbose_status = (
+                    colors.GREEN
+                    + "modified, staged"
+                    + colors.RESET
+                    + " with "
+                    + colors.RED
+                    + "unstaged changes"
+                    + colors.RESET
+                )
+            elif short_status == "MD":
+                verbose_status = (
+                    colors.GREEN
+                    + "modified, staged"
+                    + colors.RESET
+                    + " but "
+                    + colors.RED
+                    + "deleted, not staged"
+                    + colors.RESET
+                )
+
+            elif short_status == "AM":
+                verbose_status = (
+                    colors.GREEN
+                    + "added, staged"
+                    + colors.RESET
+                    + " with "
+                    + colors.RED
+                    + "unstaged changes"
+                    + colors.RESET
+                )
+            elif short_status == "AD":
+                verbose_status = (
+                    colors.GREEN
+                    + "added, staged"
+                    + colors.RESET
+                    + " but "
+                    + colors.RED
+                    + "deleted, not staged"
+                    + colors.RESET
+                )
+
+            elif short_status == "TM":
+                verbose_status = (
+                    colors.GREEN
+                    + "typechange, staged"
+                    + colors.RESET
+                    + " with "
+                    + colors.RED
+                    + "unstaged changes"
+                    + colors.RESET
+                )
+            elif short_status == "TD":
+                verbose_status = (
+                    colors.GREEN
+                    + "typechange, staged"
+                    + colors.RESET
+                    + " but "
+                    + colors.RED
+                    + "deleted, not staged"
+                    + colors.RESET
+                )
+
+            elif short_status == "R.":
+                verbose_status = (
+                    colors.GREEN
+                    + "renamed"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                )
+            elif short_status == "RM":
+                verbose_status = (
+                    colors.GREEN
+                    + "renamed, staged"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                    + " with "
+                    + colors.RED
+                    + "unstaged changes"
+                    + colors.RESET
+                )
+            elif short_status == "RD":
+                verbose_status = (
+                    colors.GREEN
+                    + "renamed, staged"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                    + " but "
+                    + colors.RED
+                    + "deleted, not staged"
+                    + colors.RESET
+                )
+
+            elif short_status == "C.":
+                verbose_status = (
+                    colors.GREEN
+                    + "copied"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                )
+            elif short_status == "CM":
+                verbose_status = (
+                    colors.GREEN
+                    + "copied, staged"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                    + " with "
+                    + colors.RED
+                    + "unstaged changes"
+                    + colors.RESET
+                )
+            elif short_status == "CD":
+                verbose_status = (
+                    colors.GREEN
+                    + "copied, staged"
+                    + colors.RESET
+                    + " as "
+                    + colors.YELLOW
+                    + new_file_name
+                    + colors.RESET
+                    + " but "
+                    + colors.RED
+                    + "deleted, not staged"
+                    + colors.RESET
+                )
+
+            else:
+                verbose_status = (
+                    colors.CYAN
+                    + "unknown"
+                    + colors.RESET
+                    + " (please contact mepo maintainer)"
+                )
+
+            verbose_status_string = (
+                "{file_name:>{file_name_length}}: {verbose_status}".format(
+                    file_name=file_name,
+                    file_name_length=max_file_name_length,
+                    verbose_status=verbose_status,
+                )
+            )
+            verbose_output_list.append(verbose_status_string)
+
+        output = "\n".join(verbose_output_list)
+
+    return output.rstrip()
@@ -1,18 +1,49 @@
-import yaml
+import os
+import glob
+import json
+import time
+import hashlib
 import pathlib
 
+from .utilities import filelock
 from .utilities.exceptions import SuffixNotRecognizedError
 
+# Parsed registry files, as json, one file per registry file (named after
+# the sha1 of its path) in this directory of the user's cache directory:
+# {"path", "mtime_ns", "size", "sha256", "checked_ns", "registry"}
+CACHE_DIR_NAME = os.path.join("mepo", "registries")
 
-# From https://github.com/yaml/pyyaml/issues/127#issuecomment-525800484
-class AddBlankLinesDumper(yaml.SafeDumper):
-    # HACK: insert blank lines between top-level objects
-    # inspired by https://stackoverflow.com/a/44284819/3786245
-    def write_line_break(self, data=None):
-        super().write_line_break(data)
+# Top-level key of a registry listing the registry files (or globs) whose
+# components it includes, relative to the fixture
+INCLUDE_KEY = "include"
 
-        if len(self.indents) == 1:
-            super().write_line_break()
+# A file modified this close to (or after) the time its cache entry was
+# written may have changed again without its mtime showing it
+_RACY_NS = 2 * 10**9
+
+
+def _blank_lines_dumper():
+    """yaml.SafeDumper with blank lines between top-level objects"""
+    import yaml
+
+    # From https://github.com/yaml/pyyaml/issues/127#issuecomment-525800484
+    class AddBlankLinesDumper(yaml.SafeDumper):
+        # HACK: insert blank lines between top-level objects
+        # inspired by https://stackoverflow.com/a/44284819/3786245
+        def write_line_break(self, data=None):
+            super().write_line_break(data)
+
+            if len(self.indents) == 1:
+                super().write_line_break()
+
+    return AddBlankLinesDumper
+
+
+def _is_sparse_config(sparse):
+    """A pattern file name, or a list of directories (cone mode)"""
+    if isinstance(sparse, str):
+        return True
+    return isinstance(sparse, list) and all(isinstance(x, str) for x in sparse)
 
 
 class Registry(object):
@@ -43,6 +74,14 @@ class Registry(object):
                 xsection = git_tag_types.intersection(set(v.keys()))
                 if len(xsection) != 1:
                     raise ValueError(f"{k} needs one and only one of {git_tag_types}")
+                sparse = v.get("sparse")
+                if sparse is not None and not _is_sparse_config(sparse):
+                    raise ValueError(
+                        f"sparse of {k} must be a pattern file or a list of directories"
+                    )
+                depth = v.get("depth")
+                if depth is not None and (type(depth) is not int or depth < 1):
+                    raise ValueError(f"depth of {k} must be a positive integer")
         # Can have one and only one fixture
         assert num_fixtures == 1
 
@@ -52,19 +91,52 @@ class Registry(object):
 
     def read_yaml(self):
         """Read yaml registry and return a dict containing contents"""
-        import yaml
-
-        with open(self.__filename, "r") as fin:
-            d = yaml.safe_load(fin)
-        self.__validate(d)
-        return d
+        return self.__read()
 
     def read_json(self):
         """Read json registry and return a dict containing contents"""
-        import json
+        return self.__read()
+
+    def __read(self):
+        """
+        Read the registry and the registries it includes (`include:`, a
+        file name or glob, or a list of them, relative to the directory of
+        the registry, i.e., the fixture) into one dict, validated once.
+        Each file is only parsed if it changed since it was cached, see
+        _ParseCache
+        """
+        root_dir = os.path.dirname(os.path.abspath(self.__filename))
+        cache = _ParseCache(get_cache_dir())
+        d = {}
+        origins = {}  # {component name: registry file it is in}
+        read = set()
+
+        def add_components(path):
+            read.add(path)  # each file once, e.g., if included twice
+            components = cache.parse(path)
+            if not isinstance(components, dict):
+                raise ValueError(f"registry {path} must be a mapping of components")
+            includes = components.get(INCLUDE_KEY, [])
+            if isinstance(includes, str):
+                includes = [includes]
+            if not _is_str_list(includes):
+                raise ValueError(
+                    f"{INCLUDE_KEY} of {path} must be a file, a glob or a list of them"
+                )
+            for name, comp in components.items():
+                if name == INCLUDE_KEY:
+                    continue
+                if name in d:
+                    raise ValueError(f"{name} is in both {origins[name]} and {path}")
+                d[name] = comp
+                origins[name] = path
+            for pattern in includes:
+                for included in _expand_include(pattern, root_dir):
+                    if included not in read:
+                        add_components(included)
 
-        with open(self.__filename, "r") as fin:
-            d = json.load(fin)
+        add_components(os.path.abspath(self.__filename))
+        cache.save()
         self.__validate(d)
         return d
 
@@ -77,4 +149,109 @@ class Registry(object):
         import yaml
 
         with open(self.__filename, "w") as fout:
-            yaml.dump(d, fout, sort_keys=False, Dumper=AddBlankLinesDumper)
+            yaml.dump(d, fout, sort_keys=False, Dumper=_blank_lines_dumper())
+
+
+def _is_str_list(x):
+    return isinstance(x, list) and all(isinstance(y, str) for y in x)
+
+
+def _expand_include(pattern, root_dir):
+    """Registry files of an include pattern, sorted if it is a glob"""
+    pattern = os.path.join(root_dir, os.path.expanduser(pattern))
+    if not any(x in pattern for x in "*?["):
+        if not os.path.isfile(pattern):
+            raise FileNotFoundError(f"included registry {pattern} does not exist")
+        return [os.path.normpath(pattern)]
+    return sorted(os.path.normpath(x) for x in glob.glob(pattern) if os.path.isfile(x))
+
+
+def get_cache_dir():
+    """Cache of parsed registry files, in $XDG_CACHE_HOME (or ~/.cache)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, CACHE_DIR_NAME)
+
+
+class _ParseCache:
+    """
+    Contents of registry files, parsed (yaml with the libyaml loader if
+    there is one) only if not in the cache. An entry is used as long as
+    its file has the same mtime and size (unless racy, as in git) or else
+    the same sha256
+    """
+
+    __slots__ = ["__cache_dir", "__changed"]
+
+    def __init__(self, cache_dir):
+        self.__cache_dir = cache_dir
+        self.__changed = {}  # {entry file: entry}
+
+    def parse(self, path):
+        """Contents of the registry file at path, not to be modified"""
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        entry_file = self.__get_entry_file(path)
+        entry = self.__read_entry(entry_file, path)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["size"] == st.st_size
+            and st.st_mtime_ns < entry["checked_ns"] - _RACY_NS
+        ):
+            return entry["registry"]
+        with open(path, "rb") as fin:
+            content = fin.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if entry is not None and entry["sha256"] == sha256:
+            d = entry["registry"]
+        else:
+            d = _parse(path, content)
+        self.__changed[entry_file] = {
+            "path": path,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": sha256,
+            "checked_ns": time.time_ns(),
+            "registry": d,
+        }
+        return d
+
+    def save(self):
+        """Write the entries of the files parsed or checked again"""
+        for entry_file, entry in self.__changed.items():
+            try:
+                content = json.dumps(entry)
+            except TypeError:
+                continue  # e.g., yaml dates
+            if json.loads(content) != entry:
+                continue  # e.g., non-string keys
+            try:
+                os.makedirs(self.__cache_dir, exist_ok=True)
+                filelock.write_file(entry_file, lambda fout: fout.write(content))
+            except OSError:
+                pass  # e.g., no writable home directory
+        self.__changed = {}
+
+    def __get_entry_file(self, path):
+        digest = hashlib.sha1(path.encode()).hexdigest()
+        return os.path.join(self.__cache_dir, f"{digest}.json")
+
+    @staticmethod
+    def __read_entry(entry_file, path):
+        try:
+            with open(entry_file, "r") as fin:
+                entry = json.load(fin)
+        except (OSError, ValueError):
+            return None  # not cached yet, or e.g. edited by hand
+        return entry if entry.get("path") == path else None
+
+
+def _parse(path, content):
+    suffix = pathlib.Path(path).suffix
+    if suffix == ".json":
+        return json.loads(content)
+    if suffix in (".yaml", ".yml"):
+        import yaml
+
+        return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    raise SuffixNotRecognizedError(f"suffix {suffix} not supported")
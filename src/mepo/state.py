@@ -3,14 +3,17 @@ import sys
 import json
 import glob
 import stat
+import time
 import pickle
+import zipfile
+from contextlib import contextmanager
 
 from .registry import Registry
 from .component import MepoComponent
 from .utilities import colors
+from .utilities import filelock
 from .utilities.exceptions import StateDoesNotExistError
 from .utilities.exceptions import StateAlreadyInitializedError
-from .utilities.chdir import chdir as mepo_chdir
 
 
 class MepoState(object):
@@ -18,10 +21,20 @@ class MepoState(object):
     __state_dir_name = ".mepo"
     __state_fileptr_name = "state.json"
     __state_fileptr_name_old = "state.pkl"
+    # A line of description of each state, appended by write_state(), and of
+    # each state archived or deleted, see read_manifest()
+    __log_name = "state-log.jsonl"
+    # Old states packed by archive_states()
+    __archive_name = "state-archive.zip"
+    # Writers of the state take it exclusively, readers shared
+    __lock_name = "state.lock"
+
+    # {working directory: state dir}, see get_dir()
+    __state_dirs = {}
 
     @staticmethod
-    def get_parent_dirs():
-        mypath = os.getcwd()
+    def get_parent_dirs(mypath=None):
+        mypath = mypath or os.getcwd()
         parentdirs = [mypath]
         while mypath != "/":
             mypath = os.path.dirname(mypath)
@@ -30,13 +43,59 @@ class MepoState(object):
 
     @classmethod
     def get_dir(cls):
-        """Return location of mepo state dir"""
-        for mydir in cls.get_parent_dirs():
+        """
+        Return location of mepo state dir, looked up once per working
+        directory: $MEPO_ROOT/.mepo if the working directory is in
+        $MEPO_ROOT, else the first .mepo in it or its parents. A .mepo file
+        (rather than directory) holds the path to the root of a fixture, so
+        that mepo can be run from elsewhere (e.g., a build directory)
+        """
+        cwd = os.getcwd()
+        state_dir = cls.__state_dirs.get(cwd)
+        if state_dir is None:
+            state_dir = cls.__find_dir(cwd)
+            cls.__state_dirs[cwd] = state_dir
+        return state_dir
+
+    @classmethod
+    def __find_dir(cls, cwd):
+        env_root = os.environ.get("MEPO_ROOT")
+        if env_root:
+            env_root = os.path.abspath(env_root)
+            if env_root in cls.get_parent_dirs(cwd):
+                state_dir = os.path.join(env_root, cls.__state_dir_name)
+                if os.path.isdir(state_dir):
+                    return state_dir
+        for mydir in cls.get_parent_dirs(cwd):
             state_dir = os.path.join(mydir, cls.__state_dir_name)
             if os.path.exists(state_dir):
+                if os.path.isfile(state_dir):
+                    return cls.__follow_root_pointer(state_dir)
                 return state_dir
         raise OSError("mepo state dir [.mepo] does not exist")
 
+    @classmethod
+    def __follow_root_pointer(cls, pointer):
+        with open(pointer, "r") as fin:
+            root_dir = fin.read().strip()
+        # Relative to the directory of the pointer
+        root_dir = os.path.join(os.path.dirname(pointer), os.path.expanduser(root_dir))
+        state_dir = os.path.join(os.path.normpath(root_dir), cls.__state_dir_name)
+        if not os.path.isdir(state_dir):
+            raise OSError(
+                f"{pointer} points to [{root_dir}], which has no mepo state dir"
+            )
+        return state_dir
+
+    @classmethod
+    def make_dir(cls):
+        """
+        Create the state dir in the current directory, so that a fixture
+        nested in another one gets its own state
+        """
+        os.makedirs(cls.__state_dir_name)
+        cls.__state_dirs[os.getcwd()] = os.path.abspath(cls.__state_dir_name)
+
     @classmethod
     def get_root_dir(cls):
         """Return fixture (root) directory that contains mepo state dir"""
@@ -101,14 +160,16 @@ class MepoState(object):
     @classmethod
     def read_state(cls):
         if cls.state_exists():
-            with open(cls.get_file(), "r") as fin:
-                allcomps_s = json.load(fin)
+            with cls.__locked(shared=True):
+                with open(cls.get_file(), "r") as fin:
+                    allcomps_s = json.load(fin)
             # List of dicts -> state (list of MepoComponent objects)
+            root_dir = cls.get_root_dir()
             allcomps = []
             for comp_s in allcomps_s:
                 comp = MepoComponent().deserialize(comp_s)
                 # Relative path to absolute
-                comp.local = os.path.join(cls.get_root_dir(), comp.local)
+                comp.local = os.path.join(root_dir, comp.local)
                 allcomps.append(comp)
             return allcomps
         elif cls.state_exists(old_style=True):
@@ -119,52 +180,187 @@ class MepoState(object):
                 + colors.RESET
             )
             cls.__mepo1_patch()
-            with open(cls.get_file(old_style=True), "rb") as fin:
-                allcomps = pickle.load(fin)
+            with cls.__locked(shared=True):
+                with open(cls.get_file(old_style=True), "rb") as fin:
+                    allcomps = pickle.load(fin)
+            root_dir = cls.get_root_dir()
             for comp in allcomps:
-                comp.local = os.path.join(cls.get_root_dir(), comp.local)
+                comp.local = os.path.join(root_dir, comp.local)
         else:
             raise StateDoesNotExistError("Error! mepo state does not exist")
         return allcomps
 
     @classmethod
-    def __get_new_state_file(cls):
-        """Return full path to the new state file to write to"""
+    def __get_state_dir_to_write(cls):
+        """Return the state dir, created in the current directory if needed"""
+        if cls.state_exists() or cls.state_exists(old_style=True):
+            return cls.get_dir()
+        state_dir = os.path.join(os.getcwd(), cls.__state_dir_name)
+        os.makedirs(state_dir, exist_ok=True)
+        return state_dir
+
+    @classmethod
+    def __get_new_state_id(cls):
         if cls.state_exists():
+            # state.json points to the latest state. Past it, there may be
+            # state files it does not know about (e.g., .mepo restored from
+            # a copy), never overwrite them
             state_dir = cls.get_dir()
-            pattern = os.path.join(cls.get_dir(), "state.*.json")
-            states = [os.path.basename(x) for x in glob.glob(pattern)]
-            new_state_id = max([int(x.split(".")[1]) for x in states]) + 1
-            state_filename = "state." + str(new_state_id) + ".json"
-        elif cls.state_exists(old_style=True):
-            state_dir = cls.get_dir()
+            new_state_id = cls.__get_latest_id(state_dir) + 1
+            while os.path.lexists(
+                os.path.join(state_dir, f"state.{new_state_id}.json")
+            ):
+                new_state_id += 1
+            return new_state_id
+        if cls.state_exists(old_style=True):
             pattern = os.path.join(cls.get_dir(), "state.*.pkl")
             states = [os.path.basename(x) for x in glob.glob(pattern)]
-            new_state_id = max([int(x.split(".")[1]) for x in states])
-            state_filename = "state." + str(new_state_id) + ".json"
-        else:
-            state_dir = os.path.join(os.getcwd(), cls.__state_dir_name)
-            os.makedirs(state_dir, exist_ok=True)
-            state_filename = "state.0.json"
-        return os.path.join(state_dir, state_filename)
+            return max([int(x.split(".")[1]) for x in states])
+        return 0
+
+    @classmethod
+    def __get_latest_id(cls, state_dir):
+        """Id of the state state.json points to, -1 if there is none"""
+        try:
+            target = os.readlink(os.path.join(state_dir, cls.__state_fileptr_name))
+        except OSError:
+            return -1
+        return int(target.split(".")[1])
+
+    @classmethod
+    @contextmanager
+    def __locked(cls, shared=False, state_dir=None):
+        """Lock the state dir (shared for readers) while in the block"""
+        state_dir = state_dir or cls.get_dir()
+        with filelock.locked(os.path.join(state_dir, cls.__lock_name), shared):
+            yield
+
+    @classmethod
+    def read_manifest(cls):
+        """
+        Return {"latest": id of the current state, "states": [{"id", "time",
+        "command", "components", "archived"}, ...]}, from the state log.
+        Fixtures from before the log get one from the names and times of
+        their state files
+        """
+        state_dir = cls.get_dir()
+        path = os.path.join(state_dir, cls.__log_name)
+        if not os.path.isfile(path):
+            return cls.__make_up_manifest(state_dir)
+        states = {}
+        with open(path, "r") as fin:
+            for line in fin:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # e.g., cut short by a crash
+                if record.get("deleted"):
+                    states.pop(record["id"], None)
+                elif record.get("archived"):
+                    if record["id"] in states:
+                        states[record["id"]]["archived"] = True
+                else:
+                    states[record["id"]] = dict(record, archived=False)
+        states = sorted(states.values(), key=lambda x: x["id"])
+        return {"latest": cls.__get_latest_id(state_dir), "states": states}
+
+    @classmethod
+    def __make_up_manifest(cls, state_dir):
+        states = []
+        for state_file in glob.glob(os.path.join(state_dir, "state.*.json")):
+            state = {
+                "id": int(os.path.basename(state_file).split(".")[1]),
+                "time": os.path.getmtime(state_file),
+                "command": None,
+                "components": None,
+                "archived": False,
+            }
+            states.append(state)
+        states.sort(key=lambda x: x["id"])
+        return {"latest": cls.__get_latest_id(state_dir), "states": states}
+
+    @classmethod
+    def __append_to_log(cls, state_dir, records):
+        """
+        Append records to the state log, a line of json each. A fixture from
+        before the log first gets a record of each of its states
+        """
+        path = os.path.join(state_dir, cls.__log_name)
+        if not os.path.isfile(path):
+            ids = {x["id"] for x in records}
+            states = cls.__make_up_manifest(state_dir)["states"]
+            for state in states:
+                del state["archived"]
+            records = [x for x in states if x["id"] not in ids] + records
+        with open(path, "a") as fout:
+            fout.write("".join(json.dumps(x) + "\n" for x in records))
+            fout.flush()
+            os.fsync(fout.fileno())
+
+    @classmethod
+    def archive_states(cls, state_ids, delete=False):
+        """
+        Move the (non-current) states state_ids into the archive (a zip
+        file in the state dir, e.g., `unzip -p .mepo/state-archive.zip
+        state.3.json`), or delete them
+        """
+        state_dir = cls.get_dir()
+        with cls.__locked():
+            cls.__archive_states(state_dir, state_ids, delete)
+
+    @classmethod
+    def __archive_states(cls, state_dir, state_ids, delete):
+        if cls.__get_latest_id(state_dir) in state_ids:
+            raise ValueError("The current state cannot be archived")
+        names = [f"state.{x}.json" for x in state_ids]
+        if not delete:
+            archive = os.path.join(state_dir, cls.__archive_name)
+            with zipfile.ZipFile(archive, "a", zipfile.ZIP_DEFLATED) as fzip:
+                # Some may be archived already by an interrupted archive_states
+                archived = set(fzip.namelist())
+                for name in names:
+                    if name not in archived:
+                        fzip.write(os.path.join(state_dir, name), name)
+        key = "deleted" if delete else "archived"
+        cls.__append_to_log(state_dir, [{"id": x, key: True} for x in state_ids])
+        for name in names:
+            os.remove(os.path.join(state_dir, name))
 
     @classmethod
     def write_state(cls, allcomps):
-        new_state_file = cls.__get_new_state_file()
+        """
+        Write the state as a new state file and point state.json to it.
+        Concurrent mepo processes are serialized by the lock in the state
+        dir, and a reader sees either the old or the new state: each file is
+        written to a temporary one, synced and renamed
+        """
+        state_dir = cls.__get_state_dir_to_write()
+        root_dir = os.path.dirname(state_dir)
         allcomps_s = []
         for comp in allcomps:
             # Save relative path (to fixture dir) to state
-            comp.local = os.path.relpath(comp.local, start=cls.get_root_dir())
+            comp.local = os.path.relpath(comp.local, start=root_dir)
             allcomps_s.append(comp.serialize())
-        with open(new_state_file, "w") as fout:
-            json.dump(allcomps_s, fout)
-        # Make the state file read-only
-        os.chmod(new_state_file, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
-        # Update symlink
-        state_dir = os.path.dirname(new_state_file)
-        state_fileptr_fullpath = os.path.join(state_dir, cls.__state_fileptr_name)
-        if os.path.isfile(state_fileptr_fullpath):
-            os.remove(state_fileptr_fullpath)
-        with mepo_chdir(state_dir):
-            new_state_filename = os.path.basename(new_state_file)
-            os.symlink(new_state_filename, cls.__state_fileptr_name)
+        with cls.__locked(state_dir=state_dir):
+            new_state_id = cls.__get_new_state_id()
+            new_state_filename = f"state.{new_state_id}.json"
+            # Read-only
+            filelock.write_file(
+                os.path.join(state_dir, new_state_filename),
+                lambda fout: json.dump(allcomps_s, fout),
+                stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH,
+            )
+            record = {
+                "id": new_state_id,
+                "time": time.time(),
+                "command": " ".join(["mepo"] + sys.argv[1:]),
+                "components": len(allcomps_s),
+            }
+            cls.__append_to_log(state_dir, [record])
+            # Swap the symlink
+            tmp_link = os.path.join(state_dir, f"{cls.__state_fileptr_name}.tmp")
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(new_state_filename, tmp_link)
+            os.replace(tmp_link, os.path.join(state_dir, cls.__state_fileptr_name))
+            filelock.sync_dir(state_dir)
@@ -0,0 +1,259 @@
+"""
+Run a job for each component of a command, up to `mepo -j N` at a time
+
+Whatever a job prints is buffered and printed in registry order, as soon
+as the jobs of the preceding components are done. A failing job does not
+stop the others: the failures are summarized at the end and the first one
+is re-raised. With a single job at a time, jobs simply run one after the
+other and print directly
+"""
+
+import io
+import os
+import sys
+import functools
+import contextvars
+import multiprocessing as mp
+
+from contextlib import contextmanager
+from contextlib import redirect_stdout
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from . import mepoconfig
+
+# Output buffer of the job running in the current thread or asyncio task
+_buffer = contextvars.ContextVar("mepo_output_buffer", default=None)
+
+
+def get_jobs(args, default=1):
+    """Number of jobs from `mepo -j N`, else from .mepoconfig ([run] jobs)"""
+    jobs = getattr(args, "jobs", None)
+    if jobs is None and mepoconfig.has_option("run", "jobs"):
+        jobs = int(mepoconfig.get("run", "jobs"))
+    if jobs is None:
+        return default
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be at least 1, not {jobs}")
+    return jobs
+
+
+# Ways of running several jobs at once
+BACKENDS = ["thread", "process"]
+
+
+def get_parallel_jobs(args):
+    """
+    (jobs, backend) for commands with a --parallel option, which defaults
+    to one job per CPU
+    """
+    default = (os.cpu_count() or 1) if getattr(args, "parallel", False) else 1
+    return get_jobs(args, default), getattr(args, "backend", None) or "thread"
+
+
+def run(comps, job, jobs=1, backend="thread"):
+    """
+    Call job(comp) for each component, on up to `jobs` threads. Return the
+    results in the order of comps
+
+    The "process" backend uses a multiprocessing pool instead, so job,
+    components and results must be picklable. Threads are cheaper since
+    jobs mostly wait on git, processes are kept for comparison
+    """
+    if jobs == 1:
+        results = [_call(job, comp) for comp in comps]
+        return _check(comps, results)
+    results = []
+    if backend == "process":
+        with mp.Pool(jobs) as pool:
+            for output, result in pool.imap(
+                functools.partial(_captured_call, job), comps
+            ):
+                sys.stdout.write(output)
+                results.append(result)
+        return _check(comps, results)
+    with _ordered_stdout():
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_buffered_call, job, comp) for comp in comps]
+            for future in futures:
+                output, result = future.result()
+                sys.stdout.write(output)
+                results.append(result)
+    return _check(comps, results)
+
+
+def run_nested(comps, job, jobs=1):
+    """
+    run() for jobs that create the local directory of their component, e.g.
+    clones. The job of a component nested in the directory of another one
+    (./@cmake/@ecbuild in ./@cmake) starts once the job of the enclosing
+    component succeeded, and is skipped if it failed. Output is still
+    printed in the order of comps
+    """
+    children = [[] for _ in comps]
+    roots = []
+    for i, parent in enumerate(nesting_parents(comps)):
+        (roots if parent is None else children[parent]).append(i)
+    outputs = [None] * len(comps)
+    results = [None] * len(comps)
+    printed = 0
+    with _ordered_stdout():
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            running = {}
+
+            def submit(i):
+                running[pool.submit(_buffered_call, job, comps[i])] = i
+
+            def skip(i, reason):
+                for child in children[i]:
+                    outputs[child] = ""
+                    results[child] = _Failure(reason)
+                    skip(child, reason)
+
+            for i in roots:
+                submit(i)
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    outputs[i], results[i] = future.result()
+                    if isinstance(results[i], _Failure):
+                        skip(i, RuntimeError(f"skipped since {comps[i].name} failed"))
+                    else:
+                        for child in children[i]:
+                            submit(child)
+                while printed < len(comps) and outputs[printed] is not None:
+                    sys.stdout.write(outputs[printed])
+                    printed += 1
+    return _check(comps, results)
+
+
+def nesting_parents(comps):
+    """
+    For each component, the index in comps of the component whose local
+    directory most closely encloses its own, None if there is none
+    """
+    paths = [os.path.abspath(comp.local) for comp in comps]
+    index = {path: i for i, path in enumerate(paths)}
+    parents = []
+    for path in paths:
+        parent = os.path.dirname(path)
+        while parent not in index and parent != os.path.dirname(parent):
+            parent = os.path.dirname(parent)
+        parents.append(index.get(parent))
+    return parents
+
+
+def run_async(comps, job, jobs):
+    """
+    Await job(comp, git) for each component, where git is its
+    AsyncGitRepository, with at most `jobs` git processes at once (on one
+    thread). Return the results in the order of comps
+    """
+    from ..git import run_concurrently
+
+    async def buffered_job(comp, git):
+        return await _buffered_await(job(comp, git))
+
+    with _ordered_stdout():
+        results = []
+        for item in run_concurrently(comps, buffered_job, jobs):
+            if isinstance(item, BaseException):
+                raise item  # e.g., KeyboardInterrupt
+            output, result = item
+            sys.stdout.write(output)
+            results.append(result)
+    return _check(comps, results)
+
+
+class _Failure:
+    """Result of a job that raised"""
+
+    __slots__ = ["error"]
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _call(job, comp):
+    try:
+        return job(comp)
+    except Exception as e:
+        return _Failure(e)
+
+
+def _buffered_call(job, comp):
+    """Call job(comp) with its output captured, return (output, result)"""
+    output = []
+    _buffer.set(output)
+    result = _call(job, comp)
+    _buffer.set(None)  # pool threads are reused
+    return "".join(output), result
+
+
+def _captured_call(job, comp):
+    """_buffered_call for a worker process, which has sys.stdout to itself"""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = _call(job, comp)
+    return output.getvalue(), result
+
+
+async def _buffered_await(coroutine):
+    # Each asyncio task runs in its own copy of the context
+    output = []
+    _buffer.set(output)
+    try:
+        result = await coroutine
+    except Exception as e:
+        result = _Failure(e)
+    return "".join(output), result
+
+
+def _check(comps, results):
+    """Summarize failures on stderr and re-raise the first one"""
+    failures = [
+        (comp, x.error) for comp, x in zip(comps, results) if isinstance(x, _Failure)
+    ]
+    if not failures:
+        return results
+    sys.stdout.flush()
+    print(
+        f"Failed in {len(failures)} of {len(comps)} components:",
+        file=sys.stderr,
+    )
+    for comp, error in failures:
+        print(f"  {comp.name}: {error}", file=sys.stderr)
+    raise failures[0][1]
+
+
+class _OrderedStdout:
+    """sys.stdout stand-in that sends what a job prints to its buffer"""
+
+    def __init__(self, stdout):
+        self.__stdout = stdout
+
+    def write(self, text):
+        output = _buffer.get()
+        if output is None:
+            return self.__stdout.write(text)
+        output.append(text)
+        return len(text)
+
+    def flush(self):
+        if _buffer.get() is None:
+            self.__stdout.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.__stdout, name)
+
+
+@contextmanager
+def _ordered_stdout():
+    stdout = sys.stdout
+    sys.stdout = _OrderedStdout(stdout)
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
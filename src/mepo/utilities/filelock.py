@@ -0,0 +1,77 @@
+"""
+Advisory locks between mepo processes working on the same fixture
+
+locked() holds an fcntl.flock() lock on a lock file: shared for readers,
+exclusive for writers. Where fcntl does not exist (not POSIX), it does not
+lock. The lock belongs to the open file, so a process must not take a
+lock on a file it already holds one on
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def locked(path, shared=False):
+    """Hold a lock on path (created if needed) while in the block"""
+    fd = _open(path, shared)
+    if fd is None:
+        yield
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # and with it the lock
+
+
+def _open(path, shared):
+    if fcntl is None:
+        return None
+    try:
+        return os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    except PermissionError:
+        if not shared:
+            raise
+    # e.g., a fixture of another user: read it as is
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+
+def write_file(path, write, mode=None):
+    """
+    Replace the file at path atomically: write(fout) writes it to a
+    temporary file, which is synced to disk, given mode (e.g., read-only)
+    and renamed to path
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)  # left by an interrupted write, maybe read-only
+    with open(tmp_path, "w") as fout:
+        write(fout)
+        fout.flush()
+        os.fsync(fout.fileno())
+    if mode is not None:
+        os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+def sync_dir(path):
+    """Sync the entries of directory path (e.g., after a rename) to disk"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # not supported by some file systems
+    finally:
+        os.close(fd)
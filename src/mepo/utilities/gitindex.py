@@ -0,0 +1,369 @@
+"""
+Tell whether a git worktree is clean without calling git
+
+The index (DIRC versions 2-4) is parsed and its cached stat data is compared
+with os.lstat of the tracked files, much like git's own refresh. The answer
+is conservative: whenever something looks changed, or cannot be checked
+in-process (racily clean entries, conflicts, submodules, ...), the worktree
+is reported as possibly dirty so that callers fall back to `git status`.
+"""
+
+import os
+import re
+import stat
+import struct
+import zlib
+
+from collections import namedtuple
+
+from .gitrefs import UnsupportedRepo
+
+IndexEntry = namedtuple(
+    "IndexEntry",
+    ["name", "ctime", "mtime", "ino", "mode", "uid", "gid", "size", "oid", "flags"],
+)
+
+# Mode bits of index entries
+_GITLINK = 0o160000
+_SYMLINK = 0o120000
+_SPARSE_DIR = 0o040000
+
+# Flags of index entries (extended flags are shifted left by 16)
+_ASSUME_VALID = 0x8000
+_EXTENDED = 0x4000
+_STAGE_MASK = 0x3000
+_SKIP_WORKTREE = 0x4000 << 16
+_INTENT_TO_ADD = 0x2000 << 16
+
+
+def read_index(index_path):
+    """Return (entries, root tree oid) of an index, the oid is None if unknown"""
+    with open(index_path, "rb") as fin:
+        data = fin.read()
+    if data[:4] != b"DIRC":
+        raise UnsupportedRepo(f"{index_path} is not an index file")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise UnsupportedRepo(f"index version {version} is not supported")
+    entries = []
+    offset = 12
+    name = b""
+    for _ in range(count):
+        fields = struct.unpack_from(">10I", data, offset)
+        oid = data[offset + 40 : offset + 60].hex()
+        flags = struct.unpack_from(">H", data, offset + 60)[0]
+        pos = offset + 62
+        if flags & _EXTENDED:
+            flags |= struct.unpack_from(">H", data, pos)[0] << 16
+            pos += 2
+        end = data.index(b"\0", pos)
+        if version == 4:
+            # Name is prefix-compressed against the previous one
+            byte = data[pos]
+            pos += 1
+            strip = byte & 0x7F
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                strip = ((strip + 1) << 7) | (byte & 0x7F)
+            name = name[: len(name) - strip] + data[pos:end]
+            offset = end + 1
+        else:
+            name = data[pos:end]
+            # Entries are NUL padded to a multiple of 8 bytes
+            offset += (end - offset + 8) & ~7
+        entries.append(
+            IndexEntry(
+                name=os.fsdecode(name),
+                ctime=(fields[0], fields[1]),
+                mtime=(fields[2], fields[3]),
+                ino=fields[5],
+                mode=fields[6],
+                uid=fields[7],
+                gid=fields[8],
+                size=fields[9],
+                oid=oid,
+                flags=flags,
+            )
+        )
+    return entries, _read_root_tree(data, offset)
+
+
+def _read_root_tree(data, offset):
+    """Return the root oid of the cache-tree extension, None if invalid"""
+    end = len(data) - 20  # trailing checksum
+    while offset + 8 <= end:
+        signature = data[offset : offset + 4]
+        size = struct.unpack_from(">I", data, offset + 4)[0]
+        offset += 8
+        if signature == b"link":
+            # Split index, the entries above are not the whole story
+            raise UnsupportedRepo("split index is not supported")
+        if signature == b"TREE":
+            # Root entry: "" NUL entry_count SP subtrees LF oid
+            line_end = data.index(b"\n", offset)
+            entry_count = int(data[offset + 1 : line_end].split()[0])
+            if data[offset] != 0 or entry_count < 0:
+                return None
+            return data[line_end + 1 : line_end + 21].hex()
+        offset += size
+    return None
+
+
+def worktree_is_clean(
+    reader,
+    local_path,
+    ignore_permissions=False,
+    ignore_submodules=False,
+    untracked=True,
+):
+    """
+    Return True if `git status` is sure to report nothing for the worktree
+    at local_path (reader is its RefReader), False if it might not
+    """
+    try:
+        return _worktree_is_clean(
+            reader, local_path, ignore_permissions, ignore_submodules, untracked
+        )
+    except (UnsupportedRepo, OSError, ValueError, IndexError, zlib.error):
+        return False
+
+
+def _worktree_is_clean(
+    reader, local_path, ignore_permissions, ignore_submodules, untracked
+):
+    index_path = os.path.join(reader.get_git_dir(), "index")
+    index_mtime = os.stat(index_path).st_mtime_ns
+    entries, root_tree = read_index(index_path)
+
+    # Index vs HEAD: nothing is staged if the cache-tree matches HEAD's tree,
+    # without a valid cache-tree (e.g., after `git reset`) the trees are read
+    oid, _ = reader.read_head()
+    head_tree = reader.read_tree_oid(oid)
+    if root_tree is None:
+        if not _index_matches_tree(reader, head_tree, entries):
+            return False
+    elif root_tree != head_tree:
+        return False
+
+    # Worktree vs index
+    for entry in entries:
+        if entry.flags & _STAGE_MASK or entry.flags & _INTENT_TO_ADD:
+            return False  # conflicts and `git add -N` files are changes
+        if entry.flags & (_SKIP_WORKTREE | _ASSUME_VALID):
+            continue  # not checked by git either (e.g., sparse checkout)
+        if entry.mode == _SPARSE_DIR:
+            continue
+        if entry.mode == _GITLINK:
+            if ignore_submodules:
+                continue
+            return False  # submodule status needs git
+        path = os.path.join(local_path, entry.name)
+        if not _stat_matches(entry, path, index_mtime, ignore_permissions):
+            return False
+
+    if untracked and _has_untracked(reader, local_path, entries):
+        return False
+    return True
+
+
+def _index_matches_tree(reader, tree_oid, entries):
+    """Return True if the (stage 0) entries are exactly those of the tree"""
+    # Directories outside the cone of a sparse index are single entries
+    sparse_dirs = {x.name for x in entries if x.mode == _SPARSE_DIR}
+    expected = {}
+    pending = [("", tree_oid)]
+    while pending:
+        prefix, oid = pending.pop()
+        for mode, name, entry_oid in reader.read_tree(oid):
+            if mode == _SPARSE_DIR and prefix + name + "/" in sparse_dirs:
+                expected[prefix + name + "/"] = (mode, entry_oid)
+            elif mode == _SPARSE_DIR:
+                pending.append((prefix + name + "/", entry_oid))
+            else:
+                expected[prefix + name] = (mode, entry_oid)
+    if len(expected) != len(entries):
+        return False
+    for entry in entries:
+        if expected.get(entry.name) != (entry.mode, entry.oid):
+            return False
+    return True
+
+
+def _stat_matches(entry, path, index_mtime, ignore_permissions):
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    if entry.mode == _SYMLINK:
+        if not stat.S_ISLNK(st.st_mode):
+            return False
+    elif not stat.S_ISREG(st.st_mode):
+        return False
+    elif not ignore_permissions and (st.st_mode ^ entry.mode) & 0o100:
+        return False
+    # Like git (unless built with USE_NSEC), only whole seconds are compared
+    mtime = _seconds(st.st_mtime_ns)
+    if mtime != entry.mtime[0] or _seconds(st.st_ctime_ns) != entry.ctime[0]:
+        return False
+    # The index keeps the lower 32 bits only
+    st_fields = (st.st_ino, st.st_uid, st.st_gid, st.st_size)
+    if tuple(x & 0xFFFFFFFF for x in st_fields) != (
+        entry.ino,
+        entry.uid,
+        entry.gid,
+        entry.size,
+    ):
+        return False
+    # Racily clean: modified in the same second the index was written
+    return entry.mtime[0] < _seconds(index_mtime)
+
+
+def _seconds(ns):
+    """Nanoseconds since epoch -> seconds as stored in the index"""
+    return (ns // 10**9) & 0xFFFFFFFF
+
+
+def _has_untracked(reader, local_path, entries):
+    """Return True if the worktree might have untracked files"""
+    tracked = set()
+    tracked_dirs = {""}
+    for entry in entries:
+        tracked.add(entry.name)
+        parent = os.path.dirname(entry.name)
+        while parent not in tracked_dirs:
+            tracked_dirs.add(parent)
+            parent = os.path.dirname(parent)
+    rules = IgnoreRules()
+    rules.add_file(os.path.join(reader.get_common_dir(), "info", "exclude"), "")
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    rules.add_file(os.path.join(config_home, "git", "ignore"), "")
+
+    pending = [""]
+    while pending:
+        reldir = pending.pop()
+        absdir = os.path.join(local_path, reldir)
+        rules.add_file(os.path.join(absdir, ".gitignore"), reldir)
+        with os.scandir(absdir) as it:
+            for dirent in it:
+                if dirent.name == ".git":
+                    continue
+                relpath = reldir + "/" + dirent.name if reldir else dirent.name
+                if relpath in tracked:
+                    continue
+                is_dir = dirent.is_dir(follow_symlinks=False)
+                if relpath in tracked_dirs:
+                    pending.append(relpath)
+                elif rules.is_ignored(relpath, is_dir):
+                    continue
+                elif not is_dir:
+                    return True
+                elif os.path.exists(os.path.join(dirent.path, ".git")):
+                    return True  # nested repository
+                else:
+                    # Only reported by git if it has non-ignored files
+                    pending.append(relpath)
+    return False
+
+
+class IgnoreRules:
+    """
+    Conservative subset of gitignore matching: only ever answers "ignored"
+    when git would. Negated patterns make everything count as not ignored
+    """
+
+    __slots__ = ["__rules", "__negated"]
+
+    def __init__(self):
+        self.__rules = []
+        self.__negated = False
+
+    def add_file(self, path, base):
+        """Add the patterns of ignore file `path`, relative to dir `base`"""
+        try:
+            with open(path, "r", errors="surrogateescape") as fin:
+                lines = fin.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            self.add_pattern(line, base)
+
+    def add_pattern(self, line, base):
+        if not line.strip() or line.startswith("#"):
+            return
+        if line.startswith("!"):
+            self.__negated = True
+            return
+        if line.startswith("\\"):
+            line = line[1:]
+        # Trailing spaces are ignored unless escaped
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return
+        anchored = "/" in line
+        line = line.lstrip("/")
+        self.__rules.append((base, _translate(line), dir_only, anchored))
+
+    def is_ignored(self, relpath, is_dir):
+        if self.__negated:
+            return False
+        for base, regex, dir_only, anchored in self.__rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not relpath.startswith(base + "/"):
+                    continue
+                path = relpath[len(base) + 1 :]
+            else:
+                path = relpath
+            if not anchored:
+                path = path.rsplit("/", 1)[-1]
+            if regex.match(path):
+                return True
+        return False
+
+
+def _translate(pattern):
+    """Translate a gitignore glob into a regex (`*` does not match `/`)"""
+    i, n = 0, len(pattern)
+    output = ""
+    while i < n:
+        if pattern.startswith("**/", i):
+            output += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            output += "/.*"
+            i += 3
+        elif pattern[i] == "*":
+            output += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            output += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                output += "\\["
+                i += 1
+            else:
+                chars = pattern[i + 1 : j].replace("\\", "\\\\")
+                if chars[0] in "!^":
+                    chars = "^" + chars[1:]
+                output += "[" + chars + "]"
+                i = j + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            output += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            output += re.escape(pattern[i])
+            i += 1
+    return re.compile(output + r"\Z", re.DOTALL)
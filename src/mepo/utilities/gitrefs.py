@@ -0,0 +1,403 @@
+"""
+Read HEAD and refs of a git repository without calling git
+
+Only the plain "files" ref backend and SHA-1 object names are understood.
+Anything else (reftable, shallow clones, objects it cannot read, e.g.
+deltas against an object of another pack, ...) raises UnsupportedRepo
+so that callers can fall back to the git command line.
+"""
+
+import os
+import glob
+import mmap
+import zlib
+import struct
+
+from .version import MepoVersion
+
+# Namespaces shown by `git show -s --pretty=%D`
+DECORATED_REFS = ("refs/tags/", "refs/remotes/", "refs/heads/")
+
+
+class UnsupportedRepo(Exception):
+    """Raised when the repository layout is not understood"""
+
+    pass
+
+
+class RefReader:
+    """
+    Read-only view of the refs of the repository with worktree `local_path`
+    """
+
+    __slots__ = ["__git_dir", "__common_dir", "__packs"]
+
+    def __init__(self, local_path):
+        self.__packs = None
+        self.__git_dir = find_git_dir(local_path)
+        self.__common_dir = self.__git_dir
+        commondir_file = os.path.join(self.__git_dir, "commondir")
+        if os.path.isfile(commondir_file):
+            # Linked worktree: HEAD is per worktree, refs and objects are shared
+            commondir = _read_line(commondir_file)
+            self.__common_dir = os.path.normpath(
+                os.path.join(self.__git_dir, commondir)
+            )
+
+    def get_git_dir(self):
+        return self.__git_dir
+
+    def get_common_dir(self):
+        return self.__common_dir
+
+    def read_head(self):
+        """Return (oid, branch), branch is None for a detached HEAD"""
+        head = _read_line(os.path.join(self.__git_dir, "HEAD"))
+        if not head.startswith("ref: "):
+            return head, None
+        refname = head[5:]
+        if not refname.startswith("refs/heads/") or refname.endswith(".invalid"):
+            # e.g., the placeholder HEAD of a reftable repository
+            raise UnsupportedRepo(f"HEAD points to {refname}")
+        oid = self.read_refs().get(refname)
+        if oid is None:
+            raise UnsupportedRepo(f"{refname} does not exist")
+        return oid, refname[len("refs/heads/") :]
+
+    def read_refs(self):
+        """Return a dict {refname: oid} of all branches, remotes and tags"""
+        refs = {}
+        self.__read_packed_refs(refs)
+        self.__read_loose_refs(refs)
+        return refs
+
+    def head_refs(self, oid):
+        """
+        Return the refs pointing at commit oid (annotated tags are peeled),
+        in the order `git show -s --pretty=%D` lists them
+        """
+        refs = {}
+        peeled = {}
+        self.__read_packed_refs(refs, peeled)
+        loose = {}
+        self.__read_loose_refs(loose)
+        refs.update(loose)
+        result = []
+        for refname, ref_oid in refs.items():
+            if ref_oid == oid:
+                target = oid
+            elif refname in loose and refname.startswith("refs/tags/"):
+                # Loose tags are not peeled for us, they may be annotated
+                target = self.__peel(ref_oid)
+            elif refname in loose:
+                target = ref_oid
+            else:
+                target = peeled.get(refname, ref_oid)
+            if target == oid:
+                result.append(refname)
+        return sorted(result, reverse=True)
+
+    def get_version(self):
+        """Return (name, type, detached), same as GitRepository.get_version()"""
+        return self.describe_head()[1]
+
+    def describe_head(self):
+        """Return (oid, version, refs pointing at HEAD)"""
+        try:
+            return self.__describe_head()
+        except (OSError, ValueError, IndexError, zlib.error) as e:
+            # Corrupt or unexpected files, e.g., a ref being rewritten
+            raise UnsupportedRepo(str(e)) from e
+
+    def __describe_head(self):
+        if os.path.exists(os.path.join(self.__common_dir, "shallow")):
+            # git decorates grafted commits, leave that to git
+            raise UnsupportedRepo("shallow repository")
+        oid, branch = self.read_head()
+        head_refs = self.head_refs(oid)
+        if branch is not None:
+            version = MepoVersion(branch, "b", False)
+        elif not head_refs:
+            version = MepoVersion(oid, "h", True)
+        elif head_refs[0].startswith("refs/tags/"):
+            version = MepoVersion(decoration_name(head_refs[0]), "t", True)
+        else:
+            # The last decoration wins for branches
+            version = MepoVersion(decoration_name(head_refs[-1]), "b", True)
+        return oid, version, head_refs
+
+    def read_tree_oid(self, commit_oid):
+        """Return the oid of the tree of a commit"""
+        kind, body = self.__read_object(commit_oid, full=True)
+        if kind != b"commit" or not body.startswith(b"tree "):
+            raise UnsupportedRepo(f"{commit_oid} is not a commit")
+        return body[5 : body.index(b"\n")].decode()
+
+    def read_tree(self, tree_oid):
+        """Return the entries of a tree as a list of (mode, name, oid)"""
+        kind, body = self.__read_object(tree_oid, full=True)
+        if kind != b"tree":
+            raise UnsupportedRepo(f"{tree_oid} is not a tree")
+        entries = []
+        pos = 0
+        while pos < len(body):
+            space = body.index(b" ", pos)
+            end = body.index(b"\0", space)
+            mode = int(body[pos:space], 8)
+            name = os.fsdecode(body[space + 1 : end])
+            entries.append((mode, name, body[end + 1 : end + 21].hex()))
+            pos = end + 21
+        return entries
+
+    def count_stashes(self):
+        """Return the number of stash entries (the reflog of refs/stash)"""
+        stash_ref = os.path.join(self.__common_dir, "refs", "stash")
+        stash_log = os.path.join(self.__common_dir, "logs", "refs", "stash")
+        if os.path.isfile(stash_log):
+            with open(stash_log, "rb") as fin:
+                return sum(1 for line in fin if line.strip())
+        if os.path.exists(stash_ref):
+            raise UnsupportedRepo("refs/stash has no reflog")
+        return 0
+
+    def __read_packed_refs(self, refs, peeled=None):
+        """Add the packed refs to refs and, if given, their peeled oids to peeled"""
+        packed_refs = os.path.join(self.__common_dir, "packed-refs")
+        if not os.path.isfile(packed_refs):
+            return
+        tags_peeled = False
+        refname = None
+        with open(packed_refs, "r") as fin:
+            for line in fin:
+                line = line.rstrip("\n")
+                if line.startswith("#"):
+                    traits = line.split(":", 1)[-1].split()
+                    tags_peeled = "peeled" in traits or "fully-peeled" in traits
+                elif line.startswith("^"):
+                    if peeled is not None:
+                        peeled[refname] = line[1:]
+                elif line:
+                    ref_oid, refname = line.split(" ", 1)
+                    if refname.startswith(DECORATED_REFS):
+                        refs[refname] = ref_oid
+        if peeled is None:
+            return
+        if not tags_peeled and any(x.startswith("refs/tags/") for x in refs):
+            # Cannot tell annotated tags from lightweight ones
+            raise UnsupportedRepo("packed-refs is not peeled")
+
+    def __read_loose_refs(self, refs):
+        symbolic = {}
+        for namespace in DECORATED_REFS:
+            top = os.path.join(self.__common_dir, namespace)
+            for dirpath, _, filenames in os.walk(top):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    refname = os.path.relpath(path, self.__common_dir)
+                    refname = refname.replace(os.sep, "/")
+                    if refname.endswith(".lock"):
+                        continue
+                    content = _read_line(path)
+                    if content.startswith("ref: "):
+                        symbolic[refname] = content[5:]
+                    else:
+                        refs[refname] = content
+        # e.g., refs/remotes/origin/HEAD -> refs/remotes/origin/main
+        for refname, target in symbolic.items():
+            if target in refs:
+                refs[refname] = refs[target]
+
+    def __peel(self, oid):
+        """Return the commit an (annotated tag) object points to"""
+        for _ in range(8):  # nested tags
+            kind, body = self.__read_object(oid)
+            if kind != b"tag":
+                return oid
+            oid = body.split(b"\n", 1)[0].split()[1].decode()
+        raise UnsupportedRepo(f"tag {oid} is nested too deeply")
+
+    def __read_object(self, oid, full=False):
+        """Return (type, body), unless full the body may be truncated or empty"""
+        path = os.path.join(self.__common_dir, "objects", oid[:2], oid[2:])
+        try:
+            with open(path, "rb") as fin:
+                data = zlib.decompressobj().decompress(fin.read(), 0 if full else 4096)
+        except FileNotFoundError:
+            return self.__read_packed_object(oid, full)
+        header, body = data.split(b"\0", 1)
+        return header.split()[0], body
+
+    def __read_packed_object(self, oid, full):
+        if self.__packs is None:
+            pattern = os.path.join(self.__common_dir, "objects", "pack", "*.idx")
+            self.__packs = [PackIndex(x) for x in glob.glob(pattern)]
+        for pack in self.__packs:
+            found = pack.read_object(oid, full)
+            if found is not None:
+                return found
+        # e.g., objects borrowed from alternates
+        raise UnsupportedRepo(f"object {oid} not found")
+
+
+class PackIndex:
+    """Minimal reader of a version 2 pack index (SHA-1) and its pack"""
+
+    __slots__ = ["__idx_path", "__data"]
+
+    # Object types in a pack entry header
+    TYPES = {1: b"commit", 2: b"tree", 3: b"blob", 4: b"tag"}
+
+    def __init__(self, idx_path):
+        self.__idx_path = idx_path
+        with open(idx_path, "rb") as fin:
+            self.__data = fin.read()
+        if self.__data[:8] != b"\377tOc\0\0\0\2":
+            raise UnsupportedRepo(f"{idx_path} is not a version 2 pack index")
+
+    def __fanout(self, i):
+        """Number of objects whose first byte is <= i"""
+        if i < 0:
+            return 0
+        return struct.unpack_from(">I", self.__data, 8 + 4 * i)[0]
+
+    def find_offset(self, oid):
+        """Return the offset of oid in the pack, None if not in the pack"""
+        if len(oid) != 40:
+            raise UnsupportedRepo("only SHA-1 repositories are supported")
+        key = bytes.fromhex(oid)
+        count = self.__fanout(255)
+        names = 8 + 256 * 4
+        lo, hi = self.__fanout(key[0] - 1), self.__fanout(key[0])
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self.__data[names + 20 * mid : names + 20 * mid + 20]
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                # Skip the names and the CRCs to get to the offsets
+                offsets = names + 24 * count
+                offset = struct.unpack_from(">I", self.__data, offsets + 4 * mid)[0]
+                if offset & 0x80000000:
+                    large = offsets + 4 * count + 8 * (offset & 0x7FFFFFFF)
+                    offset = struct.unpack_from(">Q", self.__data, large)[0]
+                return offset
+        return None
+
+    def read_object(self, oid, full=False):
+        """
+        Return (type, body) of oid, None if not in the pack. Unless full, the
+        body is only read for tags and deltified objects
+        """
+        offset = self.find_offset(oid)
+        if offset is None:
+            return None
+        pack_path = self.__idx_path[: -len(".idx")] + ".pack"
+        with open(pack_path, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as pack:
+                return self.__read_entry(pack, offset, full)
+
+    def __read_entry(self, pack, offset, full, depth=0):
+        if depth > 50:
+            raise UnsupportedRepo("delta chain is too long")
+        entry_offset = offset
+        byte = pack[offset]
+        kind = (byte >> 4) & 0x7
+        size = byte & 0xF
+        shift = 4
+        offset += 1
+        while byte & 0x80:
+            byte = pack[offset]
+            size |= (byte & 0x7F) << shift
+            shift += 7
+            offset += 1
+        if kind in self.TYPES:
+            if not full and kind != 4:
+                # Only the type is needed to peel commits and trees
+                return self.TYPES[kind], b""
+            return self.TYPES[kind], _inflate(pack, offset, size)
+        if kind == 6:  # OFS_DELTA: base at a negative offset
+            byte = pack[offset]
+            offset += 1
+            distance = byte & 0x7F
+            while byte & 0x80:
+                byte = pack[offset]
+                offset += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+            base_offset = entry_offset - distance
+        elif kind == 7:  # REF_DELTA: base named by its oid
+            base_offset = self.find_offset(pack[offset : offset + 20].hex())
+            offset += 20
+            if base_offset is None:
+                raise UnsupportedRepo("delta base is in another pack")
+        else:
+            raise UnsupportedRepo(f"unknown pack entry type {kind}")
+        base_kind, base = self.__read_entry(pack, base_offset, True, depth + 1)
+        return base_kind, _apply_delta(base, _inflate(pack, offset, size))
+
+
+def _inflate(pack, offset, size):
+    """Decompress `size` bytes of zlib data starting at offset"""
+    decompressor = zlib.decompressobj()
+    output = b""
+    while len(output) < size and not decompressor.eof:
+        output += decompressor.decompress(pack[offset : offset + 65536])
+        offset += 65536
+    return output
+
+
+def _apply_delta(base, delta):
+    """Rebuild an object from its base and a git delta"""
+    i = 0
+    for _ in range(2):  # skip the base and result sizes
+        while delta[i] & 0x80:
+            i += 1
+        i += 1
+    output = bytearray()
+    while i < len(delta):
+        op = delta[i]
+        i += 1
+        if op & 0x80:  # copy from base
+            start = size = 0
+            for k in range(4):
+                if op & (1 << k):
+                    start |= delta[i] << (8 * k)
+                    i += 1
+            for k in range(3):
+                if op & (1 << (4 + k)):
+                    size |= delta[i] << (8 * k)
+                    i += 1
+            output += base[start : start + (size or 0x10000)]
+        elif op:  # insert literal data
+            output += delta[i : i + op]
+            i += op
+        else:
+            raise UnsupportedRepo("invalid delta")
+    return bytes(output)
+
+
+def find_git_dir(local_path):
+    """Return the git dir of the worktree at local_path (follows gitdir: files)"""
+    dotgit = os.path.join(local_path, ".git")
+    if os.path.isdir(dotgit):
+        return dotgit
+    if os.path.isfile(dotgit):
+        # Submodules and linked worktrees
+        content = _read_line(dotgit)
+        if content.startswith("gitdir: "):
+            return os.path.normpath(os.path.join(local_path, content[8:]))
+    raise UnsupportedRepo(f"no git dir found in {local_path}")
+
+
+def decoration_name(refname):
+    """refs/tags/v1.0 -> v1.0, refs/remotes/origin/main -> origin/main"""
+    for prefix in DECORATED_REFS:
+        if refname.startswith(prefix):
+            return refname[len(prefix) :]
+    return refname
+
+
+def _read_line(path):
+    with open(path, "r") as fin:
+        return fin.readline().strip()
@@ -0,0 +1,49 @@
+"""
+Journal of the clone of a fixture, in .mepo/clone-journal.json
+
+Records the last phase each component reached (see PHASES), so that
+`mepo clone --resume` can skip the components that are done and finish
+the others
+"""
+
+import os
+import json
+import threading
+
+JOURNAL_FILE_NAME = "clone-journal.json"
+
+# Phases of the clone of a component, in order. A component is "started"
+# as soon as mepo begins cloning it, so its directory is mepo's to remove
+PHASES = ["started", "cloned", "sparsified", "checked-out"]
+
+
+class CloneJournal:
+    """{component name: phase}, written to disk at every change"""
+
+    __slots__ = ["__path", "__phases", "__lock"]
+
+    def __init__(self, state_dir):
+        self.__path = os.path.join(state_dir, JOURNAL_FILE_NAME)
+        self.__phases = {}
+        self.__lock = threading.Lock()
+        if os.path.isfile(self.__path):
+            with open(self.__path, "r") as fin:
+                self.__phases = json.load(fin)
+
+    def get(self, comp_name):
+        """Last phase reached by the component, None if not started"""
+        return self.__phases.get(comp_name)
+
+    def is_done(self, comp_name):
+        return self.get(comp_name) == PHASES[-1]
+
+    def record(self, comp_name, phase):
+        if phase not in PHASES:
+            raise ValueError(f"Unknown clone phase [{phase}]")
+        # Components are cloned concurrently
+        with self.__lock:
+            self.__phases[comp_name] = phase
+            tmp_path = f"{self.__path}.tmp"
+            with open(tmp_path, "w") as fout:
+                json.dump(self.__phases, fout, indent=1)
+            os.replace(tmp_path, self.__path)
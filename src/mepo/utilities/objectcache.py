@@ -0,0 +1,185 @@
+"""
+Shared cache of git objects for clones
+
+Enabled with a [cache] section in .mepoconfig (see etc/mepoconfig-example).
+The cache directory holds one bare mirror per remote URL. Before a
+component is cloned, its mirror is created or fetched, and the clone
+borrows objects from it (`git clone --reference-if-able`), so a second
+fixture of the same components costs next to no network traffic. With
+`mode = dissociate` the clone copies the objects it needs and does not
+depend on the cache afterwards
+
+Since clones may borrow any object a mirror ever had, mirrors never lose
+objects: they are fetched without pruning refs, and gc of a mirror neither
+runs automatically nor prunes unreachable objects (see MIRROR_CONFIG), so
+a force-push or a deleted branch upstream cannot break a clone
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import subprocess as sp
+
+from . import mepoconfig
+from . import shellcmd
+
+MODES = ["reference", "dissociate"]
+
+# Touched each time a mirror is used, see prune()
+LAST_USED_FILE = "mepo-last-used"
+
+# Set in each mirror, so that no gc deletes objects clones borrow
+MIRROR_CONFIG = {"gc.auto": "0", "gc.pruneExpire": "never"}
+
+
+def get_cache_dir():
+    """Cache directory from .mepoconfig ([cache] dir), None if not set"""
+    if not mepoconfig.has_option("cache", "dir"):
+        return None
+    return os.path.abspath(os.path.expanduser(mepoconfig.get("cache", "dir")))
+
+
+def get_mode():
+    mode = "reference"
+    if mepoconfig.has_option("cache", "mode"):
+        mode = mepoconfig.get("cache", "mode")
+        if mode not in MODES:
+            raise ValueError(f"Invalid cache mode [{mode}] in .mepoconfig")
+    return mode
+
+
+def mirror_path(cache_dir, url):
+    """
+    Directory of the mirror of url, e.g., MAPL-5d41402abc4b.git, the same
+    with or without a trailing .git or /
+    """
+    url = normalize_url(url)
+    stem = re.sub(r"[^\w.-]", "_", url.rsplit("/", 1)[-1].rsplit(":", 1)[-1])
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{digest}.git")
+
+
+def normalize_url(url):
+    url = url.rstrip("/")
+    return url[: -len(".git")] if url.endswith(".git") else url
+
+
+def reference_for(url):
+    """
+    Create or update the mirror of url and return the options to pass to
+    `git clone`, empty if there is no cache or the mirror is unusable
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return []
+    mode = get_mode()
+    try:
+        path = update_mirror(cache_dir, url)
+    except sp.CalledProcessError:
+        # shellcmd printed git's error, clone from the remote alone
+        print(f"Cache of {url} could not be updated, not using it")
+        return []
+    options = ["--reference-if-able", path]
+    if mode == "dissociate":
+        options.append("--dissociate")
+    return options
+
+
+def update_mirror(cache_dir, url):
+    """Fetch into the mirror of url (cloning it the first time), return its path"""
+    path = mirror_path(cache_dir, url)
+    if os.path.isdir(path):
+        # --no-prune, whatever fetch.prune says: keep what clones may borrow
+        shellcmd.run(["git", "-C", path, "fetch", "--quiet", "--no-prune"])
+    else:
+        # Clone next to it and rename, so that a mirror is always complete
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shellcmd.run(["git", "clone", "--quiet", "--mirror", url, tmp_path])
+        for key, value in MIRROR_CONFIG.items():
+            shellcmd.run(["git", "-C", tmp_path, "config", key, value])
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another mepo created it in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    _touch(os.path.join(path, LAST_USED_FILE))
+    return path
+
+
+def list_mirrors(cache_dir):
+    """Return [(path, url, size in bytes, last used time)] of the mirrors"""
+    mirrors = []
+    if not os.path.isdir(cache_dir):
+        return mirrors
+    for name in sorted(os.listdir(cache_dir)):
+        path = os.path.join(cache_dir, name)
+        if not name.endswith(".git") or not os.path.isdir(path):
+            continue
+        url = _get_url(path)
+        mirrors.append((path, url, _disk_usage(path), _last_used(path)))
+    return mirrors
+
+
+def prune(cache_dir, days, dry_run=False):
+    """
+    Remove the mirrors not used for `days` days and leftovers of
+    interrupted clones. Return the removed paths
+
+    Clones made with mode = reference borrow objects from their mirror, so
+    they break if it is removed (`git repack -a -d` in a clone makes it
+    independent)
+    """
+    removed = []
+    if not os.path.isdir(cache_dir):
+        return removed
+    cutoff = time.time() - days * 86400
+    for name in sorted(os.listdir(cache_dir)):
+        path = os.path.join(cache_dir, name)
+        if name.endswith(".tmp"):
+            stale = os.path.getmtime(path) < time.time() - 86400
+        elif name.endswith(".git"):
+            stale = _last_used(path) < cutoff
+        else:
+            continue
+        if stale:
+            if not dry_run:
+                shutil.rmtree(path)
+            removed.append(path)
+    return removed
+
+
+def _get_url(path):
+    result = sp.run(
+        ["git", "-C", path, "config", "--get", "remote.origin.url"],
+        stdout=sp.PIPE,
+        stderr=sp.DEVNULL,
+        universal_newlines=True,
+    )
+    return result.stdout.strip() or None
+
+
+def _touch(path):
+    with open(path, "a"):
+        os.utime(path)
+
+
+def _last_used(path):
+    try:
+        return os.path.getmtime(os.path.join(path, LAST_USED_FILE))
+    except OSError:
+        return os.path.getmtime(path)
+
+
+def _disk_usage(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
@@ -0,0 +1,301 @@
+"""
+Progress of the clones of `mepo clone`
+
+CloneProgress is fed the `--progress` lines of each git clone. On a
+terminal, it keeps a live view on stderr with the objects and bytes each
+in-flight clone received, its transfer rate and ETA, and the same in total.
+At the end, print_summary() prints the time, bytes received and size on
+disk of each clone
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+
+# e.g., "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00 MiB/s"
+_PROGRESS_LINE = re.compile(
+    r"^(?P<stage>[A-Z][a-z ]+): +(?P<percent>\d+)% \((?P<current>\d+)/(?P<total>\d+)\)"
+    r"(?:, (?P<size>[\d.]+) (?P<unit>bytes|[KMGT]iB))?"
+    r"(?: \| (?P<rate>[\d.]+) (?P<rate_unit>bytes|[KMGT]iB)/s)?"
+)
+_UNITS = {"bytes": 1, "KiB": 2**10, "MiB": 2**20, "GiB": 2**30, "TiB": 2**40}
+
+# Redraws of the live view per second, at most
+_REFRESH_RATE = 10
+
+
+def parse_line(line):
+    """
+    Return (stage, percent, current, total, bytes, bytes per second) of a
+    git progress line (bytes and rate are None if not given), None if line
+    is not one
+    """
+    match = _PROGRESS_LINE.match(line)
+    if match is None:
+        return None
+    size = rate = None
+    if match["size"] is not None:
+        size = float(match["size"]) * _UNITS[match["unit"]]
+    if match["rate"] is not None:
+        rate = float(match["rate"]) * _UNITS[match["rate_unit"]]
+    return (
+        match["stage"],
+        int(match["percent"]),
+        int(match["current"]),
+        int(match["total"]),
+        size,
+        rate,
+    )
+
+
+class _Clone:
+
+    __slots__ = [
+        "start",
+        "end",
+        "stage",
+        "stage_start",
+        "percent",
+        "objects",
+        "total_objects",
+        "received",
+        "rate",
+        "size",
+    ]
+
+    def __init__(self):
+        self.start = time.time()
+        self.end = None
+        self.stage = "Starting"
+        self.stage_start = self.start
+        self.percent = 0
+        self.objects = 0
+        self.total_objects = None
+        self.received = None  # not reported by git for local clones
+        self.rate = None
+        self.size = None
+
+    def fraction(self):
+        """Rough fraction of the clone that is done"""
+        if self.end is not None:
+            return 1.0
+        if self.stage == "Receiving objects":
+            return 0.8 * self.percent / 100
+        if self.stage in ("Resolving deltas", "Updating files"):
+            return 0.8 + 0.1 * self.percent / 100
+        return 0.0
+
+    def eta(self, now):
+        """Seconds left in the current stage, None if unknown"""
+        if not 0 < self.percent < 100:
+            return None
+        return (now - self.stage_start) * (100 - self.percent) / self.percent
+
+
+class CloneProgress:
+    """Thread-safe record of the clones of a `mepo clone`"""
+
+    __slots__ = ["__names", "__clones", "__lock", "__stream", "__drawn", "__last_draw"]
+
+    def __init__(self, names, stream=None):
+        self.__names = list(names)
+        self.__clones = {}
+        self.__lock = threading.Lock()
+        self.__stream = stream or sys.stderr
+        self.__drawn = None  # lines of the live view, None if not live
+        self.__last_draw = 0.0
+
+    def start(self, name):
+        with self.__lock:
+            self.__clones[name] = _Clone()
+            self.__draw()
+
+    def update(self, name, line):
+        """Record a progress line of git for the clone of name"""
+        parsed = parse_line(line)
+        if parsed is None:
+            return
+        stage, percent, current, total, size, rate = parsed
+        with self.__lock:
+            clone = self.__clones[name]
+            if stage != clone.stage:
+                clone.stage = stage
+                clone.stage_start = time.time()
+            clone.percent = percent
+            if stage == "Receiving objects":
+                clone.objects, clone.total_objects = current, total
+                if size is not None:
+                    clone.received = size
+                if rate is not None:
+                    clone.rate = rate
+            if time.time() - self.__last_draw > 1 / _REFRESH_RATE:
+                self.__draw()
+
+    def skip(self, name):
+        """name needs no clone after all (mepo clone --resume)"""
+        with self.__lock:
+            self.__names.remove(name)
+
+    def finish(self, name, local_path=None):
+        """The clone of name into local_path is done, failed if None"""
+        size = None
+        if local_path is not None:
+            size = _disk_usage(os.path.join(local_path, ".git"))
+        with self.__lock:
+            clone = self.__clones[name]
+            clone.end = time.time()
+            clone.size = size
+            self.__draw()
+
+    @contextmanager
+    def live(self):
+        """
+        Keep the live view at the bottom of the terminal while in the block,
+        whatever is printed to stdout or stderr goes above it
+        """
+        if not self.__stream.isatty():
+            yield
+            return
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = _AboveLiveView(stdout, self)
+        sys.stderr = _AboveLiveView(stderr, self)
+        with self.__lock:
+            self.__drawn = 0
+            self.__draw()
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__clear()
+                self.__drawn = None
+            sys.stdout, sys.stderr = stdout, stderr
+
+    def write_above(self, stdout, text):
+        with self.__lock:
+            self.__clear()
+            stdout.write(text)
+            stdout.flush()
+            self.__draw()
+
+    def print_summary(self):
+        """Print time, bytes received and disk size of each successful clone"""
+        rows = [
+            (name, self.__clones[name])
+            for name in self.__names
+            if name in self.__clones and self.__clones[name].size is not None
+        ]
+        if not rows:
+            return
+        width = max(len("Component"), max(len(name) for name, _ in rows))
+        print(
+            f"\n{'Component':<{width}}  {'Time (s)':>8}  {'Received':>10}  {'On disk':>10}"
+        )
+        for name, clone in sorted(rows, key=lambda x: x[1].start - x[1].end):
+            print(
+                f"{name:<{width}}  {clone.end - clone.start:>8.1f}  "
+                f"{_format_bytes(clone.received):>10}  {_format_bytes(clone.size):>10}"
+            )
+        wall = max(x.end for _, x in rows) - min(x.start for _, x in rows)
+        received = sum(x.received or 0 for _, x in rows)
+        size = sum(x.size for _, x in rows)
+        print(
+            f"{'Total':<{width}}  {wall:>8.1f}  "
+            f"{_format_bytes(received):>10}  {_format_bytes(size):>10}"
+        )
+
+    def __lines(self):
+        now = time.time()
+        clones = self.__clones
+        in_flight = [x for x in self.__names if x in clones and clones[x].end is None]
+        width = max([len(x) for x in in_flight] + [len("Total")])
+        lines = []
+        for name in in_flight:
+            clone = clones[name]
+            line = f"{name:<{width}}  {clone.stage:<17} {clone.percent:>3}%"
+            if clone.total_objects:
+                line += f"  {clone.objects}/{clone.total_objects} objects"
+            line += f"  {_format_bytes(clone.received)}"
+            if clone.rate is not None:
+                line += f"  {_format_bytes(clone.rate)}/s"
+            line += f"  ETA {_format_seconds(clone.eta(now))}"
+            lines.append(line)
+        done = sum(x.end is not None for x in clones.values())
+        progress = sum(x.fraction() for x in clones.values())
+        start = min([x.start for x in clones.values()], default=now)
+        eta = None
+        if progress > 0:
+            eta = (now - start) * (len(self.__names) - progress) / progress
+        received = sum(x.received or 0 for x in clones.values())
+        rate = sum(x.rate or 0 for x in clones.values() if x.end is None)
+        lines.append(
+            f"{'Total':<{width}}  {done}/{len(self.__names)} cloned, "
+            f"{len(in_flight)} in flight  {_format_bytes(received)}  "
+            f"{_format_bytes(rate)}/s  ETA {_format_seconds(eta)}"
+        )
+        columns = shutil.get_terminal_size().columns
+        return [x[: columns - 1] for x in lines]
+
+    def __draw(self):
+        if self.__drawn is None:
+            return
+        self.__clear()
+        lines = self.__lines()
+        self.__stream.write("\n".join(lines) + "\n")
+        self.__stream.flush()
+        self.__drawn = len(lines)
+        self.__last_draw = time.time()
+
+    def __clear(self):
+        if self.__drawn:
+            # Up to the first line of the view and erase to the end
+            self.__stream.write(f"\x1b[{self.__drawn}F\x1b[J")
+            self.__drawn = 0
+
+
+class _AboveLiveView:
+    """sys.stdout or sys.stderr stand-in that prints above the live view"""
+
+    def __init__(self, stdout, progress):
+        self.__stdout = stdout
+        self.__progress = progress
+
+    def write(self, text):
+        self.__progress.write_above(self.__stdout, text)
+        return len(text)
+
+    def __getattr__(self, name):
+        return getattr(self.__stdout, name)
+
+
+def _format_bytes(size):
+    if size is None:
+        return "-"
+    for unit in ["bytes", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "-:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _disk_usage(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
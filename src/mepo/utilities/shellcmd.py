@@ -1,13 +1,20 @@
+import re
+import asyncio
+import threading
 import subprocess as sp
 
+from . import trace
+
 
 def run(cmd, output=None, stdout=None, status=None):
+    start_time = trace.now()
     result = sp.run(
         cmd,
         stdout=sp.PIPE,
         stderr=sp.PIPE,
         universal_newlines=True,  # result byte sequence -> string
     )
+    trace.record(cmd, start_time, result.returncode)
 
     if status:
         return result.returncode
@@ -19,3 +26,127 @@ def run(cmd, output=None, stdout=None, status=None):
         return result.stdout
     if output:
         return result.stdout + result.stderr
+
+
+def stream(cmd):
+    """
+    Streaming variant of run(cmd, output=True): yield the lines of stdout
+    (without line endings) as the command produces them, then those of
+    stderr. On failure, stderr is printed and CalledProcessError raised
+    """
+    start_time = trace.now()
+    proc = sp.Popen(
+        cmd,
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+        universal_newlines=True,
+    )
+    # Drained on the side, so that a chatty stderr cannot block git
+    err = []
+    reader = threading.Thread(target=lambda: err.append(proc.stderr.read()))
+    reader.start()
+    try:
+        for line in proc.stdout:
+            yield line.rstrip("\n")
+        proc.wait()
+    finally:
+        if proc.returncode is None:
+            # The caller stopped early
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        reader.join()
+        proc.stderr.close()
+        trace.record(cmd, start_time, proc.returncode)
+    stderr = "".join(err)
+    if proc.returncode != 0:
+        print(stderr)
+        raise sp.CalledProcessError(proc.returncode, cmd, None, stderr)
+    yield from stderr.splitlines()
+
+
+def run_progress(cmd, on_line):
+    """
+    run(cmd) for a command with progress output on stderr (e.g., git with
+    --progress): on_line(line) is called with each line or carriage-return
+    update as it comes. On failure, stderr (without the progress updates)
+    is printed and CalledProcessError raised
+    """
+    start_time = trace.now()
+    proc = sp.Popen(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
+    messages = []
+    try:
+        pending = b""
+        for chunk in iter(lambda: proc.stderr.read1(4096), b""):
+            pending += chunk
+            *lines, pending = re.split(rb"[\r\n]", pending)
+            for line in lines:
+                _on_progress_line(line.decode(errors="replace"), on_line, messages)
+        _on_progress_line(pending.decode(errors="replace"), on_line, messages)
+        proc.wait()
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            proc.wait()
+        proc.stderr.close()
+        trace.record(cmd, start_time, proc.returncode)
+    if proc.returncode != 0:
+        stderr = "\n".join(messages)
+        print(stderr)
+        raise sp.CalledProcessError(proc.returncode, cmd, None, stderr)
+
+
+def _on_progress_line(line, on_line, messages):
+    line = line.rstrip()
+    if not line:
+        return
+    if not _PROGRESS.search(line) and (not messages or messages[-1] != line):
+        messages.append(line)
+    on_line(line)
+
+
+# Progress updates of git, e.g., "Receiving objects:  45% (450/1000)"
+_PROGRESS = re.compile(r": +\d+% \(|, done\.$")
+
+
+def rstrip_lines(lines):
+    """
+    Lazy version of "\n".join(lines).rstrip().split("\n") that yields
+    nothing instead of a single empty string
+    """
+    pending = []
+    for line in lines:
+        if line.strip():
+            yield from pending
+            pending = [line]
+        else:
+            pending.append(line)  # blank lines wait for the next text
+    if pending and pending[0].strip():
+        yield pending[0].rstrip()
+
+
+async def run_async(cmd, output=None, stdout=None, status=None):
+    """asyncio twin of run()"""
+    start_time = trace.now()
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    out, err = await proc.communicate()
+    trace.record(cmd, start_time, proc.returncode)
+    out, err = _decode(out), _decode(err)
+
+    if status:
+        return proc.returncode
+    elif proc.returncode != 0:
+        print(err)
+        raise sp.CalledProcessError(proc.returncode, cmd, out, err)
+
+    if stdout:
+        return out
+    if output:
+        return out + err
+
+
+def _decode(data):
+    # Same newline translation as universal_newlines
+    return data.decode().replace("\r\n", "\n").replace("\r", "\n")
@@ -0,0 +1,174 @@
+"""
+Opt-in tracing of the processes mepo spawns
+
+Enabled with `mepo --trace FILE ...` or the MEPO_TRACE environment variable.
+Every command run through shellcmd is recorded with its start time,
+duration, return code, working directory and component. At exit, FILE gets
+a Chrome trace-event JSON (open it in chrome://tracing or ui.perfetto.dev)
+and a summary table is printed to stderr
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import atexit
+
+# Environment variable that enables tracing, the value is the trace file
+TRACE_ENV_VAR = "MEPO_TRACE"
+
+_trace_file = None
+_owner_pid = None
+_events = []
+
+
+def start(trace_file):
+    """Start recording, the trace is written when mepo exits"""
+    global _trace_file, _owner_pid
+    _trace_file = os.path.abspath(trace_file)
+    _owner_pid = os.getpid()
+    _events.clear()
+    # Registered early, so that it runs after the other exit handlers
+    # (atexit is last in, first out) and still sees their processes
+    atexit.register(finish)
+
+
+def enabled():
+    return _trace_file is not None
+
+
+def now():
+    """Clock used for start times, in seconds"""
+    return time.time()
+
+
+def record(cmd, start_time, returncode, cwd=None):
+    """Record the command `cmd` (list of args) that ran from start_time to now"""
+    if _trace_file is None:
+        return
+    duration = now() - start_time
+    event = {
+        "cmd": cmd,
+        "start": start_time,
+        "duration": duration,
+        "returncode": returncode,
+        "cwd": os.path.normpath(_get_cwd(cmd, cwd)),
+        "pid": os.getpid(),
+    }
+    if os.getpid() == _owner_pid:
+        _events.append(event)
+    else:
+        # Worker of a multiprocessing pool, the parent merges these
+        with open(f"{_trace_file}.{os.getpid()}.part", "a") as fout:
+            fout.write(json.dumps(event) + "\n")
+
+
+def finish():
+    """Write the trace file and print the summary (once)"""
+    global _trace_file
+    if _trace_file is None or os.getpid() != _owner_pid:
+        return
+    trace_file = _trace_file
+    _trace_file = None
+    events = list(_events)
+    for part in glob.glob(f"{glob.escape(trace_file)}.*.part"):
+        with open(part, "r") as fin:
+            events.extend(json.loads(line) for line in fin if line.strip())
+        os.remove(part)
+    events.sort(key=lambda x: x["start"])
+    names = _component_names()
+    for event in events:
+        event["component"] = names.get(event["cwd"], event["cwd"])
+    with open(trace_file, "w") as fout:
+        json.dump(_to_trace_events(events), fout, indent=1)
+    print_summary(events, trace_file)
+
+
+def command_name(cmd):
+    """Name of a command, e.g., "git status" for git -C dir -c x=y status -s"""
+    name = [os.path.basename(cmd[0])]
+    args = iter(cmd[1:])
+    if name[0] == "git":
+        for arg in args:
+            if arg in ("-C", "-c"):
+                next(args, None)
+            elif not arg.startswith("-"):
+                name.append(arg)
+                break
+    return " ".join(name)
+
+
+def print_summary(events, trace_file):
+    total = sum(x["duration"] for x in events)
+    out = sys.stderr
+    print(
+        f"mepo trace: {len(events)} processes, {total:.3f} s, written to {trace_file}",
+        file=out,
+    )
+    for title, key in [("Command", "command"), ("Component", "component")]:
+        rows = {}
+        for event in events:
+            name = command_name(event["cmd"]) if key == "command" else event[key]
+            spawns, seconds = rows.get(name, (0, 0.0))
+            rows[name] = (spawns + 1, seconds + event["duration"])
+        width = max([len(title)] + [len(x) for x in rows])
+        print(f"\n{title:<{width}}  {'Spawns':>6}  {'Total (s)':>9}", file=out)
+        for name, (spawns, seconds) in sorted(rows.items(), key=lambda x: -x[1][1]):
+            print(f"{name:<{width}}  {spawns:>6}  {seconds:>9.3f}", file=out)
+
+
+def _get_cwd(cmd, cwd):
+    """Directory a command works in: git's -C if given"""
+    if len(cmd) > 2 and cmd[0] == "git" and cmd[1] == "-C":
+        return cmd[2]
+    return cwd or os.getcwd()
+
+
+def _component_names():
+    """Return {absolute local path: component name}, empty outside a fixture"""
+    from ..state import MepoState
+
+    try:
+        if not MepoState.state_exists():
+            return {}
+        return {os.path.normpath(x.local): x.name for x in MepoState.read_state()}
+    except Exception:
+        return {}
+
+
+def _to_trace_events(events):
+    """Complete ("X") events, one lane (thread) per component"""
+    lanes = {}
+    trace_events = []
+    for event in events:
+        pid = event["pid"]
+        lane = lanes.setdefault((pid, event["component"]), len(lanes) + 1)
+        trace_events.append(
+            {
+                "name": command_name(event["cmd"]),
+                "cat": "process",
+                "ph": "X",
+                "ts": round(event["start"] * 1e6),
+                "dur": round(event["duration"] * 1e6),
+                "pid": pid,
+                "tid": lane,
+                "args": {
+                    "cmd": " ".join(event["cmd"]),
+                    "cwd": event["cwd"],
+                    "component": event["component"],
+                    "returncode": event["returncode"],
+                },
+            }
+        )
+    for (pid, component), lane in lanes.items():
+        trace_events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": lane,
+                "args": {"name": component},
+            }
+        )
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
@@ -3,7 +3,7 @@ from collections import namedtuple
 MepoVersion = namedtuple("MepoVersion", ["name", "type", "detached"])
 
 
-def version_to_string(version, git=None):
+def version_to_string(version, git=None, short_oid=None):
     version_name = version[0]
     version_type = version[1]
     version_detached = version[2]
@@ -12,8 +12,9 @@ def version_to_string(version, git=None):
         # We remove the "origin/" from the internal detached branch name
         # for clarity in mepo status output
         version_name = version_name.replace("origin/", "")
-        if version_type == "b" and git:
-            cur_hash = git.rev_parse(short=True).strip()
+        if version_type == "b" and (git or short_oid):
+            # short_oid (e.g., from GitRepository.probe) saves a git call
+            cur_hash = short_oid or git.rev_parse(short=True).strip()
             s = f"({version_type}) {version_name} (DH, {cur_hash})"
         else:
             s = f"({version_type}) {version_name} (DH)"
@@ -22,7 +23,7 @@ def version_to_string(version, git=None):
     return s
 
 
-def sanitize_version_string(orig, curr, git):
+def sanitize_version_string(orig, curr, git, probe=None):
     """
     This routine tries to figure out if two tags are the same.
 
@@ -31,6 +32,9 @@ def sanitize_version_string(orig, curr, git):
     if that commit is also tagged with foo, then sometimes mepo
     will say that things have changed because it thinks it's on
     foo.
+
+    If a RepoProbe of the repository is passed in, the refs it
+    recorded at HEAD are used instead of calling git.
     """
 
     # The trick below only works on tags and hashes (I think), so
@@ -72,12 +76,15 @@ def sanitize_version_string(orig, curr, git):
     # Now if a type or hash...
     if orig_type_is_tag_or_hash and curr_type_is_tag_or_hash:
 
-        # Use rev-list to get the hash of the tag...
-        orig_rev = git.rev_list(orig_ver)
-        curr_rev = git.rev_list(curr_ver)
+        if probe is not None:
+            # curr is always at HEAD, so both point to HEAD or they differ
+            same_rev = probe.points_at(orig_ver) and probe.points_at(curr_ver)
+        else:
+            # Use rev-list to get the hash of the tag...
+            same_rev = git.rev_list(orig_ver) == git.rev_list(curr_ver)
 
         # If they are identical...
-        if orig_rev == curr_rev:
+        if same_rev:
 
             # Replace the curr version with the original to make
             # mepo happy...
@@ -0,0 +1,125 @@
+"""
+Time `mepo status` and `mepo restore-state` serially and with each parallel
+backend, on a fixture of local repositories
+
+    python tests/benchmark_status.py [--components 60] [--jobs 8] [--repeat 3]
+
+Not collected by pytest. The fixture is built in a temporary directory
+from bare repositories on disk, so no network is needed
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess as sp
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(THIS_DIR, "..", "src")
+
+
+def git(*args, cwd):
+    sp.run(["git", *args], cwd=cwd, check=True, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+
+
+def make_remote(tmpdir, name):
+    """Bare repository with a few commits, tag v1.0 and branch develop"""
+    work = os.path.join(tmpdir, "work", name)
+    os.makedirs(os.path.join(work, "src"))
+    git("init", "-q", "-b", "main", ".", cwd=work)
+    git("config", "user.email", "mepo@example.com", cwd=work)
+    git("config", "user.name", "mepo", cwd=work)
+    for i in range(20):
+        with open(os.path.join(work, "src", f"file{i}.txt"), "w") as fout:
+            fout.write(f"{name} {i}\n")
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "init", cwd=work)
+    git("tag", "v1.0", cwd=work)
+    git("checkout", "-q", "-b", "develop", cwd=work)
+    git("commit", "-q", "--allow-empty", "-m", "develop", cwd=work)
+    bare = os.path.join(tmpdir, "remotes", f"{name}.git")
+    git("clone", "-q", "--bare", work, bare, cwd=tmpdir)
+    shutil.rmtree(work)
+    return bare
+
+
+def make_fixture(tmpdir, ncomps):
+    make_remote(tmpdir, "fixture")
+    fixture = os.path.join(tmpdir, "fixture")
+    git(
+        "clone",
+        "-q",
+        os.path.join(tmpdir, "remotes", "fixture.git"),
+        fixture,
+        cwd=tmpdir,
+    )
+    lines = ["fixture:", "  fixture: true", "  develop: main", ""]
+    for i in range(ncomps):
+        name = f"comp{i:03d}"
+        make_remote(tmpdir, name)
+        lines += [
+            f"{name}:",
+            f"  local: ./src/@{name}",
+            f"  remote: ../{name}.git",
+            "  tag: v1.0",
+            "  develop: develop",
+            "",
+        ]
+    with open(os.path.join(fixture, "components.yaml"), "w") as fout:
+        fout.write("\n".join(lines))
+    mepo(["clone"], cwd=fixture)
+    # A few dirty components, so that status has something to report
+    for i in range(0, ncomps, 10):
+        with open(
+            os.path.join(fixture, "src", f"@comp{i:03d}", "new.txt"), "w"
+        ) as fout:
+            fout.write("new\n")
+    return fixture
+
+
+def mepo(args, cwd):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_DIR))
+    env.pop("MEPO_TRACE", None)
+    sp.run(
+        [sys.executable, "-m", "mepo", *args],
+        cwd=cwd,
+        env=env,
+        check=True,
+        stdout=sp.DEVNULL,
+    )
+
+
+def best_of(repeat, args, cwd):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mepo(args, cwd)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--components", type=int, default=60)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="mepo-benchmark-") as tmpdir:
+        print(f"Building a fixture with {args.components} components...")
+        fixture = make_fixture(tmpdir, args.components)
+        print(f"Best of {args.repeat}, {args.jobs} jobs\n")
+        print(f"{'Command':<16}  {'serial':>8}  {'thread':>8}  {'process':>8}")
+        for cmd in ["status", "restore-state"]:
+            row = [best_of(args.repeat, [cmd], fixture)]
+            for backend in ["thread", "process"]:
+                cmdline = ["-j", str(args.jobs), cmd, "--parallel"]
+                row.append(
+                    best_of(args.repeat, cmdline + ["--backend", backend], fixture)
+                )
+            print(f"{cmd:<16}  " + "  ".join(f"{x:>7.3f}s" for x in row))
+
+
+if __name__ == "__main__":
+    main()
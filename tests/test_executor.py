@@ -0,0 +1,108 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mepo.utilities import executor
+
+COMPS = [SimpleNamespace(name=f"comp{i}") for i in range(6)]
+
+
+def job(comp):
+    # The first components finish last
+    time.sleep(0.01 * (6 - int(comp.name[-1])))
+    print(f"{comp.name} line 1")
+    print(f"{comp.name} line 2")
+    return comp.name
+
+
+@pytest.mark.parametrize("jobs", [1, 3, 6])
+def test_run_in_order(jobs, capsys):
+    assert executor.run(COMPS, job, jobs) == [x.name for x in COMPS]
+    expected = "".join(f"{x.name} line 1\n{x.name} line 2\n" for x in COMPS)
+    assert capsys.readouterr().out == expected
+
+
+def test_run_process_backend(capsys):
+    assert executor.run(COMPS, job, 3, "process") == [x.name for x in COMPS]
+    expected = "".join(f"{x.name} line 1\n{x.name} line 2\n" for x in COMPS)
+    assert capsys.readouterr().out == expected
+
+
+def test_get_parallel_jobs(monkeypatch):
+    monkeypatch.setattr(executor.mepoconfig, "has_option", lambda *args: False)
+    monkeypatch.setattr(executor.os, "cpu_count", lambda: 12)
+    args = SimpleNamespace(jobs=None, parallel=False, backend="thread")
+    assert executor.get_parallel_jobs(args) == (1, "thread")
+    args = SimpleNamespace(jobs=None, parallel=True, backend="process")
+    assert executor.get_parallel_jobs(args) == (12, "process")
+    args = SimpleNamespace(jobs=4, parallel=True, backend="thread")
+    assert executor.get_parallel_jobs(args) == (4, "thread")
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_run_failures(jobs, capsys):
+    def failing_job(comp):
+        print(comp.name)
+        if comp.name in ("comp2", "comp4"):
+            raise RuntimeError(f"{comp.name} failed")
+
+    with pytest.raises(RuntimeError, match="comp2 failed"):
+        executor.run(COMPS, failing_job, jobs)
+    captured = capsys.readouterr()
+    # The other components still ran
+    assert captured.out == "".join(f"{x.name}\n" for x in COMPS)
+    assert "Failed in 2 of 6 components" in captured.err
+    assert "comp4: comp4 failed" in captured.err
+
+
+def test_run_async_in_order(capsys):
+    async def async_job(comp, git):
+        print(f"{comp.name} start")
+        await asyncio.sleep(0.01 * (6 - int(comp.name[-1])))
+        print(f"{comp.name} end")
+        return comp.name
+
+    comps = [SimpleNamespace(name=x.name, remote=None, local="/") for x in COMPS]
+    assert executor.run_async(comps, async_job, 6) == [x.name for x in COMPS]
+    expected = "".join(f"{x.name} start\n{x.name} end\n" for x in COMPS)
+    assert capsys.readouterr().out == expected
+
+
+def test_get_jobs(monkeypatch):
+    monkeypatch.setattr(executor.mepoconfig, "has_option", lambda *args: False)
+    assert executor.get_jobs(SimpleNamespace(jobs=8)) == 8
+    assert executor.get_jobs(SimpleNamespace(jobs=None)) == 1
+    assert executor.get_jobs(SimpleNamespace(), default=16) == 16
+    monkeypatch.setattr(executor.mepoconfig, "has_option", lambda *args: True)
+    monkeypatch.setattr(executor.mepoconfig, "get", lambda *args: "4")
+    assert executor.get_jobs(SimpleNamespace(jobs=None), default=16) == 4
+    assert executor.get_jobs(SimpleNamespace(jobs=2)) == 2
+    with pytest.raises(ValueError):
+        executor.get_jobs(SimpleNamespace(jobs=0))
+
+
+def test_run_nested(capsys):
+    # comp1 is in comp0, comp3 and comp4 in comp2, comp5 stands alone
+    locals_ = ["/a", "/a/@b", "/src/c", "/src/c/d/@e", "/src/c/@f", "/src/g"]
+    comps = [SimpleNamespace(name=f"comp{i}", local=x) for i, x in enumerate(locals_)]
+    assert executor.nesting_parents(comps) == [None, 0, None, 2, 2, None]
+    started = []
+
+    def nested_job(comp):
+        started.append(comp.name)
+        time.sleep(0.01 * (6 - int(comp.name[-1])))
+        print(comp.name)
+        if comp.name == "comp2":
+            raise RuntimeError("comp2 failed")
+
+    with pytest.raises(RuntimeError, match="comp2 failed"):
+        executor.run_nested(comps, nested_job, 4)
+    captured = capsys.readouterr()
+    # The children of comp2 were skipped, comp1 waited for comp0
+    assert captured.out == "comp0\ncomp1\ncomp2\ncomp5\n"
+    assert sorted(started) == ["comp0", "comp1", "comp2", "comp5"]
+    assert started.index("comp1") > started.index("comp0")
+    assert "Failed in 3 of 6 components" in captured.err
+    assert "comp3: skipped since comp2 failed" in captured.err
@@ -0,0 +1,345 @@
+import os
+import shlex
+import time
+from collections import namedtuple
+import subprocess as sp
+
+import pytest
+
+from mepo.git import GitRepository
+from mepo.git import CachedGitRepository
+from mepo.git import QueryCache
+from mepo.git import ObjectResolver
+from mepo.git import run_concurrently
+from mepo.utilities import shellcmd
+from mepo.utilities.gitrefs import RefReader
+from mepo.utilities.gitrefs import UnsupportedRepo
+from mepo.utilities.gitindex import IgnoreRules
+from mepo.utilities.gitindex import worktree_is_clean
+from mepo.utilities.version import MepoVersion
+from mepo.utilities.version import sanitize_version_string
+
+
+def git(repo, cmd):
+    output = sp.run(
+        ["git", "-C", str(repo)] + shlex.split(cmd),
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return output.stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Local repository with two commits, tags v1.0 (light) and v2.0 (annotated)"""
+    path = tmp_path / "repo"
+    sp.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    git(path, "config user.email mepo@example.com")
+    git(path, "config user.name mepo")
+    (path / "README").write_text("1\n")
+    git(path, "add README")
+    git(path, "commit -q -m one")
+    git(path, "tag v1.0")
+    (path / "README").write_text("2\n")
+    git(path, "commit -q -a -m two")
+    git(path, "tag -a v2.0 -m two")
+    git(path, "tag also-v2.0")
+    return path
+
+
+def test_probe_branch(repo, monkeypatch):
+    gitrepo = GitRepository(None, str(repo))
+    probe = git_probe(gitrepo, monkeypatch)
+    assert probe.version == MepoVersion("main", "b", False)
+    assert probe.oid == git(repo, "rev-parse HEAD")
+    assert probe.short_oid == git(repo, "rev-parse --short HEAD")
+    assert probe.num_stashes == 0
+    assert probe.entries == []
+    # Without git, short_oid is left out
+    refresh(repo)
+    assert gitrepo.probe() == probe._replace(short_oid=None)
+
+
+def test_probe_matches_get_version(repo):
+    gitrepo = GitRepository(None, str(repo))
+    for ref in ["v1.0", "v2.0", "main", "HEAD~1"]:
+        git(repo, f"checkout -q --detach {ref}")
+        for worktree in [True, False]:
+            probe = gitrepo.probe(worktree=worktree)
+            assert probe.version == gitrepo.get_version()
+            assert probe.oid == git(repo, "rev-parse HEAD")
+
+
+def test_probe_worktree(repo):
+    (repo / "README").write_text("3\n")
+    git(repo, "stash -q")
+    (repo / "README").write_text("4\n")
+    (repo / "new").write_text("new\n")
+    probe = GitRepository(None, str(repo)).probe()
+    assert probe.num_stashes == 1
+    assert [x.split()[-1] for x in probe.entries] == ["README", "new"]
+    probe = GitRepository(None, str(repo)).probe(worktree=False)
+    assert probe.num_stashes is None and probe.entries is None
+
+
+def test_probe_head_without_git(repo, monkeypatch):
+    gitrepo = GitRepository(None, str(repo))
+    for ref in ["v1.0", "v2.0", "main"]:
+        git(repo, f"checkout -q {ref}")
+        with_git = git_probe(gitrepo, monkeypatch, worktree=False)
+        with monkeypatch.context() as m:
+            m.setattr(shellcmd, "run", None)  # no git process
+            probe = gitrepo.probe(worktree=False)
+        assert probe == with_git._replace(short_oid=None)
+
+
+def test_sanitize_with_probe(repo):
+    gitrepo = GitRepository(None, str(repo))
+    git(repo, "checkout -q --detach v2.0")
+    probe = gitrepo.probe()
+    for orig in ["(t) v2.0 (DH)", "(t) also-v2.0 (DH)", "(t) v1.0 (DH)"]:
+        curr = f"(t) {probe.version.name} (DH)"
+        assert sanitize_version_string(
+            orig, curr, gitrepo, probe
+        ) == sanitize_version_string(orig, curr, gitrepo)
+
+
+def test_object_resolver(repo):
+    resolver = ObjectResolver.get(str(repo))
+    assert resolver is ObjectResolver.get(str(repo))
+    assert resolver.resolve("v2.0") == git(repo, "rev-parse v2.0")
+    assert resolver.resolve_commit("v2.0") == git(repo, "rev-list -n 1 v2.0")
+    assert resolver.resolve("does-not-exist") is None
+    assert resolver.exists("HEAD~1")
+    assert not resolver.exists("HEAD~2")
+    ObjectResolver.close_all()
+    # Restarts on demand after being shut down
+    assert ObjectResolver.get(str(repo)).exists("v1.0")
+
+
+def assert_ref_reader_matches_git(path):
+    gitrepo = GitRepository(None, str(path))
+    # The private fallback is the original `git show` based implementation
+    expected = gitrepo._GitRepository__get_version_from_git()
+    assert RefReader(str(path)).get_version() == expected
+
+
+def test_ref_reader(repo, tmp_path):
+    for packed in [False, True]:
+        if packed:
+            git(repo, "gc -q")
+            # Loose tag refs pointing at packed commits and tags
+            git(repo, "tag v1.0-light v1.0")
+            git(repo, "tag -a v1.0-annotated -m x v1.0")
+            git(repo, "tag v2.0-alias v2.0")
+        for ref in ["main", "v1.0", "v2.0", "HEAD~1", "main^{tree}"]:
+            if ref.endswith("{tree}"):
+                (repo / "README").write_text("3\n")
+                git(repo, "commit -q -a -m three")
+                git(repo, "checkout -q --detach")
+            else:
+                git(repo, f"checkout -q --detach {ref}")
+            assert_ref_reader_matches_git(repo)
+        git(repo, "checkout -q main")
+        assert_ref_reader_matches_git(repo)
+    # Linked worktree (.git file + commondir)
+    worktree = tmp_path / "worktree"
+    git(repo, f"worktree add -q --detach {worktree} v1.0")
+    assert_ref_reader_matches_git(worktree)
+    # Separate git dir, as used by submodules
+    separate = tmp_path / "separate"
+    sp.run(
+        ["git", "clone", "-q", "--separate-git-dir", str(tmp_path / "sep.git")]
+        + [str(repo), str(separate)],
+        check=True,
+    )
+    git(separate, "checkout -q --detach origin/main")
+    assert_ref_reader_matches_git(separate)
+
+
+def test_ref_reader_unsupported(repo, tmp_path):
+    shallow = tmp_path / "shallow"
+    sp.run(
+        ["git", "clone", "-q", "--depth", "1", f"file://{repo}", str(shallow)],
+        check=True,
+    )
+    with pytest.raises(UnsupportedRepo):
+        RefReader(str(shallow)).get_version()
+    # get_version falls back to git, which reports grafted commits as hashes
+    assert GitRepository(None, str(shallow)).get_version() == ("v2.0", "h", True)
+
+
+def git_probe(gitrepo, monkeypatch, worktree=True):
+    """GitRepository.probe() without the paths that read .git directly"""
+
+    def unsupported(*args, **kwargs):
+        raise UnsupportedRepo("forced")
+
+    with monkeypatch.context() as m:
+        m.setattr("mepo.git.worktree_is_clean", lambda *args, **kwargs: False)
+        m.setattr(RefReader, "describe_head", unsupported)
+        return gitrepo.probe(worktree=worktree)
+
+
+def refresh(repo):
+    """Backdate tracked files so that no index entry is racily clean"""
+    past = time.time() - 10
+    for name in git(repo, "ls-files --sparse").splitlines():
+        if not name.endswith("/"):  # outside a sparse checkout cone
+            os.utime(repo / name, (past, past))
+    git(repo, "status")
+
+
+def test_quick_probe(repo, monkeypatch):
+    gitrepo = GitRepository(None, str(repo))
+    for ref in ["v1.0", "v2.0", "main"]:
+        git(repo, f"checkout -q {ref}")
+        refresh(repo)
+        quick = gitrepo._GitRepository__quick_probe(False, False, True)
+        assert quick is not None
+        assert quick._replace(short_oid=None) == git_probe(
+            gitrepo, monkeypatch
+        )._replace(short_oid=None)
+    (repo / "README").write_text("3\n")
+    git(repo, "stash -q")
+    refresh(repo)
+    quick = gitrepo._GitRepository__quick_probe(False, False, True)
+    assert quick.num_stashes == 1
+    # Changes go through git status
+    (repo / "README").write_text("4\n")
+    assert gitrepo._GitRepository__quick_probe(False, False, True) is None
+    assert gitrepo.probe().entries == git_probe(gitrepo, monkeypatch).entries != []
+
+
+def test_worktree_is_clean(repo):
+    def is_clean(**kwargs):
+        return worktree_is_clean(RefReader(str(repo)), str(repo), **kwargs)
+
+    refresh(repo)
+    assert is_clean()
+    (repo / ".gitignore").write_text("*.o\nbuild/\n")
+    git(repo, "add .gitignore")
+    git(repo, "commit -q -m ignore")
+    refresh(repo)
+    (repo / "a.o").write_text("")
+    (repo / "build").mkdir()
+    (repo / "build" / "b").write_text("")
+    (repo / "empty").mkdir()
+    assert is_clean()
+    (repo / "new").write_text("")
+    assert not is_clean()
+    assert is_clean(untracked=False)
+    git(repo, "add new")
+    assert not is_clean(untracked=False)  # staged
+    git(repo, "reset -q")
+    (repo / "README").write_text("changed\n")
+    assert not is_clean(untracked=False)
+    git(repo, "checkout -q README")
+    refresh(repo)
+    assert is_clean(untracked=False)
+    (repo / "README").chmod(0o755)
+    assert not is_clean(untracked=False)
+    assert is_clean(untracked=False, ignore_permissions=True) == (
+        git(repo, "-c core.fileMode=false status --porcelain -uno") == ""
+    )
+
+
+def test_ignore_rules():
+    rules = IgnoreRules()
+    rules.add_pattern("*.o", "")
+    rules.add_pattern("/top", "")
+    rules.add_pattern("doc/*.html", "")
+    rules.add_pattern("out/", "sub")
+    rules.add_pattern("**/cache", "")
+    assert rules.is_ignored("a.o", False) and rules.is_ignored("x/y/a.o", False)
+    assert rules.is_ignored("top", False) and not rules.is_ignored("x/top", False)
+    assert rules.is_ignored("doc/a.html", False)
+    assert not rules.is_ignored("doc/x/a.html", False)
+    assert rules.is_ignored("sub/out", True) and not rules.is_ignored("sub/out", False)
+    assert not rules.is_ignored("out", True)
+    assert rules.is_ignored("a/b/cache", True)
+    rules.add_pattern("!keep.o", "")
+    assert not rules.is_ignored("a.o", False)
+
+
+def test_run_concurrently(repo, tmp_path):
+    Comp = namedtuple("Comp", ["name", "remote", "local"])
+    clones = []
+    for i in range(5):
+        local = tmp_path / f"clone{i}"
+        sp.run(["git", "clone", "-q", str(repo), str(local)], check=True)
+        clones.append(Comp(f"clone{i}", str(repo), str(local)))
+    clones.append(Comp("missing", str(repo), str(tmp_path / "missing")))
+
+    async def job(comp, gitrepo):
+        await gitrepo.checkout("v1.0", detach=True)
+        return comp.name
+
+    results = run_concurrently(clones, job, max_jobs=2)
+    assert results[:5] == [x.name for x in clones[:5]]
+    assert isinstance(results[5], sp.CalledProcessError)
+    assert "missing" in results[5].stderr
+    for comp in clones[:5]:
+        assert GitRepository(None, comp.local).get_version() == ("v1.0", "t", True)
+
+
+def test_cached_git_repository(repo):
+    QueryCache.clear()
+    gitrepo = CachedGitRepository(None, str(repo))
+    probe = gitrepo.probe(worktree=False)
+    assert gitrepo.probe(False, False, False) is probe
+    # Shared by all instances of the same repository
+    assert CachedGitRepository(None, str(repo) + "/").probe(worktree=False) is probe
+    assert gitrepo.get_version() == ("main", "b", False)
+    # Changes made behind mepo's back are not seen during an invocation...
+    git(repo, "checkout -q --detach v1.0")
+    assert gitrepo.get_version() == ("main", "b", False)
+    # ...but writes through the facade invalidate the answers
+    gitrepo.checkout("v2.0")
+    assert gitrepo.get_version() == ("v2.0", "t", True)
+    assert gitrepo.probe(worktree=False).version == ("v2.0", "t", True)
+    QueryCache.clear()
+
+
+def test_clone_single_checkout(repo, tmp_path, monkeypatch):
+    (repo / "src").mkdir()
+    (repo / "src" / "a.txt").write_text("a\n")
+    git(repo, "add src")
+    git(repo, "commit -q -m src")
+    sparse = tmp_path / "sparse"
+    sparse.write_text("/src/\n")
+    commands = []
+    run = shellcmd.run
+    monkeypatch.setattr(
+        shellcmd, "run", lambda cmd, **kw: commands.append(cmd) or run(cmd, **kw)
+    )
+    GitRepository(str(repo), str(tmp_path / "clone")).clone(
+        "main", use_cache=False, sparse=str(sparse)
+    )
+    assert sorted(os.listdir(tmp_path / "clone")) == [".git", "src"]
+    assert git(tmp_path / "clone", "status --porcelain") == ""
+    assert [x[3] for x in commands if "clone" not in x] == ["config", "checkout"]
+
+    GitRepository(str(repo), str(tmp_path / "tagged")).clone("v1.0", use_cache=False)
+    assert (tmp_path / "tagged" / "README").read_text() == "1\n"
+    assert git(tmp_path / "tagged", "describe --tags") == "v1.0"
+
+
+def test_clone_cone_mode(repo, tmp_path):
+    for path in ["src/a.txt", "src/sub/b.txt", "doc/c.txt"]:
+        (repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / path).write_text(f"{path}\n")
+    git(repo, "add src doc")
+    git(repo, "commit -q -m dirs")
+    clone = tmp_path / "clone"
+    gitrepo = GitRepository(str(repo), str(clone))
+    gitrepo.clone("main", use_cache=False, sparse=["src"])
+    assert sorted(os.listdir(clone)) == [".git", "README", "src"]
+    assert git(clone, "config index.sparse") == "true"
+    assert "doc/" in git(clone, "ls-files --sparse").split()
+    refresh(clone)
+    assert worktree_is_clean(RefReader(str(clone)), str(clone))
+    gitrepo.sparsify(["src", "doc"])
+    assert (clone / "doc" / "c.txt").exists()
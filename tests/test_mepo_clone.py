@@ -1,9 +1,13 @@
 import os
 import io
+import json
 import shutil
 import contextlib
+import subprocess as sp
 from types import SimpleNamespace
 
+import pytest
+
 try:
     from contextlib import chdir as contextlib_chdir
 except ImportError:
@@ -11,6 +15,11 @@ except ImportError:
 
 import mepo.command.clone as mepo_clone
 import mepo.command.status as mepo_status
+import mepo.command.diff as mepo_diff
+import mepo.command.checkout as mepo_checkout
+import mepo.command.deepen as mepo_deepen
+import mepo.command.bundle as mepo_bundle
+import mepo.command.worktree as mepo_worktree
 
 
 FIXTURE_NAME = "GEOSfvdycore-mepo-testing"
@@ -151,3 +160,318 @@ fvdycore               | (b) geos/develop
         status_output = get_mepo_status()
     assert status_output == saved_output
     shutil.rmtree(FIXTURE_NAME)
+
+
+def git(*args):
+    sp.run(["git", *args], check=True, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+
+
+@pytest.fixture
+def local_fixture(tmp_path):
+    """
+    Fixture (not cloned yet) of components comp1 and comp1/comp2, with two
+    commits each, in bare repositories on disk (file:// since git ignores
+    --depth for plain paths)
+    """
+    for name in ["fixture", "comp1", "comp2"]:
+        work = tmp_path / "work" / name
+        git("init", "-q", "-b", "main", str(work))
+        for i in ["1", "2"]:
+            (work / "README").write_text(f"{name} {i}\n")
+            git("-C", str(work), "add", "README")
+            git(
+                "-C",
+                str(work),
+                "-c",
+                "user.name=m",
+                "-c",
+                "user.email=m@m",
+                "commit",
+                "-qm",
+                i,
+            )
+        git("-C", str(work), "tag", "v1.0")
+        git("clone", "-q", "--bare", str(work), str(tmp_path / f"{name}.git"))
+    fixture = tmp_path / "fixture"
+    git("clone", "-q", str(tmp_path / "fixture.git"), str(fixture))
+    (fixture / "components.yaml").write_text(
+        "fixture:\n  fixture: true\n  develop: main\n\n"
+        f"comp1:\n  local: ./comp1\n  remote: file://{tmp_path}/comp1.git\n  tag: v1.0\n\n"
+        f"comp2:\n  local: ./comp1/comp2\n  remote: file://{tmp_path}/comp2.git\n  branch: main\n"
+    )
+    return fixture
+
+
+def clone_args(**kwargs):
+    args = dict(
+        style="naked",
+        registry=None,
+        url=None,
+        branch=None,
+        directory=None,
+        partial=None,
+        allrepos=False,
+        resume=False,
+        depth=None,
+        from_bundles=None,
+        from_fixture=None,
+        jobs=2,
+    )
+    args.update(kwargs)
+    return SimpleNamespace(**args)
+
+
+def test_mepo_clone_resume(local_fixture):
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args())
+        journal_file = local_fixture / ".mepo" / "clone-journal.json"
+        assert json.loads(journal_file.read_text()) == {
+            "comp1": "checked-out",
+            "comp2": "checked-out",
+        }
+        # Interrupted during the checkout of comp1 and the clone of comp2
+        shutil.rmtree(local_fixture / "comp1" / "comp2")
+        (local_fixture / "comp1" / "comp2").mkdir()
+        os.remove(local_fixture / "comp1" / ".git" / "index")
+        os.remove(local_fixture / "comp1" / "README")
+        journal_file.write_text('{"comp1": "cloned", "comp2": "started"}')
+        with pytest.raises(RuntimeError, match="mepo clone --resume"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                mepo_clone.run(clone_args())
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_clone.run(clone_args(resume=True))
+        lines = output.getvalue().splitlines()
+        assert lines[:2] == ["comp1   | (t) v1.0", "comp2   | (b) origin/main"]
+        # Summary of the two clones it made
+        assert lines[3].split() == [
+            "Component",
+            "Time",
+            "(s)",
+            "Received",
+            "On",
+            "disk",
+        ]
+        assert sorted(x.split()[0] for x in lines[4:]) == ["Total", "comp1", "comp2"]
+        assert (local_fixture / "comp1" / "comp2" / "README").read_text() == "comp2 2\n"
+        status = get_mepo_status()
+    assert "comp1   | (t) v1.0 (DH)\n" in status
+    assert status.endswith("comp2   | (b) main\n")
+
+
+def test_mepo_clone_depth(local_fixture):
+    first = sp.run(
+        ["git", "-C", str(local_fixture.parent / "comp2.git"), "rev-parse", "main~1"],
+        stdout=sp.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+    with open(local_fixture / "components.yaml", "a") as fout:
+        fout.write(
+            f"\ncomp3:\n  local: ./comp3\n  remote: file://{local_fixture.parent}"
+            f"/comp2.git\n  hash: {first}\n"
+        )
+
+    def count(comp):
+        output = sp.run(
+            ["git", "-C", comp, "rev-list", "--count", "HEAD"],
+            stdout=sp.PIPE,
+            universal_newlines=True,
+        )
+        return int(output.stdout)
+
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args(depth=1))
+        # comp2 follows a branch, so it is a full clone
+        assert [count(x) for x in ["comp1", "comp1/comp2", "comp3"]] == [1, 2, 1]
+        assert (local_fixture / "comp3" / "README").read_text() == "comp2 1\n"
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_deepen.run(SimpleNamespace(comp_name=["comp1", "comp2"], depth=None))
+        assert output.getvalue() == (
+            "Fetched the full history of comp1\ncomp2 is not a shallow clone\n"
+        )
+        assert count("comp1") == 2
+        assert (
+            "origin/main"
+            in sp.run(
+                ["git", "-C", "comp1", "branch", "-r"],
+                stdout=sp.PIPE,
+                universal_newlines=True,
+            ).stdout
+        )
+
+
+def test_mepo_clone_from_bundles(local_fixture, tmp_path):
+    first = sp.run(
+        ["git", "-C", str(tmp_path / "comp2.git"), "rev-parse", "main~1"],
+        stdout=sp.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+    with open(local_fixture / "components.yaml", "a") as fout:
+        fout.write(
+            f"\ncomp3:\n  local: ./comp3\n  remote: file://{tmp_path}/comp2.git"
+            f"\n  hash: {first}\n"
+        )
+    bundle_dir = tmp_path / "bundles"
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args())
+    # From within a component, whose origin is not the fixture's
+    with contextlib_chdir(local_fixture / "comp1"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_bundle.run(
+                SimpleNamespace(
+                    mepo_bundle_cmd="create", directory=str(bundle_dir), comp_name=[]
+                )
+            )
+    manifest = json.loads((bundle_dir / "mepo-bundles.json").read_text())
+    assert manifest["fixture"] == "fixture"
+    assert manifest["components"]["fixture"]["remote"] == str(tmp_path / "fixture.git")
+    assert manifest["components"]["comp3"]["ref"] == f"refs/mepo/{first}"
+    # No network: the remotes are gone
+    for name in ["fixture", "comp1", "comp2"]:
+        shutil.rmtree(tmp_path / f"{name}.git")
+    with contextlib_chdir(tmp_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args(from_bundles=str(bundle_dir), url="offline"))
+    offline = tmp_path / "offline"
+    assert (offline / "comp1" / "comp2" / "README").read_text() == "comp2 2\n"
+    assert (offline / "comp3" / "README").read_text() == "comp2 1\n"
+    remote = sp.run(
+        ["git", "-C", str(offline / "comp1"), "remote", "get-url", "origin"],
+        stdout=sp.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+    assert remote == f"file://{tmp_path}/comp1.git"
+    with contextlib_chdir(offline):
+        status = get_mepo_status()
+    assert "comp1   | (t) v1.0 (DH)\n" in status
+    assert "comp2   | (b) main\n" in status
+
+
+def test_mepo_worktree(local_fixture, tmp_path):
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args())
+            mepo_worktree.run(
+                SimpleNamespace(
+                    mepo_worktree_cmd="add",
+                    path=str(tmp_path / "wt"),
+                    target=None,
+                    style=None,
+                    jobs=2,
+                )
+            )
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_worktree.run(SimpleNamespace(mepo_worktree_cmd="list"))
+    line = output.getvalue().splitlines()[1]
+    assert line.split()[:4] == [str(tmp_path / "wt"), "|", "detached", "at"]
+    assert line.endswith(" (2 components)")
+    worktree = tmp_path / "wt"
+    # Objects are shared, comp2 (on main here too) is checked out detached
+    assert (worktree / "comp1" / ".git").is_file()
+    assert (worktree / "comp1" / "comp2" / "README").read_text() == "comp2 2\n"
+    with contextlib_chdir(worktree):
+        status = get_mepo_status()
+    assert "comp1   | (t) v1.0 (DH)\n" in status
+    # Refused before anything is removed
+    readme = (worktree / "README").read_text()
+    (worktree / "README").write_text("changed\n")
+    remove = SimpleNamespace(
+        mepo_worktree_cmd="remove", path=str(worktree), force=False
+    )
+    with contextlib_chdir(local_fixture):
+        with pytest.raises(Exception, match=r"fixture has changes \(README\)"):
+            mepo_worktree.run(remove)
+    assert (worktree / ".mepo" / "state.json").exists()
+    assert (worktree / "comp1" / "comp2" / "README").exists()
+    (worktree / "README").write_text(readme)
+    (worktree / "comp1" / "new").write_text("new\n")
+    with contextlib_chdir(local_fixture):
+        with pytest.raises(Exception, match=r"comp1 has changes \(new\)"):
+            mepo_worktree.run(remove)
+    (worktree / "comp1" / "new").unlink()
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_worktree.run(remove)
+        assert output.getvalue() == f"Removed {worktree}\n"
+        assert not worktree.exists()
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_worktree.run(SimpleNamespace(mepo_worktree_cmd="prune", jobs=2))
+        assert output.getvalue() == "Nothing to prune\n"
+
+
+def test_mepo_clone_from_fixture(local_fixture, tmp_path):
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args())
+    # A version the source does not have
+    git("-C", str(tmp_path / "comp1.git"), "tag", "v2.0", "main~1")
+    registry = (local_fixture / "components.yaml").read_text()
+    registry = registry.replace("tag: v1.0", "tag: v2.0")
+    (tmp_path / "registry.yaml").write_text(registry)
+    with contextlib_chdir(tmp_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(
+                clone_args(
+                    url=f"file://{tmp_path}/fixture.git",
+                    directory="copy",
+                    registry=str(tmp_path / "registry.yaml"),
+                    from_fixture="fixture",
+                )
+            )
+    copy = tmp_path / "copy"
+    assert (copy / "comp1" / "README").read_text() == "comp1 1\n"
+    assert (copy / "comp1" / "comp2" / "README").read_text() == "comp2 2\n"
+    # Objects are hard-linked to those of the source
+    objects = copy / "comp1" / "comp2" / ".git" / "objects"
+    assert any(x.stat().st_nlink > 1 for x in objects.rglob("*") if x.is_file())
+    remote = sp.run(
+        ["git", "-C", str(copy / "comp1"), "remote", "get-url", "origin"],
+        stdout=sp.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+    assert remote == f"file://{tmp_path}/comp1.git"
+    with contextlib_chdir(copy):
+        status = get_mepo_status()
+    assert "comp1   | (t) v2.0 (DH)\n" in status
+    assert status.endswith("comp2   | (b) main\n")
+
+
+def test_failed_component_jobs(local_fixture, tmp_path):
+    with contextlib_chdir(local_fixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mepo_clone.run(clone_args())
+        # A change in comp1, comp2 is gone
+        (local_fixture / "comp1" / "README").write_text("changed\n")
+        shutil.move(local_fixture / "comp1" / "comp2", tmp_path / "comp2")
+        for jobs in [1, 2]:
+            args = SimpleNamespace(
+                comp_name=[],
+                jobs=jobs,
+                name_only=True,
+                name_status=False,
+                staged=False,
+                ignore_permissions=False,
+                ignore_space_change=False,
+            )
+            with contextlib.redirect_stderr(io.StringIO()) as errors:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    with pytest.raises(sp.CalledProcessError):
+                        mepo_diff.run(args)
+            assert "Failed in 1 of 3 components:\n  comp2: " in errors.getvalue()
+        args = SimpleNamespace(
+            comp_name=["comp1", "comp2"],
+            branch_name="main",
+            b=False,
+            quiet=False,
+            detach=False,
+            jobs=2,
+        )
+        with contextlib.redirect_stderr(io.StringIO()):
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                with pytest.raises(Exception):
+                    mepo_checkout.run(args)
+    # Only the checkout that happened is reported
+    assert "Checking out" in output.getvalue()
+    assert "in comp2" not in output.getvalue()
@@ -0,0 +1,98 @@
+import os
+import time
+import subprocess as sp
+
+import pytest
+
+from mepo.git import GitRepository
+from mepo.utilities import objectcache
+
+
+def git(*args):
+    sp.run(["git", *args], check=True, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """URL of a bare repository with one commit"""
+    work = tmp_path / "work"
+    git("init", "-q", "-b", "main", str(work))
+    (work / "README").write_text("1\n")
+    git("-C", str(work), "add", "README")
+    git(
+        "-C",
+        str(work),
+        "-c",
+        "user.name=m",
+        "-c",
+        "user.email=m@m",
+        "commit",
+        "-qm",
+        "1",
+    )
+    git("clone", "-q", "--bare", str(work), str(tmp_path / "remote.git"))
+    return f"file://{tmp_path}/remote.git"
+
+
+def use_cache(monkeypatch, cache_dir, mode="reference"):
+    config = {"dir": str(cache_dir), "mode": mode}
+    monkeypatch.setattr(
+        objectcache.mepoconfig,
+        "has_option",
+        lambda section, option: section == "cache" and option in config,
+    )
+    monkeypatch.setattr(objectcache.mepoconfig, "get", lambda s, o: config[o])
+
+
+def test_mirror_path():
+    path = objectcache.mirror_path("/cache", "https://github.com/GEOS-ESM/MAPL.git")
+    assert path.startswith("/cache/MAPL-") and path.endswith(".git")
+    assert path == objectcache.mirror_path(
+        "/cache", "https://github.com/GEOS-ESM/MAPL/"
+    )
+    assert path != objectcache.mirror_path("/cache", "https://github.com/other/MAPL")
+
+
+def test_no_cache(monkeypatch, remote):
+    monkeypatch.setattr(objectcache.mepoconfig, "has_option", lambda *args: False)
+    assert objectcache.reference_for(remote) == []
+
+
+@pytest.mark.parametrize("mode", objectcache.MODES)
+def test_clone_with_cache(monkeypatch, tmp_path, remote, mode):
+    use_cache(monkeypatch, tmp_path / "cache", mode)
+    for name in ["clone1", "clone2"]:
+        GitRepository(remote, str(tmp_path / name)).clone("main")
+        alternates = tmp_path / name / ".git" / "objects" / "info" / "alternates"
+        assert alternates.exists() == (mode == "reference")
+        assert (tmp_path / name / "README").read_text() == "1\n"
+    (mirror,) = objectcache.list_mirrors(str(tmp_path / "cache"))
+    assert mirror[0] == objectcache.mirror_path(str(tmp_path / "cache"), remote)
+    assert mirror[1] == remote
+
+
+def test_prune(monkeypatch, tmp_path, remote):
+    cache_dir = str(tmp_path / "cache")
+    path = objectcache.update_mirror(cache_dir, remote)
+    assert objectcache.prune(cache_dir, days=1) == []
+    old = time.time() - 2 * 86400
+    os.utime(os.path.join(path, objectcache.LAST_USED_FILE), (old, old))
+    assert objectcache.prune(cache_dir, days=1, dry_run=True) == [path]
+    assert os.path.isdir(path)
+    assert objectcache.prune(cache_dir, days=1) == [path]
+    assert objectcache.list_mirrors(cache_dir) == []
+
+
+def test_mirror_keeps_borrowed_objects(tmp_path, remote):
+    cache_dir = str(tmp_path / "cache")
+    git("-C", str(tmp_path / "remote.git"), "branch", "topic", "main")
+    path = objectcache.update_mirror(cache_dir, remote)
+    # A clone may borrow the objects of topic, deleted upstream
+    git("-C", str(tmp_path / "remote.git"), "branch", "-D", "topic")
+    assert objectcache.update_mirror(cache_dir, remote) == path
+    git("-C", path, "rev-parse", "--verify", "refs/heads/topic")
+    for key, value in objectcache.MIRROR_CONFIG.items():
+        output = sp.run(
+            ["git", "-C", path, "config", key], stdout=sp.PIPE, universal_newlines=True
+        )
+        assert output.stdout.strip() == value
@@ -0,0 +1,47 @@
+import io
+import contextlib
+
+from mepo.utilities.progress import CloneProgress
+from mepo.utilities.progress import parse_line
+
+
+def test_parse_line():
+    assert parse_line("Receiving objects:  45% (450/1000), 1.50 MiB | 2.00 KiB/s") == (
+        "Receiving objects",
+        45,
+        450,
+        1000,
+        1.5 * 2**20,
+        2048.0,
+    )
+    assert parse_line("Resolving deltas: 100% (12/12), done.") == (
+        "Resolving deltas",
+        100,
+        12,
+        12,
+        None,
+        None,
+    )
+    assert parse_line("Cloning into 'comp1'...") is None
+    assert parse_line("remote: Enumerating objects: 5, done.") is None
+
+
+def test_clone_progress(tmp_path):
+    (tmp_path / "comp1" / ".git").mkdir(parents=True)
+    (tmp_path / "comp1" / ".git" / "HEAD").write_text("x" * 2048)
+    report = CloneProgress(["comp1", "comp2", "comp3"], stream=io.StringIO())
+    with report.live():  # not a terminal, nothing is drawn
+        report.start("comp1")
+        report.update("comp1", "Receiving objects: 100% (3/3), 3.00 KiB | 1.00 KiB/s")
+        report.finish("comp1", str(tmp_path / "comp1"))
+        report.start("comp2")
+        report.finish("comp2")  # failed
+        report.skip("comp3")
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        report.print_summary()
+    lines = output.getvalue().splitlines()
+    assert lines[1].split() == ["Component", "Time", "(s)", "Received", "On", "disk"]
+    assert lines[2].split()[0] == "comp1"
+    assert lines[2].split()[2:] == ["3.0", "KiB", "2.0", "KiB"]
+    assert lines[3].split()[0] == "Total"
+    assert len(lines) == 4
@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 from mepo.registry import Registry
 
 TEST_DIR = os.path.dirname(os.path.realpath(__file__))
@@ -17,3 +19,79 @@ def test_registry():
     registry = os.path.join(TEST_DIR, "input", "components.yaml")
     a = Registry(registry).read_file()
     assert a["ecbuild"] == get_ecbuild_details()
+
+
+def test_registry_sparse(tmp_path):
+    registry = tmp_path / "components.yaml"
+    fixture = "fixture:\n  fixture: true\n  develop: main\n\n"
+    comp = "comp:\n  local: ./@comp\n  remote: ../comp.git\n  tag: v1.0\n"
+    registry.write_text(fixture + comp + "  sparse:\n  - src\n  - doc/api\n")
+    assert Registry(str(registry)).read_file()["comp"]["sparse"] == ["src", "doc/api"]
+    registry.write_text(fixture + comp + "  sparse: ./comp.sparse\n")
+    assert Registry(str(registry)).read_file()["comp"]["sparse"] == "./comp.sparse"
+    registry.write_text(fixture + comp + "  sparse:\n    src: true\n")
+    with pytest.raises(ValueError, match="sparse of comp"):
+        Registry(str(registry)).read_file()
+
+
+def test_registry_cache(tmp_path, monkeypatch):
+    import yaml
+
+    registry = tmp_path / "fixture" / "components.yaml"
+    registry.parent.mkdir()
+    fixture = "fixture:\n  fixture: true\n  develop: main\n\n"
+    comp = "comp:\n  local: ./@comp\n  remote: ../comp.git\n  tag: v1.0\n"
+    registry.write_text(fixture + comp)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.chdir(registry.parent)
+    # Cached before there is a fixture, outside of it
+    expected = Registry(str(registry)).read_file()
+    assert os.listdir(registry.parent) == ["components.yaml"]
+    assert len(os.listdir(tmp_path / "cache" / "mepo" / "registries")) == 1
+    # Not parsed again while unchanged, whatever its mtime
+    with monkeypatch.context() as m:
+        m.setattr(yaml, "load", None)
+        os.utime(registry, ns=(0, 0))
+        assert Registry(str(registry)).read_file() == expected
+        assert Registry(str(registry)).read_file() == expected
+    registry.write_text(fixture + comp.replace("v1.0", "v2.0"))
+    assert Registry(str(registry)).read_file()["comp"]["tag"] == "v2.0"
+
+
+def test_registry_include(tmp_path, monkeypatch):
+    import yaml
+
+    fixture = "fixture:\n  fixture: true\n  develop: main\n\n"
+    comp = "{0}:\n  local: ./@{0}\n  remote: ../{0}.git\n  tag: v1.0\n"
+    registry = tmp_path / "components.yaml"
+    registry.write_text(
+        "include:\n- registries/*.yaml\n- extra.json\n\n" + fixture + comp.format("a")
+    )
+    (tmp_path / "registries").mkdir()
+    (tmp_path / "registries" / "c.yaml").write_text(comp.format("c"))
+    (tmp_path / "registries" / "b.yaml").write_text(
+        "include: extra.json\n\n" + comp.format("b")
+    )
+    (tmp_path / "extra.json").write_text('{"d": {"local": "./@d", "hash": "abc"}}')
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    d = Registry(str(registry)).read_file()
+    assert list(d) == ["fixture", "a", "b", "d", "c"]
+    # Unchanged files are not parsed again, a changed one is
+    (tmp_path / "registries" / "c.yaml").write_text(comp.format("e"))
+    load = yaml.load
+    parsed = []
+    monkeypatch.setattr(
+        yaml, "load", lambda x, Loader: parsed.append(x) or load(x, Loader)
+    )
+    assert list(Registry(str(registry)).read_file()) == ["fixture", "a", "b", "d", "e"]
+    assert parsed == [comp.format("e").encode()]
+    # Validated as a whole
+    (tmp_path / "registries" / "c.yaml").write_text(comp.format("a"))
+    with pytest.raises(ValueError, match="a is in both"):
+        Registry(str(registry)).read_file()
+    (tmp_path / "registries" / "c.yaml").write_text(
+        fixture.replace("fixture:", "f:", 1)
+    )
+    with pytest.raises(AssertionError):
+        Registry(str(registry)).read_file()
@@ -0,0 +1,42 @@
+import sys
+import subprocess as sp
+
+import pytest
+
+from mepo.utilities import shellcmd
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def test_stream():
+    code = "import sys; print('a'); print('b  '); print('warn', file=sys.stderr)"
+    lines = list(shellcmd.stream(python(code)))
+    assert lines == ["a", "b  ", "warn"]
+    assert "\n".join(lines) + "\n" == shellcmd.run(python(code), output=True)
+
+
+def test_stream_first_line_early():
+    # The first line is there before the command has finished
+    code = "import sys, time; print('a', flush=True); time.sleep(60)"
+    proc_lines = shellcmd.stream(python(code))
+    assert next(proc_lines) == "a"
+    proc_lines.close()  # kills the waiting command
+
+
+def test_stream_failure(capsys):
+    code = "import sys; print('out'); sys.exit('boom')"
+    with pytest.raises(sp.CalledProcessError) as e:
+        list(shellcmd.stream(python(code)))
+    assert "boom" in e.value.stderr
+    assert "boom" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "output", ["", "\n\n", "a", "a\n", "  a\n\nb \n  \n\n", "\n a\n", "a\n \nb"]
+)
+def test_rstrip_lines(output):
+    expected = output.rstrip().split("\n") if output.rstrip() else []
+    lines = output.split("\n")
+    assert list(shellcmd.rstrip_lines(iter(lines))) == expected
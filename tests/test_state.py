@@ -0,0 +1,148 @@
+import os
+import io
+import sys
+import glob
+import json
+import zipfile
+import contextlib
+import multiprocessing
+from types import SimpleNamespace
+
+try:
+    from contextlib import chdir as contextlib_chdir
+except ImportError:
+    from mepo.utilities.chdir import chdir as contextlib_chdir
+
+from mepo.state import MepoState
+import mepo.command.state as mepo_state
+
+
+def make_fixture(root):
+    (root / ".mepo").mkdir(parents=True)
+    (root / ".mepo" / "state.0.json").write_text(
+        json.dumps(
+            [{"name": "comp1", "local": "src/comp1", "version": ["v1", "t", True]}]
+        )
+    )
+    os.symlink("state.0.json", root / ".mepo" / "state.json")
+    (root / "src" / "comp1" / "deep").mkdir(parents=True)
+
+
+def test_state_dir_discovery(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEPO_ROOT", raising=False)
+    fixture = tmp_path / "fixture"
+    make_fixture(fixture)
+    with contextlib_chdir(fixture / "src" / "comp1" / "deep"):
+        assert MepoState.get_root_dir() == str(fixture)
+        assert MepoState.read_state()[0].local == str(fixture / "src" / "comp1")
+    # A build directory elsewhere, with a pointer to the fixture
+    build = tmp_path / "build"
+    (build / "sub").mkdir(parents=True)
+    (build / ".mepo").write_text("../fixture\n")
+    with contextlib_chdir(build / "sub"):
+        assert MepoState.get_root_dir() == str(fixture)
+    # MEPO_ROOT wins over a nested fixture, only within it
+    make_fixture(fixture / "src" / "comp1" / "nested")
+    monkeypatch.setenv("MEPO_ROOT", str(fixture))
+    with contextlib_chdir(fixture / "src" / "comp1" / "nested" / "src"):
+        assert MepoState.get_root_dir() == str(fixture)
+    with contextlib_chdir(build):
+        assert MepoState.get_root_dir() == str(fixture)
+
+
+def test_state_dir_is_cached(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEPO_ROOT", raising=False)
+    make_fixture(tmp_path)
+    calls = []
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, "exists", lambda x: calls.append(x) or exists(x))
+    with contextlib_chdir(tmp_path / "src" / "comp1" / "deep"):
+        for _ in range(3):
+            MepoState.read_state()
+    # One lookup of .mepo per parent directory, then one per state file read
+    assert len([x for x in calls if x.endswith(".mepo")]) == 4
+
+
+def test_state_history(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEPO_ROOT", raising=False)
+    make_fixture(tmp_path)
+    with contextlib_chdir(tmp_path):
+        # The log of a fixture from before it starts with its state files
+        for _ in range(3):
+            MepoState.write_state(MepoState.read_state())
+        manifest = MepoState.read_manifest()
+        assert manifest["latest"] == 3
+        assert [x["id"] for x in manifest["states"]] == [0, 1, 2, 3]
+        assert manifest["states"][0]["components"] is None
+        assert manifest["states"][3]["components"] == 1
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_state.run(
+                SimpleNamespace(
+                    mepo_state_cmd="gc", keep=2, delete=False, dry_run=False
+                )
+            )
+        assert output.getvalue() == "Archived 2 states, kept 2\n"
+        assert sorted(os.listdir(".mepo")) == [
+            "state-archive.zip",
+            "state-log.jsonl",
+            "state.2.json",
+            "state.3.json",
+            "state.json",
+            "state.lock",
+        ]
+        with zipfile.ZipFile(".mepo/state-archive.zip") as fzip:
+            assert fzip.namelist() == ["state.0.json", "state.1.json"]
+        MepoState.write_state(MepoState.read_state())
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            mepo_state.run(SimpleNamespace(mepo_state_cmd="log", max_count=3))
+    lines = output.getvalue().splitlines()
+    assert [x[:3] for x in lines] == ["* 4", "  3", "  2"]
+    assert lines[1].endswith("  1 components  mepo " + " ".join(sys.argv[1:]))
+
+
+def write_states(count):
+    for _ in range(count):
+        MepoState.write_state(MepoState.read_state())
+
+
+def test_concurrent_state_writes(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEPO_ROOT", raising=False)
+    make_fixture(tmp_path)
+    with contextlib_chdir(tmp_path):
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=write_states, args=(5,)) for _ in range(4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        assert all(proc.exitcode == 0 for proc in procs)
+        # No state lost or written twice, nothing left half-written
+        manifest = MepoState.read_manifest()
+        assert [x["id"] for x in manifest["states"]] == list(range(21))
+        assert os.readlink(".mepo/state.json") == "state.20.json"
+        assert not [x for x in os.listdir(".mepo") if x.endswith(".tmp")]
+        assert len(MepoState.read_state()) == 1
+
+
+def test_stale_state_pointer(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEPO_ROOT", raising=False)
+    make_fixture(tmp_path)
+    with contextlib_chdir(tmp_path):
+        for _ in range(2):
+            MepoState.write_state(MepoState.read_state())
+        # e.g., .mepo restored from a copy made before the last state
+        os.remove(".mepo/state.json")
+        os.symlink("state.1.json", ".mepo/state.json")
+        # The next id comes from state.json and the files past it, not
+        # from a listing of the state dir
+        with monkeypatch.context() as m:
+            m.setattr(os, "listdir", None)
+            m.setattr(glob, "glob", None)
+            MepoState.write_state(MepoState.read_state())
+        assert os.readlink(".mepo/state.json") == "state.3.json"
+        assert sorted(os.path.basename(x) for x in glob.glob(".mepo/state.*.json")) == [
+            "state.0.json",
+            "state.1.json",
+            "state.2.json",
+            "state.3.json",
+        ]
@@ -0,0 +1,29 @@
+import json
+
+from mepo.utilities import shellcmd
+from mepo.utilities import trace
+
+
+def test_command_name():
+    assert trace.command_name(["git", "-C", "a b", "-c", "x=y", "status", "-s"]) == (
+        "git status"
+    )
+    assert trace.command_name(["/usr/bin/git", "--no-pager", "log"]) == "git log"
+    assert trace.command_name(["vi", "file"]) == "vi"
+
+
+def test_trace(tmp_path, capsys):
+    trace_file = tmp_path / "trace.json"
+    trace.start(str(trace_file))
+    shellcmd.run(["git", "-C", str(tmp_path), "--version"])
+    assert shellcmd.run(["git", "-C", str(tmp_path), "status"], status=True) != 0
+    trace.finish()
+    assert not trace.enabled()
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    spans = [x for x in events if x["ph"] == "X"]
+    assert [x["name"] for x in spans] == ["git", "git status"]
+    assert spans[1]["args"]["returncode"] != 0
+    assert spans[1]["args"]["cwd"] == str(tmp_path)
+    assert all(x["dur"] >= 0 for x in spans)
+    summary = capsys.readouterr().err
+    assert "2 processes" in summary and "git status" in summary